@@ -1,12 +1,15 @@
 """Главный модуль приложения ChatList с графическим интерфейсом."""
 
+import time
+
+# Начало отсчёта для профилирования запуска (--profile-startup)
+_STARTUP_TIME = time.perf_counter()
+
 import sys
 from datetime import datetime
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 
-import markdown
-
-from PyQt5.QtCore import Qt, QThread, pyqtSignal
+from PyQt5.QtCore import Qt, QThread, QTimer, pyqtSignal
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
     QTextEdit, QPushButton, QTableWidget, QTableWidgetItem, QComboBox,
@@ -18,15 +21,48 @@ import os
 
 from version import __version__
 
-from src import db
-from src.models import Model, get_active_models, add_default_models
-from src.network import send_prompt_to_model
-from src.ui.models_dialog import ModelsDialog
-from src.ui.history_dialogs import PromptsHistoryDialog, ResultsHistoryDialog
-from src.ui.prompt_enhancer_dialog import PromptEnhancerDialog
-from src.ui.settings_dialog import SettingsDialog
-from src.ui.about_dialog import AboutDialog
-from src.export import export_to_markdown, export_to_json
+from src import db, db_writer
+from src.cancellation import CancellationToken
+from src.models import (
+    Model, get_active_models, get_model_by_id, add_default_models
+)
+from src.markdown_render import MarkdownRenderService
+
+# Диалоги, экспорт и сетевой модуль (requests) импортируются по требованию,
+# чтобы не замедлять появление главного окна
+
+
+class StartupProfiler:
+    """Замер этапов запуска приложения (включается флагом --profile-startup)."""
+
+    def __init__(self, enabled: bool = False):
+        """Инициализация профилировщика."""
+        self.enabled = enabled
+        self.marks: List[Tuple[str, float]] = []
+
+    def mark(self, stage: str) -> None:
+        """Отметить завершение этапа запуска."""
+        if self.enabled:
+            self.marks.append((stage, time.perf_counter()))
+
+    def report(self) -> str:
+        """Сформировать отчёт о длительности этапов."""
+        lines = ['Профиль запуска ChatList:']
+        previous = _STARTUP_TIME
+        for stage, moment in self.marks:
+            lines.append(
+                f'  {stage:<28} {(moment - previous) * 1000:8.1f} мс '
+                f'(всего {(moment - _STARTUP_TIME) * 1000:8.1f} мс)'
+            )
+            previous = moment
+        return '\n'.join(lines)
+
+
+startup_profiler = StartupProfiler()
+
+
+# Общий срок выполнения запросов ко всем моделям по умолчанию (секунды)
+DEFAULT_REQUEST_DEADLINE = 300
 
 
 class RequestWorker(QThread):
@@ -34,17 +70,58 @@ class RequestWorker(QThread):
 
     finished = pyqtSignal(list)
 
-    def __init__(self, prompt: str, models: List[Model]):
-        """Инициализация потока."""
+    def __init__(
+        self,
+        prompt: str,
+        models: List[Model],
+        deadline: Optional[float] = None
+    ):
+        """Инициализация потока; deadline - общий срок в секундах."""
         super().__init__()
         self.prompt = prompt
         self.models = models
+        self.token = CancellationToken(deadline)
+
+    def cancel(self):
+        """Отменить запросы (активные соединения закрываются сразу)."""
+        self.token.cancel()
 
     def run(self):
-        """Выполнение запросов."""
+        """Выполнение запросов ко всем моделям параллельно."""
+        from src.credentials import get_credentials
+        from src.network import submit_prompt
+
+        try:
+            # Модели без ключа или с отклонённым ключом не запрашиваются
+            usable, excluded = get_credentials().split_models(
+                self.models, self.token
+            )
+
+            responses: Dict[int, Dict[str, Any]] = {}
+            # Запросы ждут лимита своего провайдера, не занимая потоков
+            futures = [
+                (model, submit_prompt(self.prompt, model, self.token))
+                for model in usable
+            ]
+            for model, future in futures:
+                responses[model.id] = future.result()
+        except Exception as e:
+            # finished отправляется всегда: интерфейс ждёт его, чтобы
+            # скрыть индикатор и снова разрешить отправку
+            self.finished.emit([
+                {'model': model, 'result': {'success': False, 'error': str(e)}}
+                for model in self.models
+            ])
+            return
+        finally:
+            self.token.close()
+
         results = []
         for model in self.models:
-            result = send_prompt_to_model(self.prompt, model)
+            if model.id in excluded:
+                result = {'success': False, 'error': excluded[model.id]}
+            else:
+                result = responses[model.id]
             results.append({
                 'model': model,
                 'result': result
@@ -55,6 +132,13 @@ class RequestWorker(QThread):
 class MainWindow(QMainWindow):
     """Главное окно приложения."""
 
+    # Завершение фоновой записи в БД: (Future, обработчик в GUI-потоке)
+    db_write_finished = pyqtSignal(object, object)
+    # Завершение синхронизации каталога моделей, запущенной из меню
+    catalog_synced = pyqtSignal(dict)
+    # Изменение настроек (подписчики вызываются в потоке записи БД)
+    settings_changed = pyqtSignal(dict)
+
     def __init__(self):
         """Инициализация главного окна."""
         super().__init__()
@@ -69,16 +153,93 @@ class MainWindow(QMainWindow):
         # Временная таблица результатов (в памяти)
         self.temp_results: List[Dict[str, Any]] = []
         self.current_prompt_id: Optional[int] = None
+        self.prompt_future = None
+        self.maintenance = None
+        self.worker: Optional[RequestWorker] = None
 
-        # Инициализация БД
+        # Инициализация БД (при актуальной схеме - одна проверка версии)
         db.init_database()
-        add_default_models()
+        if db.get_setting('db_maintenance', '1') == '1':
+            # Полный VACUUM небольшой БД - до того, как её откроют
+            # интерфейс и поток записи
+            from src.maintenance import prepare_database
+
+            prepare_database()
+        self.db_write_finished.connect(self.on_db_write_finished)
+        self.catalog_synced.connect(self.on_catalog_synced)
+        startup_profiler.mark('Инициализация БД')
+
+        # Рендеринг markdown-ответов в фоне с кэшированием
+        self.markdown_service = MarkdownRenderService(
+            self,
+            persist=db.get_setting('persist_markdown_cache', '0') == '1'
+        )
 
         self.init_ui()
         self.create_menu()
         
         # Применение настроек темы и шрифта (после создания UI)
         self.apply_settings()
+        self.settings_changed.connect(self.on_settings_changed)
+        db.subscribe_settings(self.settings_changed.emit)
+        startup_profiler.mark('Создание интерфейса')
+
+        # Некритичная для показа окна инициализация - после запуска цикла
+        # событий
+        QTimer.singleShot(0, self.on_startup_finished)
+
+    def on_startup_finished(self):
+        """Отложенная инициализация после показа окна."""
+        add_default_models()
+        startup_profiler.mark('Модели по умолчанию')
+
+        # Обслуживание БД (VACUUM, ANALYZE) в фоновом потоке
+        if db.get_setting('db_maintenance', '1') == '1':
+            from src.maintenance import MaintenanceService
+
+            self.maintenance = MaintenanceService()
+            self.maintenance.start()
+
+        # Синхронизация каталога моделей провайдера в фоне (раз в сутки)
+        if db.get_setting('catalog_sync', '1') == '1':
+            from src import catalog
+
+            if catalog.is_sync_due():
+                catalog.sync_catalog_in_background()
+
+    def closeEvent(self, event):
+        """Обработчик закрытия окна."""
+        if self.worker and self.worker.isRunning():
+            self.worker.cancel()
+            self.worker.wait(5000)
+        if self.maintenance:
+            self.maintenance.stop(timeout=5)
+        db_writer.shutdown_writer(timeout=5)
+        event.accept()
+
+    def submit_db_write(self, on_done, func, *args, **kwargs):
+        """Поставить запись в очередь потока записи БД.
+
+        on_done(future) вызывается в GUI-потоке после фиксации записи.
+        """
+        future = db_writer.get_writer().submit(func, *args, **kwargs)
+        future.add_done_callback(
+            lambda f: self.db_write_finished.emit(f, on_done)
+        )
+        return future
+
+    def on_db_write_finished(self, future, on_done):
+        """Обработчик завершения фоновой записи в БД."""
+        on_done(future)
+
+    def wait_prompt_id(self) -> Optional[int]:
+        """Получить ID текущего промта, дождавшись его сохранения."""
+        if self.current_prompt_id is None and self.prompt_future:
+            try:
+                self.current_prompt_id = self.prompt_future.result(timeout=5)
+            except Exception:
+                return None
+        return self.current_prompt_id
 
     def init_ui(self):
         """Инициализация интерфейса."""
@@ -114,6 +275,10 @@ class MainWindow(QMainWindow):
         models_action.triggered.connect(self.on_manage_models)
         settings_menu.addAction(models_action)
         
+        catalog_action = QAction('Обновить каталог моделей', self)
+        catalog_action.triggered.connect(self.on_sync_catalog)
+        settings_menu.addAction(catalog_action)
+
         settings_menu.addSeparator()
         
         app_settings_action = QAction('Настройки приложения', self)
@@ -132,6 +297,15 @@ class MainWindow(QMainWindow):
         results_action.triggered.connect(self.on_results_history)
         history_menu.addAction(results_action)
 
+        history_menu.addSeparator()
+        import_action = QAction('Импорт промтов и результатов...', self)
+        import_action.triggered.connect(self.on_import)
+        history_menu.addAction(import_action)
+
+        archive_action = QAction('Архивировать старые результаты...', self)
+        archive_action.triggered.connect(self.on_archive_results)
+        history_menu.addAction(archive_action)
+
         # Меню "Улучшение"
         enhance_menu = menubar.addMenu('Улучшение')
         enhance_action = QAction('Улучшить промт', self)
@@ -151,6 +325,11 @@ class MainWindow(QMainWindow):
         export_json_action.triggered.connect(self.on_export_json)
         export_menu.addAction(export_json_action)
 
+        export_menu.addSeparator()
+        export_history_action = QAction('Экспорт всей истории...', self)
+        export_history_action.triggered.connect(self.on_export_history)
+        export_menu.addAction(export_history_action)
+
         # Меню "Справка"
         help_menu = menubar.addMenu('Справка')
         about_action = QAction('О программе', self)
@@ -184,6 +363,11 @@ class MainWindow(QMainWindow):
         self.send_button.clicked.connect(self.on_send_clicked)
         buttons_layout.addWidget(self.send_button)
 
+        self.stop_button = QPushButton('Остановить')
+        self.stop_button.setEnabled(False)
+        self.stop_button.clicked.connect(self.on_stop_clicked)
+        buttons_layout.addWidget(self.stop_button)
+
         self.enhance_button = QPushButton('Улучшить промт')
         self.enhance_button.clicked.connect(self.on_enhance_prompt_clicked)
         buttons_layout.addWidget(self.enhance_button)
@@ -285,6 +469,7 @@ class MainWindow(QMainWindow):
         self.temp_results = []
         self.results_table.setRowCount(0)
         self.current_prompt_id = None
+        self.prompt_future = None
 
         # Получение активных моделей
         try:
@@ -309,31 +494,51 @@ class MainWindow(QMainWindow):
         self.progress_bar.setVisible(True)
         self.progress_bar.setRange(0, 0)  # Неопределённый прогресс
         self.send_button.setEnabled(False)
+        self.stop_button.setEnabled(True)
         self.save_results_button.setEnabled(False)
 
         # Запуск потока для запросов
         try:
-            self.worker = RequestWorker(prompt_text, models)
+            try:
+                deadline = float(db.get_setting(
+                    'request_deadline', str(DEFAULT_REQUEST_DEADLINE)
+                ))
+            except ValueError:
+                deadline = DEFAULT_REQUEST_DEADLINE
+            self.worker = RequestWorker(
+                prompt_text, models, deadline if deadline > 0 else None
+            )
             self.worker.finished.connect(self.on_requests_finished)
             self.worker.start()
         except Exception as e:
             self.progress_bar.setVisible(False)
             self.send_button.setEnabled(True)
+            self.stop_button.setEnabled(False)
             QMessageBox.critical(
                 self,
                 'Ошибка',
                 f'Ошибка при запуске запросов:\n{str(e)}'
             )
 
+    def on_stop_clicked(self):
+        """Обработчик нажатия кнопки 'Остановить'."""
+        if self.worker and self.worker.isRunning():
+            self.worker.cancel()
+        self.stop_button.setEnabled(False)
+
     def on_requests_finished(self, results: List[Dict[str, Any]]):
         """Обработчик завершения запросов."""
         self.progress_bar.setVisible(False)
         self.send_button.setEnabled(True)
+        self.stop_button.setEnabled(False)
 
-        # Сохранение промта в БД
+        # Сохранение промта в БД в фоне (повторный промт получает ID
+        # существующего); ID придёт в on_prompt_created
         tags = self.tags_input.text().strip()
-        self.current_prompt_id = db.create_prompt(
-            self.prompt_input.toPlainText(),
+        self.prompt_future = self.submit_db_write(
+            self.on_prompt_created,
+            db.create_prompt,
+            self.prompt_input.toPlainText().strip(),
             tags if tags else None
         )
 
@@ -363,6 +568,8 @@ class MainWindow(QMainWindow):
                     'tokens_used': result.get('tokens_used'),
                     'response_time': result.get('response_time')
                 })
+                # Заранее готовим HTML для кнопки "Открыть"
+                self.markdown_service.prefetch(response_text)
             else:
                 response_text = f"Ошибка: {result.get('error', 'Неизвестная ошибка')}"
 
@@ -390,6 +597,20 @@ class MainWindow(QMainWindow):
         if self.temp_results:
             self.save_results_button.setEnabled(True)
 
+    def on_prompt_created(self, future):
+        """Обработчик сохранения промта отправленного запроса."""
+        if future is not self.prompt_future:
+            return
+        try:
+            self.current_prompt_id = future.result()
+        except Exception as e:
+            QMessageBox.warning(
+                self,
+                'Ошибка',
+                f'Не удалось сохранить промт:\n{e}'
+            )
+            return
+
         # Обновление списка промтов
         self.update_prompts_combo()
 
@@ -401,9 +622,26 @@ class MainWindow(QMainWindow):
             return
 
         tags = self.tags_input.text().strip()
-        db.create_prompt(prompt_text, tags if tags else None)
-        self.update_prompts_combo()
+        self.submit_db_write(
+            self.on_prompt_saved,
+            db.create_prompt,
+            prompt_text,
+            tags if tags else None
+        )
 
+    def on_prompt_saved(self, future):
+        """Обработчик завершения сохранения промта."""
+        try:
+            future.result()
+        except Exception as e:
+            QMessageBox.warning(
+                self,
+                'Ошибка',
+                f'Не удалось сохранить промт:\n{e}'
+            )
+            return
+
+        self.update_prompts_combo()
         QMessageBox.information(
             self,
             'Успех',
@@ -412,7 +650,7 @@ class MainWindow(QMainWindow):
 
     def on_save_results_clicked(self):
         """Обработчик нажатия кнопки 'Сохранить выбранные'."""
-        if not self.current_prompt_id:
+        if not self.wait_prompt_id():
             QMessageBox.warning(
                 self,
                 'Предупреждение',
@@ -440,11 +678,8 @@ class MainWindow(QMainWindow):
             )
             return
 
-        db.save_results(selected_results)
-        QMessageBox.information(
-            self,
-            'Успех',
-            f'Сохранено результатов: {len(selected_results)}'
+        self.submit_db_write(
+            self.on_results_saved, db.save_results, selected_results
         )
 
         # Очистка временной таблицы
@@ -452,11 +687,30 @@ class MainWindow(QMainWindow):
         self.results_table.setRowCount(0)
         self.save_results_button.setEnabled(False)
 
+    def on_results_saved(self, future):
+        """Обработчик завершения сохранения результатов."""
+        try:
+            result_ids = future.result()
+        except Exception as e:
+            QMessageBox.critical(
+                self,
+                'Ошибка',
+                f'Не удалось сохранить результаты:\n{e}'
+            )
+            return
+
+        QMessageBox.information(
+            self,
+            'Успех',
+            f'Сохранено результатов: {len(result_ids)}'
+        )
+
     def on_clear_clicked(self):
         """Обработчик нажатия кнопки 'Очистить результаты'."""
         self.temp_results = []
         self.results_table.setRowCount(0)
         self.current_prompt_id = None
+        self.prompt_future = None
         self.save_results_button.setEnabled(False)
 
     def open_response_markdown(self, row: int):
@@ -473,12 +727,7 @@ class MainWindow(QMainWindow):
         response_text = result.get('response_text', '')
 
         # Получаем название модели
-        from src.models import load_models
-        models = load_models()
-        model = next(
-            (m for m in models if m.id == result['model_id']),
-            None
-        )
+        model = get_model_by_id(result['model_id'])
         model_name = model.name if model else 'Неизвестная модель'
 
         # Создаём диалог для отображения markdown
@@ -500,73 +749,44 @@ class MainWindow(QMainWindow):
         text_edit = QTextEdit()
         text_edit.setReadOnly(True)
 
-        # Конвертируем markdown в HTML
-        try:
-            html_content = markdown.markdown(
-                response_text,
-                extensions=['fenced_code', 'tables', 'nl2br']
-            )
-            # Добавляем базовые стили для улучшения отображения
-            styled_html = f'''
-            <html>
-            <head>
-                <style>
-                    body {{
-                        font-family: Arial, sans-serif;
-                        line-height: 1.6;
-                        padding: 10px;
-                    }}
-                    code {{
-                        background-color: #f4f4f4;
-                        padding: 2px 4px;
-                        border-radius: 3px;
-                        font-family: "Courier New", monospace;
-                    }}
-                    pre {{
-                        background-color: #f4f4f4;
-                        padding: 10px;
-                        border-radius: 5px;
-                        overflow-x: auto;
-                    }}
-                    pre code {{
-                        background-color: transparent;
-                        padding: 0;
-                    }}
-                    table {{
-                        border-collapse: collapse;
-                        width: 100%;
-                        margin: 10px 0;
-                    }}
-                    th, td {{
-                        border: 1px solid #ddd;
-                        padding: 8px;
-                        text-align: left;
-                    }}
-                    th {{
-                        background-color: #f2f2f2;
-                        font-weight: bold;
-                    }}
-                    h1, h2, h3, h4, h5, h6 {{
-                        margin-top: 20px;
-                        margin-bottom: 10px;
-                    }}
-                </style>
-            </head>
-            <body>
-                {html_content}
-            </body>
-            </html>
-            '''
-            text_edit.setHtml(styled_html)
-        except Exception as e:
-            # Если ошибка при конвертации, показываем как обычный текст
+        # HTML берётся из кэша; если ответ ещё не отрендерен, до окончания
+        # фонового рендеринга показывается исходный текст
+        html = self.markdown_service.get_cached(response_text)
+        if html is not None:
+            text_edit.setHtml(html)
+        else:
             text_edit.setPlainText(response_text)
-            QMessageBox.warning(
-                dialog,
-                'Предупреждение',
-                f'Ошибка при форматировании markdown: {str(e)}\n'
-                'Текст отображается без форматирования.'
-            )
+            render_key = self.markdown_service.cache_key(response_text)
+
+            def on_rendered(key: str, rendered_html: str):
+                if key == render_key:
+                    text_edit.setHtml(rendered_html)
+
+            def on_failed(key: str, error: str):
+                if key == render_key:
+                    QMessageBox.warning(
+                        dialog,
+                        'Предупреждение',
+                        f'Ошибка при форматировании markdown: {error}\n'
+                        'Текст отображается без форматирования.'
+                    )
+
+            def disconnect_handlers():
+                self.markdown_service.rendered.disconnect(on_rendered)
+                self.markdown_service.failed.disconnect(on_failed)
+
+            # Обработчики подключаются до запуска рендеринга: сигнал
+            # короткого ответа может прийти сразу после prefetch()
+            self.markdown_service.rendered.connect(on_rendered)
+            self.markdown_service.failed.connect(on_failed)
+            dialog.finished.connect(disconnect_handlers)
+            self.markdown_service.prefetch(response_text)
+
+            # Рендеринг мог завершиться между get_cached() и prefetch() -
+            # тогда задача не ставится и сигнала не будет
+            html = self.markdown_service.get_cached(response_text)
+            if html is not None:
+                text_edit.setHtml(html)
 
         layout.addWidget(text_edit)
 
@@ -579,6 +799,8 @@ class MainWindow(QMainWindow):
 
     def on_manage_models(self):
         """Обработчик открытия диалога управления моделями."""
+        from src.ui.models_dialog import ModelsDialog
+
         dialog = ModelsDialog(self)
         if dialog.exec_() == ModelsDialog.Accepted:
             # Обновление списка активных моделей не требуется,
@@ -591,6 +813,8 @@ class MainWindow(QMainWindow):
 
     def on_prompts_history(self):
         """Обработчик открытия истории промтов."""
+        from src.ui.history_dialogs import PromptsHistoryDialog
+
         dialog = PromptsHistoryDialog(self)
         if dialog.exec_() == PromptsHistoryDialog.Accepted:
             if dialog.selected_prompt_id:
@@ -603,12 +827,26 @@ class MainWindow(QMainWindow):
 
     def on_results_history(self):
         """Обработчик открытия истории результатов."""
+        from src.ui.history_dialogs import ResultsHistoryDialog
+
         dialog = ResultsHistoryDialog(self)
         dialog.exec_()
 
+    def on_import(self):
+        """Импорт промтов и результатов из файла."""
+        from src.ui.import_dialog import import_data
+
+        import_data(self)
+
+    def on_archive_results(self):
+        """Перенос старых результатов в архив."""
+        from src.ui.archive_dialog import archive_old_results
+
+        archive_old_results(self)
+
     def on_export_markdown(self):
         """Экспорт результатов в Markdown."""
-        if not self.temp_results or not self.current_prompt_id:
+        if not self.temp_results or not self.wait_prompt_id():
             QMessageBox.warning(
                 self,
                 'Предупреждение',
@@ -619,26 +857,24 @@ class MainWindow(QMainWindow):
         prompt = db.get_prompt_by_id(self.current_prompt_id)
         prompt_text = prompt['prompt'] if prompt else 'Неизвестный промт'
 
-        # Получаем названия моделей
-        from src.models import load_models
-        models = load_models()
-        model_dict = {m.id: m.name for m in models}
-
         export_results = []
         for result in self.temp_results:
+            model = get_model_by_id(result['model_id'])
             export_results.append({
-                'model_name': model_dict.get(result['model_id'], 'Неизвестно'),
+                'model_name': model.name if model else 'Неизвестно',
                 'response_text': result['response_text'],
                 'created_at': result.get('created_at', ''),
                 'tokens_used': result.get('tokens_used'),
                 'response_time': result.get('response_time')
             })
 
+        from src.ui.export_dialog import export_to_markdown
+
         export_to_markdown(export_results, prompt_text, self)
 
     def on_export_json(self):
         """Экспорт результатов в JSON."""
-        if not self.temp_results or not self.current_prompt_id:
+        if not self.temp_results or not self.wait_prompt_id():
             QMessageBox.warning(
                 self,
                 'Предупреждение',
@@ -649,23 +885,27 @@ class MainWindow(QMainWindow):
         prompt = db.get_prompt_by_id(self.current_prompt_id)
         prompt_text = prompt['prompt'] if prompt else 'Неизвестный промт'
 
-        # Получаем названия моделей
-        from src.models import load_models
-        models = load_models()
-        model_dict = {m.id: m.name for m in models}
-
         export_results = []
         for result in self.temp_results:
+            model = get_model_by_id(result['model_id'])
             export_results.append({
-                'model_name': model_dict.get(result['model_id'], 'Неизвестно'),
+                'model_name': model.name if model else 'Неизвестно',
                 'response_text': result['response_text'],
                 'created_at': result.get('created_at', ''),
                 'tokens_used': result.get('tokens_used'),
                 'response_time': result.get('response_time')
             })
 
+        from src.ui.export_dialog import export_to_json
+
         export_to_json(export_results, prompt_text, self)
 
+    def on_export_history(self):
+        """Экспорт всей истории результатов в выбранный формат."""
+        from src.ui.export_dialog import export_history
+
+        export_history(self)
+
     def on_enhance_prompt_clicked(self):
         """Обработчик нажатия кнопки 'Улучшить промт'."""
         prompt_text = self.prompt_input.toPlainText().strip()
@@ -677,6 +917,8 @@ class MainWindow(QMainWindow):
             )
             return
 
+        from src.ui.prompt_enhancer_dialog import PromptEnhancerDialog
+
         # Открытие диалога улучшения промтов
         dialog = PromptEnhancerDialog(self, prompt_text)
         if dialog.exec_() == PromptEnhancerDialog.Accepted:
@@ -788,12 +1030,45 @@ class MainWindow(QMainWindow):
         except (ValueError, TypeError):
             pass
 
+    def on_settings_changed(self, changed: Dict[str, str]):
+        """Обработчик изменения настроек в БД."""
+        if 'theme' in changed or 'font_size' in changed:
+            self.apply_settings()
+
+    def on_sync_catalog(self):
+        """Запуск синхронизации каталога моделей провайдера."""
+        from src import catalog
+
+        catalog.sync_catalog_in_background(self.catalog_synced.emit)
+
+    def on_catalog_synced(self, stats: Dict[str, Any]):
+        """Обработчик завершения синхронизации каталога моделей."""
+        if stats.get('error'):
+            QMessageBox.warning(
+                self,
+                'Ошибка',
+                f'Не удалось обновить каталог моделей:\n{stats["error"]}'
+            )
+            return
+
+        QMessageBox.information(
+            self,
+            'Каталог моделей',
+            f'Моделей в каталоге: {stats["total"]}\n'
+            f'Добавлено: {stats["added"]}\n'
+            f'Обновлено: {stats["updated"]}\n'
+            f'Деактивировано: {stats["deactivated"]}\n\n'
+            'Новые модели добавлены неактивными, включите нужные '
+            'в управлении моделями.'
+        )
+
     def on_app_settings(self):
         """Обработчик открытия диалога настроек."""
+        from src.ui.settings_dialog import SettingsDialog
+
         dialog = SettingsDialog(self)
         if dialog.exec_() == SettingsDialog.Accepted:
-            # Применение новых настроек
-            self.apply_settings()
+            # Новые настройки уже применены через подписку на изменения
             QMessageBox.information(
                 self,
                 'Информация',
@@ -802,21 +1077,41 @@ class MainWindow(QMainWindow):
 
     def on_about(self):
         """Обработчик открытия диалога "О программе"."""
+        from src.ui.about_dialog import AboutDialog
+
         dialog = AboutDialog(self)
         dialog.exec_()
 
 
+def print_startup_report():
+    """Вывести отчёт профилирования запуска."""
+    startup_profiler.mark('Первый цикл событий')
+    print(startup_profiler.report(), file=sys.stderr)
+
+
 def main():
     """Точка входа в приложение."""
+    if '--profile-startup' in sys.argv:
+        sys.argv.remove('--profile-startup')
+        startup_profiler.enabled = True
+    startup_profiler.mark('Импорт модулей')
+
     app = QApplication(sys.argv)
     
     # Установка иконки приложения
     icon_path = os.path.join(os.path.dirname(__file__), 'app.ico')
     if os.path.exists(icon_path):
         app.setWindowIcon(QIcon(icon_path))
+    startup_profiler.mark('Создание QApplication')
     
     window = MainWindow()
     window.show()
+    startup_profiler.mark('Показ окна')
+
+    if startup_profiler.enabled:
+        # Отчёт выводится после обработки первых событий цикла
+        QTimer.singleShot(0, print_startup_report)
+
     sys.exit(app.exec_())
 
 
@@ -0,0 +1,97 @@
+"""Отмена долгих операций с общим сроком выполнения.
+
+Токен создаётся в интерфейсе и передаётся вниз по цепочке вызовов
+до HTTP-уровня. Отмена вызывает зарегистрированные обработчики (например,
+закрытие сокетов активных соединений), поэтому заблокированный на чтении
+поток освобождается сразу, а не по таймауту запроса. Истечение срока
+вызывает те же обработчики, что и отмена.
+"""
+
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+
+class OperationCancelled(Exception):
+    """Операция отменена или истёк срок её выполнения."""
+
+
+class CancellationToken:
+    """Токен отмены с необязательным сроком выполнения (deadline)."""
+
+    def __init__(self, timeout: Optional[float] = None):
+        """Инициализация токена; timeout - общий срок в секундах."""
+        self.deadline = (
+            time.monotonic() + timeout if timeout is not None else None
+        )
+        self._cancelled = False
+        self._callbacks: Dict[int, Callable[[], None]] = {}
+        self._next_handle = 0
+        self._lock = threading.Lock()
+        # По истечении срока обработчики вызываются так же, как при отмене
+        self._timer: Optional[threading.Timer] = None
+        if timeout is not None:
+            self._timer = threading.Timer(max(timeout, 0.0), self.cancel)
+            self._timer.daemon = True
+            self._timer.start()
+
+    @property
+    def is_cancelled(self) -> bool:
+        """Токен отменён или срок выполнения истёк."""
+        return self._cancelled or (
+            self.deadline is not None and time.monotonic() >= self.deadline
+        )
+
+    def remaining(self) -> Optional[float]:
+        """Оставшееся до срока время в секундах (None - срок не задан)."""
+        if self.deadline is None:
+            return None
+        return max(self.deadline - time.monotonic(), 0.0)
+
+    def cancel(self) -> None:
+        """Отменить операцию и вызвать обработчики отмены."""
+        with self._lock:
+            if self._cancelled:
+                return
+            self._cancelled = True
+            callbacks = list(self._callbacks.values())
+            self._callbacks.clear()
+        self.close()
+
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception:
+                # Ошибка закрытия одного ресурса не мешает остальным
+                pass
+
+    def close(self) -> None:
+        """Остановить таймер срока (операция завершена, отмена не нужна)."""
+        if self._timer is not None:
+            self._timer.cancel()
+
+    def check(self) -> None:
+        """Выбросить OperationCancelled, если операция отменена."""
+        if self.is_cancelled:
+            raise OperationCancelled()
+
+    def register(self, callback: Callable[[], None]) -> Optional[int]:
+        """Зарегистрировать обработчик отмены.
+
+        Если токен уже отменён, обработчик вызывается сразу и возвращается
+        None, иначе - номер для unregister().
+        """
+        with self._lock:
+            if not self._cancelled:
+                self._next_handle += 1
+                self._callbacks[self._next_handle] = callback
+                return self._next_handle
+        callback()
+        return None
+
+    def unregister(self, handle: Optional[int]) -> None:
+        """Удалить обработчик отмены."""
+        if handle is None:
+            return
+        with self._lock:
+            self._callbacks.pop(handle, None)
@@ -0,0 +1,145 @@
+"""Синхронизация каталога моделей провайдера (OpenRouter /models).
+
+Список моделей загружается одним запросом и сравнивается с таблицей
+models (см. db.sync_models): новые модели добавляются неактивными,
+изменившиеся обновляются, исчезнувшие из каталога деактивируются.
+Все изменения записываются одной транзакцией через поток записи БД.
+"""
+
+import logging
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from src import db, db_writer
+from src.credentials import get_credentials
+
+
+logger = logging.getLogger(__name__)
+
+# Адрес каталога по умолчанию
+DEFAULT_CATALOG_URL = 'https://openrouter.ai/api/v1/models'
+# Переменная окружения (или .env) с адресом каталога, например тестового
+# сервера
+CATALOG_URL_ENV = 'CHATLIST_CATALOG_URL'
+# Таймаут загрузки каталога (секунды)
+CATALOG_TIMEOUT = 15
+# Минимальный интервал между автоматическими синхронизациями (секунды)
+CATALOG_SYNC_INTERVAL = 24 * 60 * 60
+
+# Значение models.source для моделей из каталога
+CATALOG_SOURCE = 'openrouter'
+# Параметры запросов к моделям каталога
+CATALOG_API_URL = 'https://openrouter.ai/api/v1/chat/completions'
+CATALOG_API_KEY_ENV = 'OPENROUTER_API_KEY'
+CATALOG_MODEL_TYPE = 'openrouter'
+
+
+def get_catalog_url() -> str:
+    """Получить адрес каталога (переменная окружения, .env, по умолчанию)."""
+    return get_credentials().get_value(CATALOG_URL_ENV) or DEFAULT_CATALOG_URL
+
+
+def fetch_catalog(
+    url: Optional[str] = None,
+    timeout: float = CATALOG_TIMEOUT
+) -> List[Dict[str, Any]]:
+    """Загрузить каталог и преобразовать его в записи для db.sync_models."""
+    import requests
+
+    url = url or get_catalog_url()
+    response = requests.get(url, timeout=timeout)
+    response.raise_for_status()
+    data = response.json()
+
+    items = data.get('data') if isinstance(data, dict) else data
+    if not isinstance(items, list):
+        raise ValueError('Некорректный ответ каталога: ожидается список data')
+
+    entries = []
+    for item in items:
+        model_id = item.get('id') if isinstance(item, dict) else None
+        if not isinstance(model_id, str) or not model_id:
+            continue
+        entries.append({
+            'name': model_id,
+            'api_url': CATALOG_API_URL,
+            'api_key_env': CATALOG_API_KEY_ENV,
+            'model_type': CATALOG_MODEL_TYPE,
+            'model_name': model_id,
+            'is_active': 0
+        })
+    return entries
+
+
+def _apply_catalog(
+    entries: List[Dict[str, Any]],
+    conn: sqlite3.Connection
+) -> Dict[str, int]:
+    """Операция потока записи: изменения моделей и время синхронизации."""
+    stats = db.sync_models(entries, CATALOG_SOURCE, conn=conn)
+    db.set_setting(
+        'catalog_synced_at',
+        datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        conn
+    )
+    return stats
+
+
+def sync_catalog(url: Optional[str] = None) -> Dict[str, Any]:
+    """Загрузить каталог и применить изменения к таблице models.
+
+    Возвращает статистику db.sync_models и время выполнения.
+    """
+    start_time = time.perf_counter()
+    entries = fetch_catalog(url)
+    if not entries:
+        # Пустой каталог - скорее ошибка сервера, чем удаление всех моделей
+        raise ValueError('Каталог моделей пуст')
+
+    stats = db_writer.get_writer().submit(_apply_catalog, entries).result()
+
+    stats['elapsed'] = time.perf_counter() - start_time
+    logger.info(
+        f'Каталог моделей: всего {stats["total"]}, добавлено '
+        f'{stats["added"]}, обновлено {stats["updated"]}, '
+        f'деактивировано {stats["deactivated"]} '
+        f'за {stats["elapsed"]:.2f} с'
+    )
+    return stats
+
+
+def is_sync_due(interval: float = CATALOG_SYNC_INTERVAL) -> bool:
+    """Проверить, пора ли синхронизировать каталог."""
+    synced_at = db.get_setting('catalog_synced_at')
+    if not synced_at:
+        return True
+    try:
+        last = datetime.strptime(synced_at, '%Y-%m-%d %H:%M:%S')
+    except ValueError:
+        return True
+    return (datetime.now() - last).total_seconds() >= interval
+
+
+def sync_catalog_in_background(
+    on_finished: Optional[Callable[[Dict[str, Any]], None]] = None
+) -> threading.Thread:
+    """Запустить синхронизацию каталога в фоновом потоке.
+
+    on_finished получает статистику (или {'error': ...}) и вызывается
+    в фоновом потоке.
+    """
+    def run():
+        try:
+            stats = sync_catalog()
+        except Exception as e:
+            logger.warning(f'Не удалось синхронизировать каталог моделей: {e}')
+            stats = {'error': str(e)}
+        if on_finished:
+            on_finished(stats)
+
+    thread = threading.Thread(target=run, name='catalog-sync', daemon=True)
+    thread.start()
+    return thread
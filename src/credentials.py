@@ -0,0 +1,223 @@
+"""Кэш API-ключей и предварительная проверка их валидности.
+
+Ключи берутся из переменных окружения процесса, а при их отсутствии -
+из файла .env. Значения кэшируются; файл .env перечитывается, только
+если изменилось время его модификации. Перед отправкой запросов каждый
+ключ один раз за сеанс проверяется дешёвым запросом списка моделей
+провайдера, и модели с недействительным ключом исключаются сразу,
+без ожидания ошибки или таймаута основного запроса.
+"""
+
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    from src.cancellation import CancellationToken
+    from src.models import Model
+
+
+logger = logging.getLogger(__name__)
+
+# Как часто проверять изменение файла .env (секунды)
+ENV_CHECK_INTERVAL = 2.0
+# Таймаут проверки ключа (секунды)
+PREFLIGHT_TIMEOUT = 5
+# Максимальное количество одновременных проверок ключей
+PREFLIGHT_WORKERS = 4
+# Коды ответа, означающие недействительный ключ
+INVALID_KEY_STATUSES = (401, 403)
+
+# Суффикс URL чата, заменяемый на адрес проверки ключа
+CHAT_COMPLETIONS_SUFFIX = '/chat/completions'
+# Адрес проверки ключа OpenRouter (список моделей там доступен без ключа)
+OPENROUTER_KEY_URL = 'https://openrouter.ai/api/v1/key'
+
+MISSING_KEY_ERROR = 'API-ключ не найден'
+INVALID_KEY_ERROR = 'API-ключ недействителен'
+
+
+def preflight_url(api_url: str) -> str:
+    """Получить адрес проверки ключа по URL чата провайдера."""
+    if api_url.startswith('https://openrouter.ai/'):
+        return OPENROUTER_KEY_URL
+    base = api_url.rstrip('/')
+    if base.endswith(CHAT_COMPLETIONS_SUFFIX):
+        base = base[:-len(CHAT_COMPLETIONS_SUFFIX)]
+    return f'{base}/models'
+
+
+class CredentialManager:
+    """Разрешение и проверка API-ключей с кэшированием на сеанс."""
+
+    def __init__(self, env_path: Optional[str] = None):
+        """Инициализация менеджера (путь к .env ищется при первом вызове)."""
+        self._env_path = env_path
+        self._env_mtime: Optional[float] = None
+        self._env_loaded = False
+        self._env_checked_at = 0.0
+        self._env_values: Dict[str, Optional[str]] = {}
+        self._keys: Dict[str, Optional[str]] = {}
+        # (адрес проверки, ключ) -> True/False; None - проверить не удалось
+        self._checks: Dict[Tuple[str, str], Optional[bool]] = {}
+        self._lock = threading.Lock()
+
+    def _refresh_env(self) -> None:
+        """Перечитать .env, если файл изменился (проверка с интервалом)."""
+        now = time.monotonic()
+        if now - self._env_checked_at < ENV_CHECK_INTERVAL:
+            return
+        self._env_checked_at = now
+
+        from dotenv import dotenv_values, find_dotenv
+
+        if self._env_path is None:
+            self._env_path = find_dotenv()
+        try:
+            mtime = os.path.getmtime(self._env_path)
+        except OSError:
+            mtime = None
+
+        if self._env_loaded and mtime == self._env_mtime:
+            return
+        self._env_loaded = True
+        self._env_mtime = mtime
+        self._env_values = dotenv_values(self._env_path) if mtime else {}
+        self._keys.clear()
+
+    def get_api_key(self, env_name: str) -> Optional[str]:
+        """Получить значение ключа (окружение процесса, затем .env)."""
+        return self.get_value(env_name)
+
+    def get_value(self, env_name: str) -> Optional[str]:
+        """Получить значение переменной (окружение процесса, затем .env)."""
+        with self._lock:
+            self._refresh_env()
+            if env_name not in self._keys:
+                self._keys[env_name] = (
+                    os.environ.get(env_name)
+                    or self._env_values.get(env_name)
+                )
+            return self._keys[env_name]
+
+    def check_key(
+        self,
+        model: 'Model',
+        token: Optional['CancellationToken'] = None
+    ) -> Optional[bool]:
+        """Проверить ключ модели запросом списка моделей провайдера.
+
+        Возвращает True или False для действительного и недействительного
+        ключа и None, если проверить не удалось (сеть, ошибка сервера,
+        отмена token) - такие модели не исключаются. Результат кэшируется
+        до конца сеанса или до смены ключа.
+        """
+        api_key = self.get_api_key(model.api_key_env)
+        if not api_key:
+            return False
+
+        cache_key = (preflight_url(model.api_url), api_key)
+        with self._lock:
+            if cache_key in self._checks:
+                return self._checks[cache_key]
+
+        if token is not None and token.is_cancelled:
+            return None
+
+        import requests
+
+        from src import network
+        from src.cancellation import OperationCancelled
+
+        try:
+            response = network.get(
+                cache_key[0],
+                token,
+                headers={'Authorization': f'Bearer {api_key}'},
+                timeout=PREFLIGHT_TIMEOUT
+            )
+        except OperationCancelled:
+            return None
+        except requests.exceptions.RequestException as e:
+            if token is not None and token.is_cancelled:
+                return None
+            logger.warning(
+                f'Не удалось проверить ключ {model.api_key_env}: {e}'
+            )
+            return None
+
+        if response.status_code in INVALID_KEY_STATUSES:
+            valid: Optional[bool] = False
+        elif response.ok:
+            valid = True
+        else:
+            # Ошибка сервера или неизвестный адрес - проверка не удалась
+            valid = None
+
+        if valid is not None:
+            with self._lock:
+                self._checks[cache_key] = valid
+        if valid is False:
+            logger.warning(
+                f'Ключ {model.api_key_env} отклонён провайдером '
+                f'({response.status_code})'
+            )
+        return valid
+
+    def split_models(
+        self,
+        models: List['Model'],
+        token: Optional['CancellationToken'] = None
+    ) -> Tuple[List['Model'], Dict[int, str]]:
+        """Разделить модели на пригодные и исключённые.
+
+        Каждый ключ проверяется один раз, проверки разных ключей
+        выполняются параллельно и прерываются отменой token (модели
+        с непроверенным ключом не исключаются). Возвращает список
+        пригодных моделей и словарь ID исключённой модели -> причина.
+        """
+        excluded: Dict[int, str] = {}
+        by_check: Dict[Tuple[str, str], List['Model']] = {}
+        for model in models:
+            api_key = self.get_api_key(model.api_key_env)
+            if not api_key:
+                excluded[model.id] = MISSING_KEY_ERROR
+                continue
+            by_check.setdefault(
+                (preflight_url(model.api_url), api_key), []
+            ).append(model)
+
+        if by_check and not (token is not None and token.is_cancelled):
+            groups = list(by_check.values())
+            workers = min(PREFLIGHT_WORKERS, len(groups))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                checks = list(executor.map(
+                    lambda group: self.check_key(group[0], token), groups
+                ))
+            for group, valid in zip(groups, checks):
+                if valid is False:
+                    for model in group:
+                        excluded[model.id] = INVALID_KEY_ERROR
+
+        usable = [model for model in models if model.id not in excluded]
+        return usable, excluded
+
+    def invalidate(self) -> None:
+        """Сбросить кэш ключей и результаты проверок."""
+        with self._lock:
+            self._keys.clear()
+            self._checks.clear()
+            self._env_loaded = False
+            self._env_checked_at = 0.0
+
+
+# Общий менеджер ключей приложения
+_manager = CredentialManager()
+
+
+def get_credentials() -> CredentialManager:
+    """Получить общий менеджер ключей."""
+    return _manager
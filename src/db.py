@@ -1,44 +1,345 @@
 """Модуль для работы с базой данных SQLite."""
 
+import hashlib
 import json
+import logging
+import os
 import sqlite3
-from datetime import datetime
-from typing import List, Optional, Dict, Any, Tuple
+import threading
+import zlib
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import List, Optional, Dict, Any, Tuple, Callable, Iterator
 
+logger = logging.getLogger(__name__)
 
 DB_PATH = 'chatlist.db'
 
+# Файл архива старых результатов; None - рядом с DB_PATH с суффиксом _archive
+ARCHIVE_DB_PATH: Optional[str] = None
+
+# Версия схемы БД (PRAGMA user_version). Увеличивается при любом изменении
+# схемы в init_database(); при совпадении версии проверка схемы пропускается
+SCHEMA_VERSION = 4
+
+# Кодек хранения текстов ответов: None - без сжатия, 'zlib' - сжатие zlib
+RESPONSE_CODEC: Optional[str] = 'zlib'
+# Минимальная длина ответа (в байтах), начиная с которой применяется сжатие
+COMPRESSION_MIN_LENGTH = 256
+# Длина несжатого превью ответа, хранимого отдельно
+RESPONSE_PREVIEW_LENGTH = 200
+# Максимальный размер словаря сжатия (ограничение zlib - 32 КБ)
+COMPRESSION_DICT_SIZE = 32 * 1024
+
+# Минимальная длина ответа (в байтах) для сжатия при архивировании
+ARCHIVE_COMPRESSION_MIN_LENGTH = 64
+
+# Колонки results в порядке, общем для основной и архивной таблиц
+RESULT_COLUMNS = (
+    'id', 'prompt_id', 'model_id', 'response_text', 'created_at',
+    'tokens_used', 'response_time', 'compression', 'compression_dict_id',
+    'response_preview', 'content_hash'
+)
+
+# Значения флага results.compression
+COMPRESSION_NONE = 0
+COMPRESSION_ZLIB = 1
+
+# Кэш словарей сжатия: id -> данные словаря
+_compression_dicts: Dict[int, bytes] = {}
+_compression_dicts_loaded = False
+
+# Кэш таблицы settings: загружается один раз, обновляется при записи
+_settings_cache: Optional[Dict[str, str]] = None
+_settings_lock = threading.Lock()
+_settings_subscribers: List[Callable[[Dict[str, str]], None]] = []
+
+# Колонки models в порядке полей src.models.Model
+MODEL_COLUMNS = (
+    'id', 'name', 'api_url', 'api_key_env', 'is_active', 'model_type',
+    'model_name', 'max_tokens', 'temperature', 'timeout', 'stop_sequences'
+)
+
+# Версия данных таблицы models: увеличивается при каждой записи,
+# по ней кэши моделей определяют необходимость перезагрузки
+_models_version = 0
+
+# Действия, отложенные до фиксации транзакции, открытой вызывающим кодом
+_after_commit = threading.local()
+
+# Максимальное число параметров в одном запросе с IN (...)
+SQL_VARIABLES_LIMIT = 900
+
+# Параметры неактивных моделей, создаваемых при импорте истории
+IMPORTED_MODEL_TYPE = 'openrouter'
+IMPORTED_MODEL_API_URL = 'https://openrouter.ai/api/v1/chat/completions'
+IMPORTED_MODEL_API_KEY_ENV = 'OPENROUTER_API_KEY'
+
+
+def _call_after_commit(own_conn: bool, callback: Callable[[], None]) -> None:
+    """Выполнить callback после фиксации изменений.
+
+    Если транзакцией управляет вызывающий код (функции передан conn),
+    вызов откладывается до run_after_commit() в том же потоке.
+    """
+    if own_conn:
+        callback()
+        return
+    if not hasattr(_after_commit, 'callbacks'):
+        _after_commit.callbacks = []
+    # Повторно тот же callback (например, сброс кэша) не откладывается
+    if callback not in _after_commit.callbacks:
+        _after_commit.callbacks.append(callback)
+
+
+def run_after_commit() -> None:
+    """Выполнить действия, отложенные до фиксации транзакции.
+
+    Ошибка одного действия записывается в лог и не мешает остальным.
+    """
+    callbacks = getattr(_after_commit, 'callbacks', None)
+    _after_commit.callbacks = []
+    for callback in callbacks or ():
+        try:
+            callback()
+        except Exception as e:
+            logger.error(f'Ошибка действия после фиксации: {e}')
+
+
+def after_commit_checkpoint() -> int:
+    """Число отложенных действий - точка отката для discard_after_commit."""
+    return len(getattr(_after_commit, 'callbacks', ()))
+
+
+def discard_after_commit(checkpoint: int = 0) -> None:
+    """Отбросить действия, отложенные после checkpoint.
+
+    Вызывается при откате: действия отменённых изменений не должны
+    выполниться после следующей успешной фиксации.
+    """
+    callbacks = getattr(_after_commit, 'callbacks', None)
+    if callbacks:
+        del callbacks[checkpoint:]
+
 
 def get_connection() -> sqlite3.Connection:
     """Получить соединение с базой данных."""
     conn = sqlite3.connect(DB_PATH)
     conn.row_factory = sqlite3.Row
+    conn.create_function(
+        'decode_response', 3, _decode_response_sql, deterministic=True
+    )
+    _load_compression_dicts(conn)
     return conn
 
 
+def _ensure_column(
+    cursor: sqlite3.Cursor,
+    table: str,
+    column: str,
+    definition: str
+) -> None:
+    """Добавить колонку в существующую таблицу, если её ещё нет."""
+    cursor.execute(f'PRAGMA table_info({table})')
+    if column not in {row[1] for row in cursor.fetchall()}:
+        cursor.execute(f'ALTER TABLE {table} ADD COLUMN {column} {definition}')
+
+
+def content_hash(text: str) -> str:
+    """Получить хэш содержимого текста (SHA-256)."""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def _deduplicate_prompts(cursor: sqlite3.Cursor) -> None:
+    """Заполнить content_hash промтов и объединить дубликаты."""
+    cursor.execute('SELECT id, prompt FROM prompts WHERE content_hash IS NULL')
+    rows = cursor.fetchall()
+    if not rows:
+        return
+
+    cursor.executemany(
+        'UPDATE prompts SET content_hash = ? WHERE id = ?',
+        [(content_hash(row[1]), row[0]) for row in rows]
+    )
+
+    # Оставляем самый ранний промт, результаты дубликатов переносим на него
+    cursor.execute('''
+        SELECT content_hash, MIN(id), MAX(date) FROM prompts
+        GROUP BY content_hash HAVING COUNT(*) > 1
+    ''')
+    for prompt_hash, keep_id, last_date in cursor.fetchall():
+        cursor.execute(
+            'UPDATE results SET prompt_id = ? WHERE prompt_id IN '
+            '(SELECT id FROM prompts WHERE content_hash = ? AND id != ?)',
+            (keep_id, prompt_hash, keep_id)
+        )
+        cursor.execute(
+            'DELETE FROM prompts WHERE content_hash = ? AND id != ?',
+            (prompt_hash, keep_id)
+        )
+        cursor.execute(
+            'UPDATE prompts SET date = ? WHERE id = ?',
+            (last_date, keep_id)
+        )
+
+
+def parse_tags(tags: Any) -> List[str]:
+    """Разобрать теги из списка, JSON-массива или строки через запятую."""
+    if not tags:
+        return []
+
+    if isinstance(tags, str):
+        try:
+            parsed = json.loads(tags)
+        except ValueError:
+            parsed = None
+        if isinstance(parsed, list):
+            tags = parsed
+        else:
+            tags = tags.split(',')
+
+    result = []
+    seen = set()
+    for tag in tags:
+        tag = str(tag).strip()
+        if tag and tag.lower() not in seen:
+            seen.add(tag.lower())
+            result.append(tag)
+    return result
+
+
+def _sync_prompt_tags(
+    cursor: sqlite3.Cursor,
+    prompt_id: int,
+    tags: Any
+) -> None:
+    """Синхронизировать prompt_tags с тегами промта."""
+    cursor.execute('DELETE FROM prompt_tags WHERE prompt_id = ?', (prompt_id,))
+    cursor.executemany(
+        'INSERT OR IGNORE INTO prompt_tags (prompt_id, tag) VALUES (?, ?)',
+        [(prompt_id, tag) for tag in parse_tags(tags)]
+    )
+
+
+def _backfill_prompt_tags(cursor: sqlite3.Cursor) -> None:
+    """Заполнить prompt_tags для промтов, сохранённых без неё."""
+    cursor.execute('''
+        SELECT id, tags FROM prompts
+        WHERE tags IS NOT NULL AND tags != ''
+          AND id NOT IN (SELECT prompt_id FROM prompt_tags)
+    ''')
+    for prompt_id, tags in cursor.fetchall():
+        _sync_prompt_tags(cursor, prompt_id, tags)
+
+
+def _tags_condition(
+    tags: List[str],
+    match_all: bool
+) -> Tuple[str, List[Any]]:
+    """Условие отбора промтов по тегам (AND/OR) через индекс prompt_tags."""
+    tags = parse_tags(tags)
+    placeholders = ', '.join('?' * len(tags))
+    sql = (
+        f'id IN (SELECT prompt_id FROM prompt_tags '
+        f'WHERE tag IN ({placeholders})'
+    )
+    params: List[Any] = list(tags)
+
+    if match_all:
+        sql += ' GROUP BY prompt_id HAVING COUNT(*) = ?'
+        params.append(len(tags))
+
+    return sql + ')', params
+
+
+def _deduplicate_results(cursor: sqlite3.Cursor) -> None:
+    """Заполнить content_hash результатов и удалить повторы."""
+    cursor.execute(
+        '''SELECT id, response_text, compression, compression_dict_id
+           FROM results WHERE content_hash IS NULL'''
+    )
+    rows = cursor.fetchall()
+    if not rows:
+        return
+
+    cursor.executemany(
+        'UPDATE results SET content_hash = ? WHERE id = ?',
+        [
+            (content_hash(decode_response(row[1], row[2], row[3])), row[0])
+            for row in rows
+        ]
+    )
+
+    # Один и тот же ответ модели на один промт храним один раз
+    cursor.execute('''
+        DELETE FROM results WHERE id NOT IN (
+            SELECT MIN(id) FROM results
+            GROUP BY prompt_id, model_id, content_hash
+        )
+    ''')
+
+
 def init_database() -> None:
     """Инициализация базы данных - создание всех таблиц и индексов."""
+    reload_settings()
+    _bump_models_version()
     conn = get_connection()
     cursor = conn.cursor()
 
+    # Схема актуальна - создание таблиц и миграции не требуются
+    cursor.execute('PRAGMA user_version')
+    if cursor.fetchone()[0] == SCHEMA_VERSION:
+        conn.close()
+        return
+
+    # Для новой БД - освобождение места по частям (см. src/maintenance.py);
+    # на существующую БД до полного VACUUM не влияет
+    cursor.execute('PRAGMA auto_vacuum = INCREMENTAL')
+
     # Таблица промтов
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS prompts (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             date TEXT NOT NULL,
             prompt TEXT NOT NULL,
-            tags TEXT
+            tags TEXT,
+            content_hash TEXT
         )
     ''')
 
+    # Дедупликация промтов по хэшу текста
+    _ensure_column(cursor, 'prompts', 'content_hash', 'TEXT')
+    _deduplicate_prompts(cursor)
+    cursor.execute('''
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_prompts_content_hash
+        ON prompts(content_hash)
+    ''')
+
     cursor.execute('''
         CREATE INDEX IF NOT EXISTS idx_prompts_date ON prompts(date)
     ''')
 
+    # Поиск по тегам выполняется через prompt_tags, индекс по строке
+    # тегов для LIKE '%...%' не используется
+    cursor.execute('DROP INDEX IF EXISTS idx_prompts_tags')
+
+    # Нормализованная таблица тегов промтов
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS prompt_tags (
+            prompt_id INTEGER NOT NULL,
+            tag TEXT NOT NULL COLLATE NOCASE,
+            PRIMARY KEY (prompt_id, tag),
+            FOREIGN KEY (prompt_id) REFERENCES prompts(id) ON DELETE CASCADE
+        )
+    ''')
+
     cursor.execute('''
-        CREATE INDEX IF NOT EXISTS idx_prompts_tags ON prompts(tags)
+        CREATE INDEX IF NOT EXISTS idx_prompt_tags_tag
+        ON prompt_tags(tag, prompt_id)
     ''')
 
+    _backfill_prompt_tags(cursor)
+
     # Таблица моделей
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS models (
@@ -48,10 +349,25 @@ def init_database() -> None:
             api_key_env TEXT NOT NULL,
             is_active INTEGER NOT NULL DEFAULT 1,
             model_type TEXT NOT NULL,
-            model_name TEXT
+            model_name TEXT,
+            source TEXT,
+            max_tokens INTEGER,
+            temperature REAL,
+            timeout REAL,
+            stop_sequences TEXT
         )
     ''')
 
+    # Источник записи модели (каталог провайдера, модели по умолчанию);
+    # NULL - модель добавлена вручную
+    _ensure_column(cursor, 'models', 'source', 'TEXT')
+
+    # Параметры генерации модели; NULL - значение провайдера по умолчанию
+    _ensure_column(cursor, 'models', 'max_tokens', 'INTEGER')
+    _ensure_column(cursor, 'models', 'temperature', 'REAL')
+    _ensure_column(cursor, 'models', 'timeout', 'REAL')
+    _ensure_column(cursor, 'models', 'stop_sequences', 'TEXT')
+
     cursor.execute('''
         CREATE INDEX IF NOT EXISTS idx_models_is_active ON models(is_active)
     ''')
@@ -70,23 +386,65 @@ def init_database() -> None:
             created_at TEXT NOT NULL,
             tokens_used INTEGER,
             response_time REAL,
+            compression INTEGER NOT NULL DEFAULT 0,
+            compression_dict_id INTEGER,
+            response_preview TEXT,
+            content_hash TEXT,
             FOREIGN KEY (prompt_id) REFERENCES prompts(id) ON DELETE CASCADE,
             FOREIGN KEY (model_id) REFERENCES models(id) ON DELETE RESTRICT
         )
     ''')
 
+    # Колонки сжатия для баз, созданных предыдущими версиями
+    _ensure_column(
+        cursor, 'results', 'compression', 'INTEGER NOT NULL DEFAULT 0'
+    )
+    _ensure_column(cursor, 'results', 'compression_dict_id', 'INTEGER')
+    _ensure_column(cursor, 'results', 'response_preview', 'TEXT')
+    _ensure_column(cursor, 'results', 'content_hash', 'TEXT')
+
+    # Таблица общих словарей сжатия ответов
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS compression_dicts (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            created_at TEXT NOT NULL,
+            data BLOB NOT NULL
+        )
+    ''')
+
+    # Составные индексы: фильтр по промту/модели с сортировкой по дате
+    # и LIMIT читают только нужные строки без сортировки во временном дереве
+    cursor.execute('DROP INDEX IF EXISTS idx_results_prompt_id')
+    cursor.execute('DROP INDEX IF EXISTS idx_results_model_id')
     cursor.execute('''
-        CREATE INDEX IF NOT EXISTS idx_results_prompt_id ON results(prompt_id)
+        CREATE INDEX IF NOT EXISTS idx_results_prompt_created
+        ON results(prompt_id, created_at)
     ''')
 
     cursor.execute('''
-        CREATE INDEX IF NOT EXISTS idx_results_model_id ON results(model_id)
+        CREATE INDEX IF NOT EXISTS idx_results_model_created
+        ON results(model_id, created_at)
     ''')
 
     cursor.execute('''
         CREATE INDEX IF NOT EXISTS idx_results_created_at ON results(created_at)
     ''')
 
+    # Дедупликация одинаковых ответов модели на один промт
+    _deduplicate_results(cursor)
+    cursor.execute('''
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_results_content_hash
+        ON results(prompt_id, model_id, content_hash)
+    ''')
+
+    # Кэш HTML, отрендеренного из markdown-ответов
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS rendered_html (
+            content_hash TEXT PRIMARY KEY,
+            html TEXT NOT NULL
+        )
+    ''')
+
     # Таблица настроек
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS settings (
@@ -95,28 +453,53 @@ def init_database() -> None:
         )
     ''')
 
+    cursor.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
     conn.commit()
     conn.close()
 
 
 # ========== CRUD операции для prompts ==========
 
-def create_prompt(prompt: str, tags: Optional[str] = None) -> int:
-    """Создать новый промт."""
-    conn = get_connection()
+def create_prompt(
+    prompt: str,
+    tags: Optional[str] = None,
+    conn: Optional[sqlite3.Connection] = None
+) -> int:
+    """Создать новый промт.
+
+    Если промт с таким же текстом уже есть, новая запись не создаётся:
+    у существующей обновляются дата (и теги, если они переданы),
+    и возвращается её ID. С переданным conn изменения не фиксируются:
+    транзакцией управляет вызывающий код (см. src/db_writer.py).
+    """
+    own_conn = conn is None
+    if own_conn:
+        conn = get_connection()
     cursor = conn.cursor()
     date = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    prompt_hash = content_hash(prompt)
 
     if tags and isinstance(tags, list):
         tags = json.dumps(tags, ensure_ascii=False)
 
     cursor.execute(
-        'INSERT INTO prompts (date, prompt, tags) VALUES (?, ?, ?)',
-        (date, prompt, tags)
+        '''INSERT INTO prompts (date, prompt, tags, content_hash)
+           VALUES (?, ?, ?, ?)
+           ON CONFLICT(content_hash) DO UPDATE SET
+               date = excluded.date,
+               tags = COALESCE(excluded.tags, prompts.tags)''',
+        (date, prompt, tags, prompt_hash)
     )
-    prompt_id = cursor.lastrowid
-    conn.commit()
-    conn.close()
+    cursor.execute(
+        'SELECT id FROM prompts WHERE content_hash = ?',
+        (prompt_hash,)
+    )
+    prompt_id = cursor.fetchone()[0]
+    if tags is not None:
+        _sync_prompt_tags(cursor, prompt_id, tags)
+    if own_conn:
+        conn.commit()
+        conn.close()
     return prompt_id
 
 
@@ -150,13 +533,33 @@ def get_prompt_by_id(prompt_id: int) -> Optional[Dict[str, Any]]:
     return dict(row) if row else None
 
 
+def get_prompt_by_text(prompt: str) -> Optional[Dict[str, Any]]:
+    """Найти промт по точному совпадению текста."""
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute(
+        'SELECT * FROM prompts WHERE content_hash = ?',
+        (content_hash(prompt),)
+    )
+    row = cursor.fetchone()
+    conn.close()
+
+    return dict(row) if row else None
+
+
 def update_prompt(
     prompt_id: int,
     prompt: Optional[str] = None,
-    tags: Optional[str] = None
+    tags: Optional[str] = None,
+    conn: Optional[sqlite3.Connection] = None
 ) -> bool:
-    """Обновить промт."""
-    conn = get_connection()
+    """Обновить промт.
+
+    С переданным conn изменения не фиксируются (см. create_prompt).
+    """
+    own_conn = conn is None
+    if own_conn:
+        conn = get_connection()
     cursor = conn.cursor()
 
     updates = []
@@ -165,6 +568,8 @@ def update_prompt(
     if prompt is not None:
         updates.append('prompt = ?')
         params.append(prompt)
+        updates.append('content_hash = ?')
+        params.append(content_hash(prompt))
 
     if tags is not None:
         if isinstance(tags, list):
@@ -173,68 +578,292 @@ def update_prompt(
         params.append(tags)
 
     if not updates:
-        conn.close()
+        if own_conn:
+            conn.close()
         return False
 
     params.append(prompt_id)
     query = f'UPDATE prompts SET {", ".join(updates)} WHERE id = ?'
-    cursor.execute(query, params)
-    conn.commit()
-    conn.close()
-    return cursor.rowcount > 0
+    try:
+        cursor.execute(query, params)
+    except sqlite3.IntegrityError:
+        if own_conn:
+            conn.close()
+        raise ValueError('Промт с таким текстом уже существует')
+    updated = cursor.rowcount > 0
 
+    if updated and tags is not None:
+        _sync_prompt_tags(cursor, prompt_id, tags)
 
-def delete_prompt(prompt_id: int) -> bool:
-    """Удалить промт."""
-    conn = get_connection()
+    if own_conn:
+        conn.commit()
+        conn.close()
+    return updated
+
+
+def delete_prompt(
+    prompt_id: int,
+    conn: Optional[sqlite3.Connection] = None
+) -> bool:
+    """Удалить промт вместе с его результатами (включая архивные).
+
+    С переданным conn изменения не фиксируются (см. create_prompt),
+    архивные результаты удаляются, если архив подключён к conn.
+    """
+    own_conn = conn is None
+    if own_conn:
+        conn = get_connection()
+        attach_archive(conn)
+    archive = _archive_attached(conn)
     cursor = conn.cursor()
     cursor.execute('DELETE FROM prompts WHERE id = ?', (prompt_id,))
-    conn.commit()
     deleted = cursor.rowcount > 0
-    conn.close()
+    cursor.execute('DELETE FROM prompt_tags WHERE prompt_id = ?', (prompt_id,))
+    # Внешние ключи не включены - результаты удаляются явно
+    cursor.execute(
+        'DELETE FROM main.results WHERE prompt_id = ?', (prompt_id,)
+    )
+    if archive:
+        try:
+            cursor.execute(
+                'DELETE FROM archive.results WHERE prompt_id = ?',
+                (prompt_id,)
+            )
+        except sqlite3.OperationalError:
+            # Файл архива есть, но таблица ещё не создана
+            pass
+    if own_conn:
+        conn.commit()
+        conn.close()
     return deleted
 
 
+# ========== Теги промтов ==========
+
+def get_prompt_tags(prompt_id: int) -> List[str]:
+    """Получить нормализованные теги промта."""
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute(
+        'SELECT tag FROM prompt_tags WHERE prompt_id = ? ORDER BY tag',
+        (prompt_id,)
+    )
+    rows = cursor.fetchall()
+    conn.close()
+
+    return [row[0] for row in rows]
+
+
+def get_prompts_by_tags(
+    tags: List[str],
+    match_all: bool = False,
+    order_by: str = 'date DESC'
+) -> List[Dict[str, Any]]:
+    """Получить промты по тегам.
+
+    match_all=True - промт должен иметь все теги (AND),
+    иначе достаточно любого из них (OR).
+    """
+    if not parse_tags(tags):
+        return []
+
+    conn = get_connection()
+    cursor = conn.cursor()
+
+    condition, params = _tags_condition(tags, match_all)
+    cursor.execute(
+        f'SELECT * FROM prompts WHERE {condition} ORDER BY {order_by}',
+        params
+    )
+    rows = cursor.fetchall()
+    conn.close()
+
+    return [dict(row) for row in rows]
+
+
+def get_tag_counts() -> List[Dict[str, Any]]:
+    """Получить список тегов с количеством промтов для каждого."""
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT tag, COUNT(*) AS count FROM prompt_tags
+        GROUP BY tag ORDER BY count DESC, tag
+    ''')
+    rows = cursor.fetchall()
+    conn.close()
+
+    return [dict(row) for row in rows]
+
+
 # ========== CRUD операции для models ==========
 
+def get_models_version() -> int:
+    """Получить текущую версию данных таблицы models."""
+    return _models_version
+
+
+def _bump_models_version() -> None:
+    """Отметить изменение таблицы models."""
+    global _models_version
+    _models_version += 1
+
+
 def create_model(
     name: str,
     api_url: str,
     api_key_env: str,
     model_type: str,
     model_name: Optional[str] = None,
-    is_active: int = 1
+    is_active: int = 1,
+    max_tokens: Optional[int] = None,
+    temperature: Optional[float] = None,
+    timeout: Optional[float] = None,
+    stop_sequences: Optional[List[str]] = None,
+    conn: Optional[sqlite3.Connection] = None
 ) -> int:
-    """Создать новую модель."""
-    conn = get_connection()
+    """Создать новую модель.
+
+    С переданным conn изменения не фиксируются (см. create_prompt).
+    """
+    own_conn = conn is None
+    if own_conn:
+        conn = get_connection()
     cursor = conn.cursor()
 
     cursor.execute(
         '''INSERT INTO models (name, api_url, api_key_env, is_active, 
-           model_type, model_name) VALUES (?, ?, ?, ?, ?, ?)''',
-        (name, api_url, api_key_env, is_active, model_type, model_name)
+           model_type, model_name, max_tokens, temperature, timeout,
+           stop_sequences) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''',
+        (
+            name, api_url, api_key_env, is_active, model_type, model_name,
+            max_tokens, temperature, timeout,
+            _encode_stop_sequences(stop_sequences)
+        )
     )
     model_id = cursor.lastrowid
-    conn.commit()
-    conn.close()
+    if own_conn:
+        conn.commit()
+        conn.close()
+    _call_after_commit(own_conn, _bump_models_version)
     return model_id
 
 
-def get_models(active_only: bool = False) -> List[Dict[str, Any]]:
-    """Получить список моделей."""
+def sync_models(
+    entries: List[Dict[str, Any]],
+    source: str,
+    deactivate_missing: bool = True,
+    conn: Optional[sqlite3.Connection] = None
+) -> Dict[str, int]:
+    """Синхронизировать таблицу models со списком моделей источника.
+
+    entries - словари с ключами name, api_url, api_key_env, model_type,
+    model_name и is_active (для новых моделей, по умолчанию 0).
+    Новые модели добавляются, у моделей этого источника обновляются
+    изменившиеся поля, а отсутствующие в списке (при deactivate_missing)
+    деактивируются. Модели, добавленные вручную или другим источником,
+    не изменяются. Все изменения выполняются одной транзакцией.
+    Возвращает количество добавленных, обновлённых и деактивированных.
+    """
+    own_conn = conn is None
+    if own_conn:
+        conn = get_connection()
+    cursor = conn.cursor()
+
+    cursor.execute(
+        '''SELECT id, name, api_url, api_key_env, model_type, model_name,
+                  is_active, source FROM models'''
+    )
+    existing = {row['name']: row for row in cursor.fetchall()}
+
+    inserts = []
+    updates = []
+    seen = set()
+    for entry in entries:
+        name = entry['name']
+        if name in seen:
+            continue
+        seen.add(name)
+
+        values = (
+            entry['api_url'], entry['api_key_env'], entry['model_type'],
+            entry.get('model_name')
+        )
+        row = existing.get(name)
+        if row is None:
+            inserts.append(
+                (name,) + values + (entry.get('is_active', 0), source)
+            )
+        elif row['source'] == source and values != (
+            row['api_url'], row['api_key_env'], row['model_type'],
+            row['model_name']
+        ):
+            updates.append(values + (row['id'],))
+
+    deactivations = []
+    if deactivate_missing:
+        deactivations = [
+            (row['id'],) for name, row in existing.items()
+            if row['source'] == source and row['is_active']
+            and name not in seen
+        ]
+
+    cursor.executemany(
+        '''INSERT INTO models (name, api_url, api_key_env, model_type,
+           model_name, is_active, source) VALUES (?, ?, ?, ?, ?, ?, ?)''',
+        inserts
+    )
+    cursor.executemany(
+        '''UPDATE models SET api_url = ?, api_key_env = ?, model_type = ?,
+           model_name = ? WHERE id = ?''',
+        updates
+    )
+    cursor.executemany(
+        'UPDATE models SET is_active = 0 WHERE id = ?', deactivations
+    )
+
+    if own_conn:
+        conn.commit()
+        conn.close()
+
+    if inserts or updates or deactivations:
+        _call_after_commit(own_conn, _bump_models_version)
+
+    return {
+        'added': len(inserts),
+        'updated': len(updates),
+        'deactivated': len(deactivations),
+        'total': len(seen)
+    }
+
+
+def get_models(
+    active_only: bool = False,
+    factory: Optional[Callable[..., Any]] = None
+) -> List[Any]:
+    """Получить список моделей.
+
+    Без factory модели возвращаются словарями со всеми колонками.
+    С factory каждая строка курсора сразу превращается в объект
+    factory(*значения MODEL_COLUMNS), без промежуточных словарей.
+    """
     conn = get_connection()
     cursor = conn.cursor()
 
+    columns = '*'
+    if factory is not None:
+        columns = ', '.join(MODEL_COLUMNS)
+        cursor.row_factory = lambda _, row: factory(*row)
+
+    query = f'SELECT {columns} FROM models'
     if active_only:
-        cursor.execute(
-            'SELECT * FROM models WHERE is_active = 1 ORDER BY name'
-        )
-    else:
-        cursor.execute('SELECT * FROM models ORDER BY name')
+        query += ' WHERE is_active = 1'
+    cursor.execute(query + ' ORDER BY name')
 
     rows = cursor.fetchall()
     conn.close()
 
+    if factory is not None:
+        return rows
     return [dict(row) for row in rows]
 
 
@@ -250,10 +879,16 @@ def update_model(
     api_key_env: Optional[str] = None,
     model_type: Optional[str] = None,
     model_name: Optional[str] = None,
-    is_active: Optional[int] = None
+    is_active: Optional[int] = None,
+    conn: Optional[sqlite3.Connection] = None
 ) -> bool:
-    """Обновить модель."""
-    conn = get_connection()
+    """Обновить модель.
+
+    С переданным conn изменения не фиксируются (см. create_prompt).
+    """
+    own_conn = conn is None
+    if own_conn:
+        conn = get_connection()
     cursor = conn.cursor()
 
     updates = []
@@ -284,15 +919,62 @@ def update_model(
         params.append(is_active)
 
     if not updates:
-        conn.close()
+        if own_conn:
+            conn.close()
         return False
 
     params.append(model_id)
     query = f'UPDATE models SET {", ".join(updates)} WHERE id = ?'
     cursor.execute(query, params)
-    conn.commit()
-    conn.close()
-    return cursor.rowcount > 0
+    updated = cursor.rowcount > 0
+    if own_conn:
+        conn.commit()
+        conn.close()
+    _call_after_commit(own_conn, _bump_models_version)
+    return updated
+
+
+def _encode_stop_sequences(
+    stop_sequences: Optional[List[str]]
+) -> Optional[str]:
+    """Сериализовать стоп-последовательности для колонки stop_sequences."""
+    if not stop_sequences:
+        return None
+    return json.dumps(list(stop_sequences), ensure_ascii=False)
+
+
+def update_model_generation(
+    model_id: int,
+    max_tokens: Optional[int] = None,
+    temperature: Optional[float] = None,
+    timeout: Optional[float] = None,
+    stop_sequences: Optional[List[str]] = None,
+    conn: Optional[sqlite3.Connection] = None
+) -> bool:
+    """Задать параметры генерации модели.
+
+    Записываются все параметры сразу; None и пустой список означают
+    значение провайдера по умолчанию. С переданным conn изменения
+    не фиксируются (см. create_prompt).
+    """
+    own_conn = conn is None
+    if own_conn:
+        conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute(
+        '''UPDATE models SET max_tokens = ?, temperature = ?, timeout = ?,
+           stop_sequences = ? WHERE id = ?''',
+        (
+            max_tokens, temperature, timeout,
+            _encode_stop_sequences(stop_sequences), model_id
+        )
+    )
+    updated = cursor.rowcount > 0
+    if own_conn:
+        conn.commit()
+        conn.close()
+    _call_after_commit(own_conn, _bump_models_version)
+    return updated
 
 
 def toggle_model_active(model_id: int) -> bool:
@@ -306,123 +988,1126 @@ def toggle_model_active(model_id: int) -> bool:
     conn.commit()
     updated = cursor.rowcount > 0
     conn.close()
+    _bump_models_version()
     return updated
 
 
+# ========== Сжатие текстов ответов ==========
+
+def _load_compression_dicts(conn: sqlite3.Connection) -> None:
+    """Загрузить словари сжатия в кэш (один раз за сеанс)."""
+    global _compression_dicts_loaded
+    if _compression_dicts_loaded:
+        return
+
+    try:
+        rows = conn.execute('SELECT id, data FROM compression_dicts').fetchall()
+    except sqlite3.OperationalError:
+        # Таблица ещё не создана - словарей нет
+        return
+
+    for row in rows:
+        _compression_dicts[row[0]] = bytes(row[1])
+    _compression_dicts_loaded = True
+
+
+def _get_active_dict(
+    cursor: sqlite3.Cursor
+) -> Tuple[Optional[int], Optional[bytes]]:
+    """Получить последний обученный словарь сжатия."""
+    cursor.execute('SELECT MAX(id) FROM compression_dicts')
+    row = cursor.fetchone()
+    dict_id = row[0] if row else None
+    if dict_id is None:
+        return None, None
+    return dict_id, _compression_dicts.get(dict_id)
+
+
+def _encode_response(
+    text: str,
+    dict_id: Optional[int] = None,
+    zdict: Optional[bytes] = None,
+    min_length: Optional[int] = None
+) -> Tuple[Any, int, Optional[int]]:
+    """Закодировать текст ответа для хранения.
+
+    При заданном min_length ответ сжимается независимо от RESPONSE_CODEC,
+    если он не короче min_length байт.
+    Возвращает (значение для response_text, флаг сжатия, id словаря).
+    """
+    data = text.encode('utf-8')
+    if min_length is None:
+        if RESPONSE_CODEC != 'zlib':
+            return text, COMPRESSION_NONE, None
+        min_length = COMPRESSION_MIN_LENGTH
+    if len(data) < min_length:
+        return text, COMPRESSION_NONE, None
+
+    if zdict:
+        compressor = zlib.compressobj(9, zdict=zdict)
+    else:
+        compressor = zlib.compressobj(9)
+        dict_id = None
+    compressed = compressor.compress(data) + compressor.flush()
+
+    # Несжимаемые ответы храним как есть
+    if len(compressed) >= len(data):
+        return text, COMPRESSION_NONE, None
+
+    return compressed, COMPRESSION_ZLIB, dict_id
+
+
+def decode_response(
+    value: Any,
+    compression: Optional[int],
+    dict_id: Optional[int] = None,
+    dicts: Optional[Dict[int, bytes]] = None
+) -> str:
+    """Декодировать хранимый текст ответа.
+
+    dicts - словари сжатия другой базы (по умолчанию - кэш текущей).
+    """
+    if value is None or not compression:
+        return value if value is not None else ''
+
+    if compression != COMPRESSION_ZLIB:
+        raise ValueError(f'Неизвестный формат сжатия: {compression}')
+
+    if dict_id is not None:
+        zdict = (_compression_dicts if dicts is None else dicts).get(dict_id)
+        if zdict is None:
+            raise ValueError(f'Словарь сжатия {dict_id} не найден')
+        decompressor = zlib.decompressobj(zdict=zdict)
+    else:
+        decompressor = zlib.decompressobj()
+
+    data = decompressor.decompress(bytes(value)) + decompressor.flush()
+    return data.decode('utf-8')
+
+
+def _decode_response_sql(
+    value: Any,
+    compression: Optional[int],
+    dict_id: Optional[int]
+) -> Optional[str]:
+    """SQL-функция decode_response для поиска по сжатым ответам."""
+    try:
+        return decode_response(value, compression, dict_id)
+    except (ValueError, zlib.error):
+        return None
+
+
+def _make_preview(text: str) -> str:
+    """Получить несжатое превью ответа."""
+    return text[:RESPONSE_PREVIEW_LENGTH]
+
+
+def _row_to_result(
+    row: sqlite3.Row,
+    with_text: bool = True
+) -> Dict[str, Any]:
+    """Преобразовать строку results в словарь с учётом сжатия."""
+    result = dict(row)
+    compression = result.pop('compression', COMPRESSION_NONE)
+    dict_id = result.pop('compression_dict_id', None)
+
+    if with_text:
+        result['response_text'] = decode_response(
+            result['response_text'], compression, dict_id
+        )
+        if not result.get('response_preview'):
+            result['response_preview'] = _make_preview(
+                result['response_text']
+            )
+
+    return result
+
+
+def _results_columns(with_text: bool, table: str = 'results') -> str:
+    """Список колонок results (или её псевдонима table) для выборки."""
+    if with_text:
+        return f'{table}.*'
+
+    # Без полного текста: сжатый ответ не читается и не распаковывается
+    return (
+        f'{table}.id, {table}.prompt_id, {table}.model_id, '
+        f'{table}.created_at, {table}.tokens_used, {table}.response_time, '
+        f'COALESCE({table}.response_preview, '
+        f'substr({table}.response_text, 1, {RESPONSE_PREVIEW_LENGTH})) '
+        'AS response_preview'
+    )
+
+
+def _build_dictionary(samples: List[str]) -> bytes:
+    """Построить словарь zlib из часто повторяющихся строк ответов."""
+    counts: Counter = Counter()
+    for text in samples:
+        for line in set(text.splitlines()):
+            line = line.strip()
+            if 8 <= len(line) <= 200:
+                counts[line] += 1
+
+    chunks = []
+    total = 0
+    for line, count in counts.most_common():
+        if count < 2:
+            break
+        data = (line + '\n').encode('utf-8')
+        if total + len(data) > COMPRESSION_DICT_SIZE:
+            break
+        chunks.append(data)
+        total += len(data)
+
+    # zlib эффективнее использует фрагменты из конца словаря,
+    # поэтому самые частые строки располагаются последними
+    return b''.join(reversed(chunks))
+
+
+def train_compression_dictionary(
+    sample_limit: int = 500,
+    conn: Optional[sqlite3.Connection] = None
+) -> Optional[int]:
+    """Обучить общий словарь сжатия на последних ответах.
+
+    Новые ответы сжимаются с последним обученным словарём.
+    С переданным conn изменения не фиксируются (см. create_prompt).
+    Возвращает id словаря или None, если данных недостаточно.
+    """
+    own_conn = conn is None
+    if own_conn:
+        conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute(
+        '''SELECT response_text, compression, compression_dict_id
+           FROM results ORDER BY id DESC LIMIT ?''',
+        (sample_limit,)
+    )
+    samples = [
+        decode_response(row[0], row[1], row[2])
+        for row in cursor.fetchall()
+    ]
+
+    zdict = _build_dictionary(samples)
+    if not zdict:
+        if own_conn:
+            conn.close()
+        return None
+
+    cursor.execute(
+        'INSERT INTO compression_dicts (created_at, data) VALUES (?, ?)',
+        (datetime.now().strftime('%Y-%m-%d %H:%M:%S'), zdict)
+    )
+    dict_id = cursor.lastrowid
+    if own_conn:
+        conn.commit()
+        conn.close()
+
+    # До фиксации словарь не используется: без данных в кэше ответы
+    # сжимаются без словаря
+    _call_after_commit(
+        own_conn, lambda: _compression_dicts.update({dict_id: zdict})
+    )
+    return dict_id
+
+
+def compress_stored_results_batch(
+    after_id: int = 0,
+    batch_size: int = 500,
+    conn: Optional[sqlite3.Connection] = None
+) -> Dict[str, int]:
+    """Сжать одну пачку ранее сохранённых несжатых ответов.
+
+    Просматриваются несжатые записи с id больше after_id.
+    С переданным conn изменения не фиксируются (см. create_prompt).
+    Возвращает количество просмотренных и сжатых записей и последний id.
+    """
+    own_conn = conn is None
+    if own_conn:
+        conn = get_connection()
+    cursor = conn.cursor()
+    dict_id, zdict = _get_active_dict(cursor)
+
+    cursor.execute(
+        '''SELECT id, response_text FROM results
+           WHERE compression = ? AND id > ?
+           ORDER BY id LIMIT ?''',
+        (COMPRESSION_NONE, after_id, batch_size)
+    )
+    rows = cursor.fetchall()
+
+    updates = []
+    for row in rows:
+        text = row[1]
+        value, compression, used_dict_id = _encode_response(
+            text, dict_id, zdict
+        )
+        if compression != COMPRESSION_NONE:
+            updates.append((
+                value, compression, used_dict_id,
+                _make_preview(text), row[0]
+            ))
+
+    cursor.executemany(
+        '''UPDATE results SET response_text = ?, compression = ?,
+           compression_dict_id = ?, response_preview = ?
+           WHERE id = ?''',
+        updates
+    )
+    if own_conn:
+        conn.commit()
+        conn.close()
+    return {
+        'scanned': len(rows),
+        'compressed': len(updates),
+        'last_id': rows[-1][0] if rows else after_id
+    }
+
+
+def compress_stored_results(
+    batch_size: int = 500,
+    submit: Optional[Callable[..., Any]] = None
+) -> int:
+    """Сжать ранее сохранённые несжатые ответы.
+
+    Ответы сжимаются пачками (compress_stored_results_batch), каждая
+    пачка - одной транзакцией; submit - как в archive_results.
+    Возвращает количество сжатых записей. Чтобы уменьшить сам файл
+    базы данных, после сжатия требуется VACUUM.
+    """
+    if RESPONSE_CODEC is None:
+        return 0
+
+    compressed_count = 0
+    last_id = 0
+    while True:
+        if submit is None:
+            batch = compress_stored_results_batch(last_id, batch_size)
+        else:
+            batch = submit(
+                compress_stored_results_batch, last_id, batch_size
+            ).result()
+        if not batch['scanned']:
+            break
+        compressed_count += batch['compressed']
+        last_id = batch['last_id']
+    return compressed_count
+
+
 # ========== CRUD операции для results ==========
 
-def save_results(results: List[Dict[str, Any]]) -> None:
-    """Сохранить список результатов."""
-    conn = get_connection()
+def save_results(
+    results: List[Dict[str, Any]],
+    conn: Optional[sqlite3.Connection] = None
+) -> List[int]:
+    """Сохранить список результатов.
+
+    Повторно сохранённый тот же ответ той же модели на тот же промт
+    не дублируется, в том числе если он уже перенесён в архив
+    (архив должен быть подключён к conn, см. attach_archive).
+    Возвращает ID записей (новых или существующих).
+    С переданным conn изменения не фиксируются (см. create_prompt).
+    """
+    own_conn = conn is None
+    if own_conn:
+        conn = get_connection()
+        attach_archive(conn)
     cursor = conn.cursor()
+    dict_id, zdict = _get_active_dict(cursor)
+    result_ids = []
 
     for result in results:
+        response_text = result['response_text']
+        response_hash = content_hash(response_text)
+        archived_id = _archived_result_id(
+            cursor, result['prompt_id'], result['model_id'], response_hash
+        )
+        if archived_id is not None:
+            result_ids.append(archived_id)
+            continue
+        value, compression, used_dict_id = _encode_response(
+            response_text, dict_id, zdict
+        )
         cursor.execute(
-            '''INSERT INTO results (prompt_id, model_id, response_text, 
-               created_at, tokens_used, response_time) 
-               VALUES (?, ?, ?, ?, ?, ?)''',
+            '''INSERT OR IGNORE INTO results (prompt_id, model_id,
+               response_text, created_at, tokens_used, response_time,
+               compression, compression_dict_id, response_preview,
+               content_hash)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''',
             (
                 result['prompt_id'],
                 result['model_id'],
-                result['response_text'],
+                value,
                 result.get('created_at', datetime.now().strftime(
                     '%Y-%m-%d %H:%M:%S'
                 )),
                 result.get('tokens_used'),
-                result.get('response_time')
+                result.get('response_time'),
+                compression,
+                used_dict_id,
+                _make_preview(response_text),
+                response_hash
             )
         )
 
-    conn.commit()
-    conn.close()
+        if cursor.rowcount:
+            result_ids.append(cursor.lastrowid)
+        else:
+            cursor.execute(
+                '''SELECT id FROM results WHERE prompt_id = ?
+                   AND model_id = ? AND content_hash = ?''',
+                (result['prompt_id'], result['model_id'], response_hash)
+            )
+            result_ids.append(cursor.fetchone()[0])
+
+    if own_conn:
+        conn.commit()
+        conn.close()
+    return result_ids
+
+
+def _chunks(items: List[Any], size: int = SQL_VARIABLES_LIMIT):
+    """Разбить список на части для запросов с IN (...)."""
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def bulk_import(
+    prompts: List[Dict[str, Any]],
+    results: List[Dict[str, Any]],
+    conn: Optional[sqlite3.Connection] = None
+) -> Dict[str, int]:
+    """Массово импортировать промты и результаты в одной транзакции.
+
+    prompts - словари с ключами prompt, tags, date; results - словари
+    с ключами prompt, model_name, response_text, created_at, tokens_used,
+    response_time. Промты и результаты дедуплицируются по content_hash
+    (результаты - и по подключённому архиву), для неизвестных моделей
+    создаются неактивные модели-заглушки.
+    С переданным conn изменения не фиксируются (см. create_prompt).
+    Возвращает количество добавленных промтов, результатов и моделей.
+    """
+    now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+    # Промты из результатов тоже должны существовать
+    new_prompts: Dict[str, Dict[str, Any]] = {}
+    for item in list(prompts) + list(results):
+        prompt_hash = content_hash(item['prompt'])
+        if prompt_hash not in new_prompts or item.get('tags'):
+            new_prompts[prompt_hash] = item
+
+    own_conn = conn is None
+    if own_conn:
+        conn = get_connection()
+        attach_archive(conn)
+    cursor = conn.cursor()
+
+    prompt_ids: Dict[str, int] = {}
+    for chunk in _chunks(list(new_prompts)):
+        cursor.execute(
+            f'''SELECT content_hash, id FROM prompts
+               WHERE content_hash IN ({','.join('?' * len(chunk))})''',
+            chunk
+        )
+        prompt_ids.update(cursor.fetchall())
+
+    added_prompts = [h for h in new_prompts if h not in prompt_ids]
+    cursor.executemany(
+        '''INSERT OR IGNORE INTO prompts (date, prompt, tags, content_hash)
+           VALUES (?, ?, ?, ?)''',
+        [
+            (
+                new_prompts[h].get('date') or now,
+                new_prompts[h]['prompt'],
+                new_prompts[h].get('tags') or None,
+                h
+            )
+            for h in added_prompts
+        ]
+    )
+    for chunk in _chunks(added_prompts):
+        cursor.execute(
+            f'''SELECT content_hash, id FROM prompts
+               WHERE content_hash IN ({','.join('?' * len(chunk))})''',
+            chunk
+        )
+        prompt_ids.update(cursor.fetchall())
+    cursor.executemany(
+        'INSERT OR IGNORE INTO prompt_tags (prompt_id, tag) VALUES (?, ?)',
+        [
+            (prompt_ids[h], tag)
+            for h in added_prompts
+            for tag in parse_tags(new_prompts[h].get('tags'))
+        ]
+    )
+
+    model_ids: Dict[str, int] = {}
+    added_models = 0
+    if results:
+        cursor.execute('SELECT name, id FROM models')
+        model_ids.update(cursor.fetchall())
+        for result in results:
+            name = result['model_name']
+            if name in model_ids:
+                continue
+            cursor.execute(
+                '''INSERT INTO models (name, api_url, api_key_env, is_active,
+                   model_type, model_name) VALUES (?, ?, ?, 0, ?, ?)''',
+                (
+                    name, IMPORTED_MODEL_API_URL, IMPORTED_MODEL_API_KEY_ENV,
+                    IMPORTED_MODEL_TYPE, name
+                )
+            )
+            model_ids[name] = cursor.lastrowid
+            added_models += 1
+
+    dict_id, zdict = _get_active_dict(cursor)
+    rows = []
+    for result in results:
+        response_text = result['response_text']
+        prompt_id = prompt_ids[content_hash(result['prompt'])]
+        model_id = model_ids[result['model_name']]
+        response_hash = content_hash(response_text)
+        if _archived_result_id(
+            cursor, prompt_id, model_id, response_hash
+        ) is not None:
+            continue
+        value, compression, used_dict_id = _encode_response(
+            response_text, dict_id, zdict
+        )
+        rows.append((
+            prompt_id,
+            model_id,
+            value,
+            result.get('created_at') or now,
+            result.get('tokens_used'),
+            result.get('response_time'),
+            compression,
+            used_dict_id,
+            _make_preview(response_text),
+            response_hash
+        ))
+
+    changes_before = conn.total_changes
+    cursor.executemany(
+        '''INSERT OR IGNORE INTO results (prompt_id, model_id,
+           response_text, created_at, tokens_used, response_time,
+           compression, compression_dict_id, response_preview,
+           content_hash)
+           VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''',
+        rows
+    )
+    added_results = conn.total_changes - changes_before
+
+    if own_conn:
+        conn.commit()
+        conn.close()
+
+    if added_models:
+        # Кэши моделей перечитывают таблицу только после фиксации
+        _call_after_commit(own_conn, _bump_models_version)
+
+    return {
+        'prompts': len(added_prompts),
+        'results': added_results,
+        'models': added_models
+    }
 
 
 def get_results(
     prompt_id: Optional[int] = None,
     model_id: Optional[int] = None,
-    limit: Optional[int] = None
+    limit: Optional[int] = None,
+    with_text: bool = True
 ) -> List[Dict[str, Any]]:
-    """Получить список результатов."""
+    """Получить список результатов.
+
+    При with_text=False полный текст ответа не читается и не
+    распаковывается - доступно только поле response_preview.
+    """
+    return query_results(
+        prompt_id=prompt_id,
+        model_id=model_id,
+        limit=limit,
+        with_text=with_text
+    )
+
+
+def get_results_by_prompt(prompt_id: int) -> List[Dict[str, Any]]:
+    """Получить результаты для конкретного промта."""
+    return get_results(prompt_id=prompt_id)
+
+
+def get_result_text(result_id: int) -> Optional[str]:
+    """Получить полный текст ответа по ID результата (включая архив)."""
     conn = get_connection()
     cursor = conn.cursor()
+    cursor.execute(
+        '''SELECT response_text, compression, compression_dict_id
+           FROM results WHERE id = ?''',
+        (result_id,)
+    )
+    row = cursor.fetchone()
+    if row is None and attach_archive(conn):
+        cursor.execute(
+            '''SELECT response_text, compression, compression_dict_id
+               FROM archive.results WHERE id = ?''',
+            (result_id,)
+        )
+        row = cursor.fetchone()
+    conn.close()
+
+    return decode_response(row[0], row[1], row[2]) if row else None
+
+
+def _results_conditions(
+    prompt_id: Optional[int],
+    model_id: Optional[int],
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None
+) -> Tuple[List[str], List[Any]]:
+    """Условия отбора результатов (таблица results под псевдонимом r).
 
+    Даты сравниваются как строки формата 'YYYY-MM-DD[ HH:MM:SS]',
+    граница date_to включает весь указанный день.
+    """
     conditions = []
-    params = []
+    params: List[Any] = []
 
     if prompt_id is not None:
-        conditions.append('prompt_id = ?')
+        conditions.append('r.prompt_id = ?')
         params.append(prompt_id)
 
     if model_id is not None:
-        conditions.append('model_id = ?')
+        conditions.append('r.model_id = ?')
         params.append(model_id)
 
-    query = 'SELECT * FROM results'
-    if conditions:
-        query += ' WHERE ' + ' AND '.join(conditions)
-    query += ' ORDER BY created_at DESC'
+    if date_from:
+        conditions.append('r.created_at >= ?')
+        params.append(date_from)
 
-    if limit:
-        query += f' LIMIT {limit}'
+    if date_to:
+        conditions.append('r.created_at <= ?')
+        params.append(date_to if len(date_to) > 10 else f'{date_to} 23:59:59')
 
-    cursor.execute(query, params)
-    rows = cursor.fetchall()
+    return conditions, params
+
+
+def _where(conditions: List[str]) -> str:
+    """Собрать WHERE из списка условий."""
+    return ' WHERE ' + ' AND '.join(conditions) if conditions else ''
+
+
+def count_results(
+    prompt_id: Optional[int] = None,
+    model_id: Optional[int] = None,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    include_archive: bool = False
+) -> int:
+    """Получить количество результатов."""
+    conn = get_connection()
+    cursor = conn.cursor()
+    source = _results_source(conn, include_archive)
+    conditions, params = _results_conditions(
+        prompt_id, model_id, date_from, date_to
+    )
+    cursor.execute(
+        f'SELECT COUNT(*) FROM {source} r{_where(conditions)}', params
+    )
+    count = cursor.fetchone()[0]
     conn.close()
+    return count
 
-    return [dict(row) for row in rows]
 
+def iter_result_batches(
+    prompt_id: Optional[int] = None,
+    model_id: Optional[int] = None,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    batch_size: int = 500,
+    include_archive: bool = False
+) -> Iterator[List[Dict[str, Any]]]:
+    """Выгрузить результаты пачками с текстом промта и названием модели.
+
+    Строки читаются из курсора по batch_size, поэтому объём памяти
+    не зависит от размера истории.
+    """
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        source = _results_source(conn, include_archive)
+        conditions, params = _results_conditions(
+            prompt_id, model_id, date_from, date_to
+        )
+        cursor.execute(
+            f'''SELECT r.id, r.created_at, r.prompt_id, p.prompt,
+                   r.model_id, m.name AS model_name, r.response_text,
+                   r.compression, r.compression_dict_id,
+                   r.tokens_used, r.response_time
+               FROM {source} r
+               LEFT JOIN prompts p ON p.id = r.prompt_id
+               LEFT JOIN models m ON m.id = r.model_id{_where(conditions)}
+               ORDER BY r.id''',
+            params
+        )
+
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            batch = []
+            for row in rows:
+                result = dict(row)
+                result['response_text'] = decode_response(
+                    result['response_text'],
+                    result.pop('compression'),
+                    result.pop('compression_dict_id')
+                )
+                batch.append(result)
+            yield batch
+    finally:
+        conn.close()
 
-def get_results_by_prompt(prompt_id: int) -> List[Dict[str, Any]]:
-    """Получить результаты для конкретного промта."""
-    return get_results(prompt_id=prompt_id)
 
+def iter_results(
+    prompt_id: Optional[int] = None,
+    model_id: Optional[int] = None,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    batch_size: int = 500,
+    include_archive: bool = False
+) -> Iterator[Dict[str, Any]]:
+    """Построчно выгрузить результаты (см. iter_result_batches)."""
+    for batch in iter_result_batches(
+        prompt_id, model_id, date_from, date_to, batch_size, include_archive
+    ):
+        yield from batch
+
+
+# ========== Архив старых результатов ==========
+
+def get_archive_path() -> str:
+    """Получить путь к файлу архива результатов."""
+    if ARCHIVE_DB_PATH:
+        return ARCHIVE_DB_PATH
+    root, ext = os.path.splitext(DB_PATH)
+    return f'{root}_archive{ext or ".db"}'
+
+
+def _archive_attached(conn: sqlite3.Connection) -> bool:
+    """Проверить, подключён ли архив к соединению."""
+    return conn.execute(
+        "SELECT 1 FROM pragma_database_list WHERE name = 'archive'"
+    ).fetchone() is not None
+
+
+def attach_archive(conn: sqlite3.Connection, create: bool = False) -> bool:
+    """Подключить архив к соединению как схему archive.
+
+    Без create архив подключается, только если файл уже существует.
+    Повторный вызов для того же соединения ничего не делает. ATTACH
+    невозможен внутри транзакции - вызывать до её начала.
+    Возвращает True, если архив подключён.
+    """
+    if _archive_attached(conn) and not create:
+        return True
+    path = get_archive_path()
+    if not create and not os.path.exists(path):
+        return False
 
-# ========== CRUD операции для settings ==========
+    if not _archive_attached(conn):
+        conn.execute('ATTACH DATABASE ? AS archive', (path,))
+    if create:
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS archive.results (
+                id INTEGER PRIMARY KEY,
+                prompt_id INTEGER NOT NULL,
+                model_id INTEGER NOT NULL,
+                response_text TEXT NOT NULL,
+                created_at TEXT NOT NULL,
+                tokens_used INTEGER,
+                response_time REAL,
+                compression INTEGER NOT NULL DEFAULT 0,
+                compression_dict_id INTEGER,
+                response_preview TEXT,
+                content_hash TEXT
+            )
+        ''')
+        conn.execute('''
+            CREATE INDEX IF NOT EXISTS archive.idx_results_prompt_created
+            ON results(prompt_id, created_at)
+        ''')
+        conn.execute('''
+            CREATE INDEX IF NOT EXISTS archive.idx_results_model_created
+            ON results(model_id, created_at)
+        ''')
+        conn.execute('''
+            CREATE INDEX IF NOT EXISTS archive.idx_results_created_at
+            ON results(created_at)
+        ''')
+        # Поиск повторов при сохранении (см. _archived_result_id)
+        conn.execute('''
+            CREATE INDEX IF NOT EXISTS archive.idx_results_content_hash
+            ON results(prompt_id, model_id, content_hash)
+        ''')
+    return True
+
+
+def _archived_result_id(
+    cursor: sqlite3.Cursor,
+    prompt_id: int,
+    model_id: int,
+    response_hash: str
+) -> Optional[int]:
+    """Найти в подключённом архиве тот же ответ модели на промт."""
+    if not _archive_attached(cursor.connection):
+        return None
+    try:
+        cursor.execute(
+            '''SELECT id FROM archive.results WHERE prompt_id = ?
+               AND model_id = ? AND content_hash = ?''',
+            (prompt_id, model_id, response_hash)
+        )
+    except sqlite3.OperationalError:
+        # Файл архива есть, но таблица ещё не создана
+        return None
+    row = cursor.fetchone()
+    return row[0] if row else None
 
-def get_setting(key: str, default: Optional[str] = None) -> Optional[str]:
-    """Получить значение настройки."""
+
+def _results_source(conn: sqlite3.Connection, include_archive: bool) -> str:
+    """Источник строк results для FROM: таблица или таблица с архивом.
+
+    Условия WHERE внешнего запроса SQLite переносит внутрь обеих частей
+    UNION ALL, поэтому индексы используются в обеих базах.
+    """
+    if not include_archive or not attach_archive(conn):
+        return 'results'
+
+    columns = ', '.join(RESULT_COLUMNS)
+    return (
+        f'(SELECT {columns} FROM main.results '
+        f'UNION ALL SELECT {columns} FROM archive.results)'
+    )
+
+
+def prepare_archive() -> str:
+    """Создать файл архива и его таблицу, если их ещё нет.
+
+    Запись идёт только в файл архива и не блокирует основную БД.
+    Возвращает путь к архиву.
+    """
     conn = get_connection()
+    attach_archive(conn, create=True)
+    conn.commit()
+    conn.close()
+    return get_archive_path()
+
+
+def archive_results_batch(
+    cutoff: str,
+    after_id: int = 0,
+    batch_size: int = 1000,
+    compress: bool = True,
+    conn: Optional[sqlite3.Connection] = None
+) -> Dict[str, int]:
+    """Перенести в архив одну пачку результатов старше cutoff.
+
+    Переносятся записи с id больше after_id; вставка в архив и удаление
+    из основной БД выполняются в одной транзакции. Архив должен быть
+    создан (prepare_archive) и подключён к conn (attach_archive).
+    С переданным conn изменения не фиксируются (см. create_prompt).
+    Возвращает количество перенесённых и сжатых записей и последний id.
+    """
+    own_conn = conn is None
+    if own_conn:
+        conn = get_connection()
+        attach_archive(conn)
     cursor = conn.cursor()
-    cursor.execute('SELECT value FROM settings WHERE key = ?', (key,))
-    row = cursor.fetchone()
+    dict_id, zdict = _get_active_dict(cursor)
+
+    columns = ', '.join(RESULT_COLUMNS)
+    placeholders = ', '.join('?' * len(RESULT_COLUMNS))
+    cursor.execute(
+        f'''SELECT {columns} FROM main.results
+           WHERE created_at < ? AND id > ?
+           ORDER BY id LIMIT ?''',
+        (cutoff, after_id, batch_size)
+    )
+    rows = [dict(row) for row in cursor.fetchall()]
+
+    compressed = 0
+    for row in rows:
+        if compress and row['compression'] == COMPRESSION_NONE:
+            value, compression, used_dict_id = _encode_response(
+                row['response_text'], dict_id, zdict,
+                ARCHIVE_COMPRESSION_MIN_LENGTH
+            )
+            if compression != COMPRESSION_NONE:
+                row['response_text'] = value
+                row['compression'] = compression
+                row['compression_dict_id'] = used_dict_id
+                compressed += 1
+
+    ids = [row['id'] for row in rows]
+    if rows:
+        cursor.executemany(
+            f'''INSERT OR REPLACE INTO archive.results ({columns})
+               VALUES ({placeholders})''',
+            [tuple(row[col] for col in RESULT_COLUMNS) for row in rows]
+        )
+        cursor.executemany(
+            'DELETE FROM main.results WHERE id = ?',
+            [(result_id,) for result_id in ids]
+        )
+
+    if own_conn:
+        conn.commit()
+        conn.close()
+    return {
+        'archived': len(rows),
+        'compressed': compressed,
+        'last_id': ids[-1] if ids else after_id
+    }
+
+
+def archive_results(
+    older_than_days: int,
+    compress: bool = True,
+    batch_size: int = 1000,
+    submit: Optional[Callable[..., Any]] = None
+) -> Dict[str, Any]:
+    """Перенести результаты старше older_than_days дней в архив.
+
+    Результаты переносятся пачками (archive_results_batch), каждая
+    пачка - одной транзакцией. submit - функция постановки операции
+    в поток записи (DBWriter.submit), возвращающая Future; без неё пачки
+    записываются собственным соединением. При compress несжатые ответы
+    от ARCHIVE_COMPRESSION_MIN_LENGTH байт сжимаются.
+    Возвращает количество перенесённых записей и путь к архиву.
+    """
+    cutoff = (
+        datetime.now() - timedelta(days=older_than_days)
+    ).strftime('%Y-%m-%d %H:%M:%S')
+    archive_path = prepare_archive()
+
+    archived = 0
+    compressed = 0
+    last_id = 0
+    while True:
+        args = (cutoff, last_id, batch_size, compress)
+        if submit is None:
+            batch = archive_results_batch(*args)
+        else:
+            batch = submit(archive_results_batch, *args).result()
+        if not batch['archived']:
+            break
+        archived += batch['archived']
+        compressed += batch['compressed']
+        last_id = batch['last_id']
+
+    return {
+        'archived': archived,
+        'compressed': compressed,
+        'archive_path': archive_path,
+        'cutoff': cutoff
+    }
+
+
+def count_archived_results() -> int:
+    """Получить количество результатов в архиве."""
+    conn = get_connection()
+    count = 0
+    if attach_archive(conn):
+        try:
+            count = conn.execute(
+                'SELECT COUNT(*) FROM archive.results'
+            ).fetchone()[0]
+        except sqlite3.OperationalError:
+            # Файл архива есть, но таблица ещё не создана
+            count = 0
     conn.close()
+    return count
 
-    return row['value'] if row else default
 
+# ========== Кэш отрендеренного HTML ==========
 
-def set_setting(key: str, value: str) -> None:
-    """Установить значение настройки."""
+def get_rendered_html(key: str) -> Optional[str]:
+    """Получить сохранённый HTML по хэшу содержимого ответа."""
     conn = get_connection()
     cursor = conn.cursor()
     cursor.execute(
-        'INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)',
-        (key, value)
+        'SELECT html FROM rendered_html WHERE content_hash = ?',
+        (key,)
     )
-    conn.commit()
+    row = cursor.fetchone()
     conn.close()
 
+    return row[0] if row else None
+
+
+def save_rendered_html(
+    key: str,
+    html: str,
+    max_entries: Optional[int] = None,
+    conn: Optional[sqlite3.Connection] = None
+) -> None:
+    """Сохранить HTML, оставив не более max_entries последних записей."""
+    own_conn = conn is None
+    if own_conn:
+        conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute(
+        'INSERT OR REPLACE INTO rendered_html (content_hash, html) '
+        'VALUES (?, ?)',
+        (key, html)
+    )
+
+    if max_entries:
+        # Записи с наименьшим rowid - самые старые
+        cursor.execute(
+            'DELETE FROM rendered_html WHERE rowid <= '
+            '(SELECT MAX(rowid) FROM rendered_html) - ?',
+            (max_entries,)
+        )
+
+    if own_conn:
+        conn.commit()
+        conn.close()
+
+
+# ========== CRUD операции для settings ==========
+
+def _get_settings_cache() -> Dict[str, str]:
+    """Получить кэш настроек, загрузив таблицу settings при первом вызове."""
+    global _settings_cache
+    with _settings_lock:
+        if _settings_cache is None:
+            conn = get_connection()
+            cursor = conn.cursor()
+            cursor.execute('SELECT key, value FROM settings')
+            _settings_cache = {row['key']: row['value'] for row in cursor}
+            conn.close()
+        return _settings_cache
+
+
+def reload_settings() -> None:
+    """Сбросить кэш настроек (будет перечитан при следующем обращении)."""
+    global _settings_cache
+    with _settings_lock:
+        _settings_cache = None
+
+
+def get_setting(key: str, default: Optional[str] = None) -> Optional[str]:
+    """Получить значение настройки."""
+    return _get_settings_cache().get(key, default)
+
+
+def set_setting(
+    key: str,
+    value: str,
+    conn: Optional[sqlite3.Connection] = None
+) -> None:
+    """Установить значение настройки."""
+    set_settings({key: value}, conn)
+
+
+def set_settings(
+    values: Dict[str, str],
+    conn: Optional[sqlite3.Connection] = None
+) -> None:
+    """Установить несколько настроек одной транзакцией.
+
+    Значения записываются в БД и в кэш, подписчики получают словарь
+    изменившихся настроек. С переданным conn кэш обновляется после
+    фиксации транзакции (см. create_prompt).
+    """
+    own_conn = conn is None
+    if own_conn:
+        conn = get_connection()
+    cursor = conn.cursor()
+    cursor.executemany(
+        'INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)',
+        list(values.items())
+    )
+    if own_conn:
+        conn.commit()
+        conn.close()
+
+    _call_after_commit(own_conn, lambda: _apply_settings(values))
+
+
+def _apply_settings(values: Dict[str, str]) -> None:
+    """Обновить кэш настроек и уведомить подписчиков."""
+    with _settings_lock:
+        if _settings_cache is None:
+            # Кэш ещё не загружен и прочитает новые значения из БД
+            changed = dict(values)
+        else:
+            changed = {
+                key: value for key, value in values.items()
+                if _settings_cache.get(key) != value
+            }
+            _settings_cache.update(values)
+
+    if changed:
+        for callback in list(_settings_subscribers):
+            try:
+                callback(changed)
+            except Exception as e:
+                # Например, окно подписчика уже удалено
+                logger.error(f'Ошибка обработчика настроек: {e}')
+
+
+def subscribe_settings(callback: Callable[[Dict[str, str]], None]) -> None:
+    """Подписаться на изменения настроек.
+
+    Обработчик вызывается в потоке, выполнившем запись.
+    """
+    if callback not in _settings_subscribers:
+        _settings_subscribers.append(callback)
+
+
+def unsubscribe_settings(callback: Callable[[Dict[str, str]], None]) -> None:
+    """Отписаться от изменений настроек."""
+    if callback in _settings_subscribers:
+        _settings_subscribers.remove(callback)
+
 
 # ========== Поиск и сортировка ==========
 
 def search_prompts(
     query: str,
-    search_in_tags: bool = True
+    search_in_tags: bool = True,
+    tags: Optional[List[str]] = None,
+    match_all: bool = False
 ) -> List[Dict[str, Any]]:
-    """Поиск промтов по тексту и тегам."""
+    """Поиск промтов по тексту и тегам.
+
+    Совпадение с тегом ищется по началу тега через индекс prompt_tags.
+    Дополнительно результаты можно ограничить списком тегов tags.
+    """
     conn = get_connection()
     cursor = conn.cursor()
 
-    search_term = f'%{query}%'
     conditions = ['prompt LIKE ?']
-    params = [search_term]
+    params: List[Any] = [f'%{query}%']
 
     if search_in_tags:
-        conditions.append('tags LIKE ?')
-        params.append(search_term)
+        conditions.append(
+            'id IN (SELECT prompt_id FROM prompt_tags WHERE tag LIKE ?)'
+        )
+        params.append(f'{query}%')
+
+    where = f"({' OR '.join(conditions)})"
+    if parse_tags(tags):
+        tags_sql, tags_params = _tags_condition(tags, match_all)
+        where += f' AND {tags_sql}'
+        params.extend(tags_params)
 
     sql = f'''
         SELECT * FROM prompts 
-        WHERE {' OR '.join(conditions)}
+        WHERE {where}
         ORDER BY date DESC
     '''
 
@@ -433,17 +2118,82 @@ def search_prompts(
     return [dict(row) for row in rows]
 
 
-def search_results(query: str) -> List[Dict[str, Any]]:
-    """Поиск результатов по тексту ответа."""
+def query_results(
+    text: Optional[str] = None,
+    prompt_id: Optional[int] = None,
+    model_id: Optional[int] = None,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    min_response_time: Optional[float] = None,
+    max_response_time: Optional[float] = None,
+    min_tokens: Optional[int] = None,
+    max_tokens: Optional[int] = None,
+    limit: Optional[int] = None,
+    with_text: bool = True,
+    include_archive: bool = False
+) -> List[Dict[str, Any]]:
+    """Найти результаты по набору фильтров одним SQL-запросом.
+
+    Все фильтры необязательны и объединяются через AND. Фильтры по
+    промту, модели и дате используют индексы, поиск по тексту ответа
+    (с распаковкой сжатых ответов) проверяется последним. К каждой
+    записи добавляется текст промта (поле prompt). При include_archive
+    поиск ведётся и по архиву старых результатов.
+    """
+    conditions, params = _results_conditions(
+        prompt_id, model_id, date_from, date_to
+    )
+
+    if min_response_time is not None:
+        conditions.append('r.response_time >= ?')
+        params.append(min_response_time)
+
+    if max_response_time is not None:
+        conditions.append('r.response_time <= ?')
+        params.append(max_response_time)
+
+    if min_tokens is not None:
+        conditions.append('r.tokens_used >= ?')
+        params.append(min_tokens)
+
+    if max_tokens is not None:
+        conditions.append('r.tokens_used <= ?')
+        params.append(max_tokens)
+
+    if text:
+        conditions.append(
+            'decode_response(r.response_text, r.compression, '
+            'r.compression_dict_id) LIKE ?'
+        )
+        params.append(f'%{text}%')
+
     conn = get_connection()
     cursor = conn.cursor()
+    source = _results_source(conn, include_archive)
 
-    search_term = f'%{query}%'
-    cursor.execute(
-        'SELECT * FROM results WHERE response_text LIKE ? ORDER BY created_at DESC',
-        (search_term,)
+    query = (
+        f'SELECT {_results_columns(with_text, "r")}, p.prompt AS prompt '
+        f'FROM {source} r LEFT JOIN prompts p ON p.id = r.prompt_id'
+        f'{_where(conditions)} ORDER BY r.created_at DESC'
     )
+
+    if limit:
+        query += ' LIMIT ?'
+        params.append(limit)
+
+    cursor.execute(query, params)
     rows = cursor.fetchall()
     conn.close()
 
-    return [dict(row) for row in rows]
+    return [_row_to_result(row, with_text) for row in rows]
+
+
+def search_results(
+    query: str,
+    with_text: bool = True,
+    include_archive: bool = False
+) -> List[Dict[str, Any]]:
+    """Поиск результатов по тексту ответа (включая сжатые ответы)."""
+    return query_results(
+        text=query, with_text=with_text, include_archive=include_archive
+    )
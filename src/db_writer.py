@@ -0,0 +1,241 @@
+"""Единственный поток записи в БД с групповой фиксацией.
+
+Подсистемы ставят операции записи в ограниченную очередь и сразу
+получают Future с результатом (например, ID созданной записи). Поток
+записи выполняет накопившиеся операции в одной транзакции, каждую в своей
+точке сохранения, и фиксирует их одним COMMIT. Так запись идёт через
+одно соединение и не упирается в блокировки SQLite (database is locked).
+
+Операция - функция модуля db, принимающая параметр conn (create_prompt,
+update_prompt, delete_prompt, save_results, bulk_import, sync_models,
+set_settings, archive_results_batch, save_rendered_html и др.). Ждать
+Future внутри операции нельзя: поток записи при этом заблокирует сам себя.
+"""
+
+import logging
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, List, Optional, Tuple
+
+from src import db
+
+
+logger = logging.getLogger(__name__)
+
+# Максимальная длина очереди; при переполнении submit ждёт освобождения
+WRITE_QUEUE_SIZE = 1000
+# Максимальное количество операций в одной транзакции
+GROUP_COMMIT_SIZE = 100
+# Сколько ждать следующих операций перед фиксацией группы (секунды)
+GROUP_COMMIT_DELAY = 0.005
+
+# Операция в очереди: (Future, функция, позиционные и именованные аргументы)
+WriteOperation = Tuple[Future, Callable[..., Any], tuple, dict]
+
+# Маркер остановки потока в очереди
+_STOP = object()
+
+
+class DBWriter:
+    """Поток записи в БД с ограниченной очередью и групповой фиксацией."""
+
+    def __init__(
+        self,
+        queue_size: int = WRITE_QUEUE_SIZE,
+        group_size: int = GROUP_COMMIT_SIZE,
+        group_delay: float = GROUP_COMMIT_DELAY
+    ):
+        """Инициализация потока записи."""
+        self.group_size = group_size
+        self.group_delay = group_delay
+        self.operations = 0
+        self.commits = 0
+        self._queue: 'queue.Queue[Any]' = queue.Queue(maxsize=queue_size)
+        self._lock = threading.Lock()
+        self._closed = False
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Запустить поток записи."""
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._closed = False
+            self._thread = threading.Thread(
+                target=self._run, name='db-writer', daemon=True
+            )
+            self._thread.start()
+
+    def submit(
+        self,
+        func: Callable[..., Any],
+        *args: Any,
+        **kwargs: Any
+    ) -> Future:
+        """Поставить операцию записи в очередь.
+
+        Функция будет вызвана в потоке записи как func(*args, conn=...,
+        **kwargs). Future получает результат после фиксации транзакции.
+        Если очередь заполнена, вызов ждёт её освобождения.
+        """
+        future: Future = Future()
+        with self._lock:
+            if self._closed or self._thread is None:
+                raise RuntimeError('Поток записи в БД не запущен')
+        self._queue.put((future, func, args, kwargs))
+        return future
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Выполнить операции из очереди и остановить поток."""
+        with self._lock:
+            if self._closed or self._thread is None:
+                return
+            self._closed = True
+            thread = self._thread
+        self._queue.put(_STOP)
+        thread.join(timeout)
+
+    def _run(self) -> None:
+        """Цикл записи: группа операций - одна транзакция."""
+        conn = db.get_connection()
+        # Транзакциями управляет поток записи (BEGIN/COMMIT явно)
+        conn.isolation_level = None
+        try:
+            stop = False
+            while not stop:
+                item = self._queue.get()
+                if item is _STOP:
+                    break
+                group = [item]
+                stop = self._collect(group)
+                try:
+                    self._execute(conn, group)
+                except Exception as e:
+                    # Сбой группы не должен останавливать поток записи:
+                    # иначе ожидающие результата вызовы зависнут
+                    logger.error(f'Сбой группы операций записи: {e}')
+                    self._abort(conn, group, e)
+        finally:
+            conn.close()
+
+    def _collect(self, group: List[WriteOperation]) -> bool:
+        """Добрать в группу операции, пришедшие за group_delay.
+
+        Возвращает True, если в очереди встретился маркер остановки.
+        """
+        deadline = time.monotonic() + self.group_delay
+        while len(group) < self.group_size:
+            timeout = deadline - time.monotonic()
+            try:
+                if timeout > 0:
+                    item = self._queue.get(timeout=timeout)
+                else:
+                    item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                return True
+            group.append(item)
+        return False
+
+    def _execute(
+        self,
+        conn: sqlite3.Connection,
+        group: List[WriteOperation]
+    ) -> None:
+        """Выполнить группу операций и зафиксировать её одним COMMIT."""
+        try:
+            # Архив нужен операциям для поиска повторов; ATTACH возможен
+            # только вне транзакции
+            db.attach_archive(conn)
+            conn.execute('BEGIN IMMEDIATE')
+        except sqlite3.Error as e:
+            logger.error(f'Не удалось начать транзакцию записи: {e}')
+            for future, _, _, _ in group:
+                if future.set_running_or_notify_cancel():
+                    future.set_exception(e)
+            return
+
+        completed = []
+        for future, func, args, kwargs in group:
+            if not future.set_running_or_notify_cancel():
+                continue
+            # Ошибка одной операции откатывает только её изменения
+            # и отложенные ею действия
+            conn.execute('SAVEPOINT write_operation')
+            checkpoint = db.after_commit_checkpoint()
+            try:
+                result = func(*args, conn=conn, **kwargs)
+            except Exception as e:
+                logger.warning(f'Ошибка операции записи {func.__name__}: {e}')
+                future.set_exception(e)
+                # Если откат к точке сохранения не удался, исключение
+                # отменит всю группу (см. _run)
+                conn.execute('ROLLBACK TO write_operation')
+                conn.execute('RELEASE write_operation')
+                db.discard_after_commit(checkpoint)
+                continue
+            conn.execute('RELEASE write_operation')
+            completed.append((future, result))
+
+        try:
+            conn.execute('COMMIT')
+        except sqlite3.Error as e:
+            logger.error(f'Ошибка фиксации группы записей: {e}')
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            db.discard_after_commit()
+            for future, _ in completed:
+                future.set_exception(e)
+            return
+
+        self.operations += len(completed)
+        self.commits += 1
+        # Результаты - до отложенных действий: ошибка подписчика
+        # не должна оставить вызывающий код без ответа
+        for future, result in completed:
+            future.set_result(result)
+        db.run_after_commit()
+
+    def _abort(
+        self,
+        conn: sqlite3.Connection,
+        group: List[WriteOperation],
+        error: Exception
+    ) -> None:
+        """Откатить группу после сбоя и завершить её операции ошибкой."""
+        try:
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+        except sqlite3.Error as e:
+            logger.error(f'Не удалось откатить группу записей: {e}')
+        db.discard_after_commit()
+        for future, _, _, _ in group:
+            if not future.done():
+                future.set_exception(error)
+
+
+_writer: Optional[DBWriter] = None
+_writer_lock = threading.Lock()
+
+
+def get_writer() -> DBWriter:
+    """Получить общий поток записи (запускается при первом обращении)."""
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = DBWriter()
+            _writer.start()
+        return _writer
+
+
+def shutdown_writer(timeout: Optional[float] = None) -> None:
+    """Дописать операции из очереди и остановить общий поток записи."""
+    global _writer
+    with _writer_lock:
+        writer, _writer = _writer, None
+    if writer:
+        writer.stop(timeout)
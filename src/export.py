@@ -1,102 +1,369 @@
-"""Модуль для экспорта результатов."""
+"""Модуль для экспорта результатов.
 
+Модуль не зависит от Qt: функции принимают путь к файлу или открытый
+текстовый поток и возвращают статистику выгрузки. Диалоги и фоновый
+поток находятся в src/ui/export_dialog.py.
+"""
+
+import csv
 import json
+import time
+from contextlib import contextmanager
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import (
+    Any, Callable, Dict, IO, Iterable, Iterator, Optional, Union
+)
 from pathlib import Path
 
-from PyQt5.QtWidgets import QFileDialog, QMessageBox
+from src import db
 
 
-def export_to_markdown(
-    results: List[Dict[str, Any]],
-    prompt_text: str,
-    parent=None
-) -> bool:
-    """Экспортировать результаты в Markdown формат."""
-    filename, _ = QFileDialog.getSaveFileName(
-        parent,
-        'Сохранить как Markdown',
-        f'results_{datetime.now().strftime("%Y%m%d_%H%M%S")}.md',
-        'Markdown Files (*.md);;All Files (*)'
-    )
+# Обратный вызов прогресса: (обработано записей, всего записей или None)
+ProgressCallback = Callable[[int, Optional[int]], None]
+
+# Поля плоской выгрузки для CSV
+CSV_FIELDS = [
+    'id', 'created_at', 'prompt_id', 'prompt', 'model_id', 'model_name',
+    'response_text', 'tokens_used', 'response_time'
+]
+
+# Как часто сообщать о прогрессе (в записях)
+PROGRESS_STEP = 100
+
+# Путь к файлу или открытый текстовый поток
+ExportTarget = Union[str, Path, IO[str]]
+
+
+class ExportCancelled(Exception):
+    """Экспорт прерван обратным вызовом прогресса."""
+
+
+def _export_date() -> str:
+    """Дата экспорта в формате отчёта."""
+    return datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+
+def _report(
+    progress_callback: Optional[ProgressCallback],
+    done: int,
+    total: Optional[int],
+    force: bool = False
+) -> None:
+    """Сообщить о прогрессе не чаще, чем раз в PROGRESS_STEP записей."""
+    if progress_callback and (force or done % PROGRESS_STEP == 0):
+        progress_callback(done, total)
+
+
+def write_markdown(
+    f: IO[str],
+    results: Iterable[Dict[str, Any]],
+    prompt_text: Optional[str] = None,
+    progress_callback: Optional[ProgressCallback] = None,
+    total: Optional[int] = None
+) -> int:
+    """Записать результаты в Markdown построчно. Возвращает число записей."""
+    f.write("# Результаты сравнения моделей\n\n")
+    if prompt_text is not None:
+        f.write(f"**Промт:** {prompt_text}\n\n")
+    f.write(f"**Дата экспорта:** {_export_date()}\n\n")
+    f.write("---\n\n")
+
+    count = 0
+    for count, result in enumerate(results, 1):
+        model_name = result.get('model_name') or 'Неизвестная модель'
+        response_text = result.get('response_text', '')
+        created_at = result.get('created_at', '')
+
+        f.write(f"## {count}. {model_name}\n\n")
+        if prompt_text is None and result.get('prompt'):
+            f.write(f"**Промт:** {result['prompt']}\n\n")
+        if created_at:
+            f.write(f"*Дата: {created_at}*\n\n")
+        f.write(f"{response_text}\n\n")
+        f.write("---\n\n")
+        _report(progress_callback, count, total)
+
+    _report(progress_callback, count, total, force=True)
+    return count
+
+
+def write_json(
+    f: IO[str],
+    results: Iterable[Dict[str, Any]],
+    prompt_text: Optional[str] = None,
+    progress_callback: Optional[ProgressCallback] = None,
+    total: Optional[int] = None
+) -> int:
+    """Записать результаты в JSON по одной записи.
+
+    Структура файла совпадает с json.dump(..., indent=2) словаря
+    {'prompt', 'export_date', 'results'}; ключ 'prompt' пишется,
+    только если передан текст промта.
+    """
+    f.write('{\n')
+    if prompt_text is not None:
+        f.write(f'  "prompt": {json.dumps(prompt_text, ensure_ascii=False)},\n')
+    f.write(f'  "export_date": {json.dumps(_export_date())},\n')
+    f.write('  "results": [')
+
+    count = 0
+    for count, result in enumerate(results, 1):
+        item = json.dumps(result, ensure_ascii=False, indent=2)
+        f.write(',\n' if count > 1 else '\n')
+        f.write('\n'.join('    ' + line for line in item.split('\n')))
+        _report(progress_callback, count, total)
+
+    f.write('\n  ]\n}' if count else ']\n}')
+    _report(progress_callback, count, total, force=True)
+    return count
+
+
+def write_jsonl(
+    f: IO[str],
+    results: Iterable[Dict[str, Any]],
+    progress_callback: Optional[ProgressCallback] = None,
+    total: Optional[int] = None
+) -> int:
+    """Записать результаты в JSON Lines (одна запись на строку)."""
+    count = 0
+    for count, result in enumerate(results, 1):
+        f.write(json.dumps(result, ensure_ascii=False))
+        f.write('\n')
+        _report(progress_callback, count, total)
+
+    _report(progress_callback, count, total, force=True)
+    return count
+
+
+def write_csv(
+    f: IO[str],
+    results: Iterable[Dict[str, Any]],
+    progress_callback: Optional[ProgressCallback] = None,
+    total: Optional[int] = None
+) -> int:
+    """Записать результаты в CSV с колонками CSV_FIELDS."""
+    writer = csv.DictWriter(f, fieldnames=CSV_FIELDS, extrasaction='ignore')
+    writer.writeheader()
+
+    count = 0
+    for count, result in enumerate(results, 1):
+        writer.writerow(result)
+        _report(progress_callback, count, total)
+
+    _report(progress_callback, count, total, force=True)
+    return count
+
 
-    if not filename:
-        return False
+# Форматы выгрузки: расширение -> функция записи
+FORMATS = {
+    'md': write_markdown,
+    'json': write_json,
+    'jsonl': write_jsonl,
+    'csv': write_csv,
+}
 
+# Форматы, в которые записывается текст промта в заголовке документа
+_PROMPT_FORMATS = {'md', 'json'}
+
+# Колоночные форматы (требуют pyarrow): Parquet и Arrow IPC
+COLUMNAR_FORMATS = {'parquet', 'arrow'}
+
+# Число строк в одной группе строк Parquet / record batch Arrow
+ROW_GROUP_SIZE = 10000
+
+# Сжатие колонок Parquet
+PARQUET_COMPRESSION = 'zstd'
+
+
+def detect_format(filename: Union[str, Path]) -> str:
+    """Определить формат экспорта по расширению файла."""
+    return Path(filename).suffix.lstrip('.').lower()
+
+
+@contextmanager
+def _open_target(target: ExportTarget) -> Iterator[IO[str]]:
+    """Открыть файл по пути или использовать переданный поток как есть."""
+    if isinstance(target, (str, Path)):
+        # newline='' нужен модулю csv, для остальных форматов не мешает
+        with open(target, 'w', encoding='utf-8', newline='') as f:
+            yield f
+    else:
+        yield target
+
+
+def export_results(
+    target: ExportTarget,
+    results: Iterable[Dict[str, Any]],
+    fmt: Optional[str] = None,
+    prompt_text: Optional[str] = None,
+    progress_callback: Optional[ProgressCallback] = None,
+    total: Optional[int] = None
+) -> Dict[str, Any]:
+    """Экспортировать результаты в файл или поток.
+
+    Формат определяется по расширению файла, если не задан явно.
+    Возвращает статистику: формат, путь, число записей, размер и время.
+    При отмене (ExportCancelled) или ошибке недописанный файл удаляется.
+    """
+    is_path = isinstance(target, (str, Path))
+    if fmt is None and is_path:
+        fmt = detect_format(target)
+    fmt = (fmt or '').lower()
+    if fmt not in FORMATS:
+        raise ValueError(f'Неподдерживаемый формат экспорта: {fmt}')
+
+    writer = FORMATS[fmt]
+    kwargs: Dict[str, Any] = {
+        'progress_callback': progress_callback,
+        'total': total
+    }
+    if fmt in _PROMPT_FORMATS:
+        kwargs['prompt_text'] = prompt_text
+
+    start_time = time.perf_counter()
     try:
-        content = f"# Результаты сравнения моделей\n\n"
-        content += f"**Промт:** {prompt_text}\n\n"
-        content += f"**Дата экспорта:** {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n"
-        content += "---\n\n"
-
-        for i, result in enumerate(results, 1):
-            model_name = result.get('model_name', 'Неизвестная модель')
-            response_text = result.get('response_text', '')
-            created_at = result.get('created_at', '')
-
-            content += f"## {i}. {model_name}\n\n"
-            if created_at:
-                content += f"*Дата: {created_at}*\n\n"
-            content += f"{response_text}\n\n"
-            content += "---\n\n"
-
-        with open(filename, 'w', encoding='utf-8') as f:
-            f.write(content)
-
-        QMessageBox.information(
-            parent,
-            'Успех',
-            f'Результаты экспортированы в:\n{filename}'
-        )
-        return True
+        with _open_target(target) as f:
+            count = writer(f, results, **kwargs)
+    except BaseException:
+        # Отмена или ошибка: недописанный файл не оставляем
+        if is_path:
+            Path(target).unlink(missing_ok=True)
+        raise
+
+    return {
+        'format': fmt,
+        'path': str(target) if is_path else None,
+        'count': count,
+        'bytes': Path(target).stat().st_size if is_path else None,
+        'elapsed': time.perf_counter() - start_time
+    }
+
 
-    except Exception as e:
-        QMessageBox.critical(
-            parent,
-            'Ошибка',
-            f'Ошибка при экспорте:\n{str(e)}'
+def _arrow_schema(pa):
+    """Схема таблицы результатов для Parquet/Arrow."""
+    return pa.schema([
+        ('id', pa.int64()),
+        ('created_at', pa.timestamp('s')),
+        ('prompt_id', pa.int64()),
+        ('prompt', pa.string()),
+        ('model_id', pa.int64()),
+        ('model_name', pa.string()),
+        ('response_text', pa.large_string()),
+        ('tokens_used', pa.int64()),
+        ('response_time', pa.float64()),
+    ])
+
+
+def _parse_timestamp(value: Optional[str]) -> Optional[datetime]:
+    """Преобразовать дату SQLite в datetime."""
+    return datetime.fromisoformat(value) if value else None
+
+
+def export_results_columnar(
+    filename: Union[str, Path],
+    fmt: Optional[str] = None,
+    prompt_id: Optional[int] = None,
+    model_id: Optional[int] = None,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    progress_callback: Optional[ProgressCallback] = None,
+    row_group_size: int = ROW_GROUP_SIZE,
+    include_archive: bool = True
+) -> Dict[str, Any]:
+    """Выгрузить историю результатов в Parquet или Arrow IPC.
+
+    Каждая пачка строк из курсора SQLite записывается отдельной
+    группой строк (record batch), так что таблица целиком в памяти
+    не собирается. При отмене или ошибке недописанный файл удаляется.
+    Требуется пакет pyarrow.
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError(
+            'Для экспорта в Parquet/Arrow установите пакет pyarrow:\n'
+            'pip install pyarrow'
         )
-        return False
-
-
-def export_to_json(
-    results: List[Dict[str, Any]],
-    prompt_text: str,
-    parent=None
-) -> bool:
-    """Экспортировать результаты в JSON формат."""
-    filename, _ = QFileDialog.getSaveFileName(
-        parent,
-        'Сохранить как JSON',
-        f'results_{datetime.now().strftime("%Y%m%d_%H%M%S")}.json',
-        'JSON Files (*.json);;All Files (*)'
+
+    fmt = (fmt or detect_format(filename)).lower()
+    if fmt not in COLUMNAR_FORMATS:
+        raise ValueError(f'Неподдерживаемый формат экспорта: {fmt}')
+
+    schema = _arrow_schema(pa)
+    total = db.count_results(
+        prompt_id, model_id, date_from, date_to, include_archive
     )
+    start_time = time.perf_counter()
 
-    if not filename:
-        return False
+    if fmt == 'parquet':
+        writer = pq.ParquetWriter(
+            str(filename), schema, compression=PARQUET_COMPRESSION
+        )
+    else:
+        writer = pa.ipc.new_file(str(filename), schema)
 
+    count = 0
     try:
-        data = {
-            'prompt': prompt_text,
-            'export_date': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-            'results': results
-        }
-
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
-
-        QMessageBox.information(
-            parent,
-            'Успех',
-            f'Результаты экспортированы в:\n{filename}'
+        for batch in db.iter_result_batches(
+            prompt_id, model_id, date_from, date_to, row_group_size,
+            include_archive
+        ):
+            for result in batch:
+                result['created_at'] = _parse_timestamp(result['created_at'])
+            writer.write_batch(
+                pa.RecordBatch.from_pylist(batch, schema=schema)
+            )
+            count += len(batch)
+            if progress_callback:
+                progress_callback(count, total)
+    except BaseException:
+        # Отмена или ошибка: недописанный файл не оставляем
+        try:
+            writer.close()
+        finally:
+            Path(filename).unlink(missing_ok=True)
+        raise
+    writer.close()
+
+    return {
+        'format': fmt,
+        'path': str(filename),
+        'count': count,
+        'bytes': Path(filename).stat().st_size,
+        'elapsed': time.perf_counter() - start_time
+    }
+
+
+def export_results_history(
+    target: ExportTarget,
+    fmt: Optional[str] = None,
+    prompt_id: Optional[int] = None,
+    model_id: Optional[int] = None,
+    progress_callback: Optional[ProgressCallback] = None,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    include_archive: bool = True
+) -> Dict[str, Any]:
+    """Выгрузить историю результатов из БД потоково (вместе с архивом)."""
+    if fmt is None and isinstance(target, (str, Path)):
+        fmt = detect_format(target)
+
+    if fmt in COLUMNAR_FORMATS:
+        return export_results_columnar(
+            target, fmt, prompt_id, model_id, date_from, date_to,
+            progress_callback, include_archive=include_archive
         )
-        return True
 
-    except Exception as e:
-        QMessageBox.critical(
-            parent,
-            'Ошибка',
-            f'Ошибка при экспорте:\n{str(e)}'
+    return export_results(
+        target,
+        db.iter_results(
+            prompt_id, model_id, date_from, date_to,
+            include_archive=include_archive
+        ),
+        fmt,
+        progress_callback=progress_callback,
+        total=db.count_results(
+            prompt_id, model_id, date_from, date_to, include_archive
         )
-        return False
+    )
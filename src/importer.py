@@ -0,0 +1,241 @@
+"""Модуль для массового импорта промтов и результатов.
+
+Поддерживаются JSONL и CSV (по записи на строку) и JSON в формате
+экспорта ChatList. Запись с полями model_name и response_text
+импортируется как результат, запись только с prompt - как промт.
+"""
+
+import csv
+import json
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Union
+
+from src import db, db_writer
+
+
+# Обратный вызов прогресса: (прочитано записей, всего записей или None)
+ProgressCallback = Callable[[int, Optional[int]], None]
+
+# Поддерживаемые форматы файлов
+FORMATS = ('jsonl', 'csv', 'json')
+
+# Количество записей, записываемых в БД одной транзакцией
+IMPORT_BATCH_SIZE = 20000
+# Через сколько прочитанных записей сообщать о прогрессе (и проверять отмену)
+PROGRESS_INTERVAL = 500
+
+# Сколько сообщений об ошибках сохраняется в статистике
+MAX_ERRORS = 20
+
+
+class ImportCancelled(Exception):
+    """Импорт прерван обратным вызовом прогресса."""
+
+
+def _read_jsonl(path: Path) -> Iterator[Dict[str, Any]]:
+    """Прочитать JSONL построчно."""
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as e:
+                # Ошибка разбора учитывается как некорректная запись
+                yield ValueError(f'некорректный JSON ({e})')
+
+
+def _read_csv(path: Path) -> Iterator[Dict[str, Any]]:
+    """Прочитать CSV с заголовком (колонки как в экспорте CSV)."""
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        yield from csv.DictReader(f)
+
+
+def _read_json(path: Path) -> Iterator[Dict[str, Any]]:
+    """Прочитать JSON-экспорт ChatList или список записей.
+
+    JSON разбирается целиком: стандартная библиотека не умеет читать его
+    потоково, для больших объёмов следует использовать JSONL.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    if isinstance(data, dict):
+        # Экспорт одного запроса: текст промта вынесен в заголовок
+        prompt_text = data.get('prompt')
+        for item in data.get('results', []):
+            if isinstance(item, dict) and not item.get('prompt'):
+                item = dict(item, prompt=prompt_text)
+            yield item
+    elif isinstance(data, list):
+        yield from data
+    else:
+        raise ValueError('Ожидается объект экспорта ChatList или список')
+
+
+_READERS = {
+    'jsonl': _read_jsonl,
+    'csv': _read_csv,
+    'json': _read_json,
+}
+
+
+def read_records(
+    filename: Union[str, Path],
+    fmt: Optional[str] = None
+) -> Iterator[Dict[str, Any]]:
+    """Прочитать записи из файла; формат определяется по расширению."""
+    path = Path(filename)
+    fmt = (fmt or path.suffix.lstrip('.')).lower()
+    if fmt not in _READERS:
+        raise ValueError(f'Неподдерживаемый формат импорта: {fmt}')
+    return _READERS[fmt](path)
+
+
+def _optional_number(value: Any, cast: Callable[[Any], Any]) -> Any:
+    """Преобразовать необязательное числовое поле (пустое - None)."""
+    if value is None or value == '':
+        return None
+    return cast(value)
+
+
+def _optional_date(value: Any, field: str) -> Optional[str]:
+    """Привести дату ISO 8601 к формату БД (пустое - None).
+
+    Даты в БД сравниваются как строки (архивирование, фильтры), поэтому
+    другой формат нарушил бы порядок; дата с часовым поясом переводится
+    в местное время, как у дат, записанных приложением.
+    """
+    if value is None or value == '':
+        return None
+    try:
+        date = datetime.fromisoformat(str(value).strip())
+    except ValueError:
+        raise ValueError(f'некорректная дата в поле {field}: {value!r}')
+    if date.tzinfo is not None:
+        date = date.astimezone().replace(tzinfo=None)
+    return date.strftime('%Y-%m-%d %H:%M:%S')
+
+
+def validate_record(record: Any) -> Dict[str, Any]:
+    """Проверить и нормализовать запись импорта.
+
+    Возвращает словарь с ключом 'kind' ('prompt' или 'result').
+    При некорректной записи выбрасывает ValueError.
+    """
+    if not isinstance(record, dict):
+        raise ValueError('запись должна быть объектом')
+
+    prompt = record.get('prompt')
+    if not isinstance(prompt, str) or not prompt.strip():
+        raise ValueError('пустое или отсутствующее поле prompt')
+
+    tags = record.get('tags')
+    if isinstance(tags, list):
+        tags = json.dumps(tags, ensure_ascii=False)
+
+    response_text = record.get('response_text')
+    model_name = record.get('model_name')
+
+    if response_text is None and not model_name:
+        date_field = 'date' if record.get('date') else 'created_at'
+        return {
+            'kind': 'prompt',
+            'prompt': prompt.strip(),
+            'tags': tags or None,
+            'date': _optional_date(record.get(date_field), date_field)
+        }
+
+    if not isinstance(response_text, str) or not response_text:
+        raise ValueError('пустое поле response_text')
+    if not isinstance(model_name, str) or not model_name.strip():
+        raise ValueError('пустое поле model_name')
+
+    try:
+        tokens_used = _optional_number(record.get('tokens_used'), int)
+        response_time = _optional_number(record.get('response_time'), float)
+    except (TypeError, ValueError):
+        raise ValueError('некорректное значение tokens_used/response_time')
+
+    return {
+        'kind': 'result',
+        'prompt': prompt.strip(),
+        'tags': tags or None,
+        'model_name': model_name.strip(),
+        'response_text': response_text,
+        'created_at': _optional_date(record.get('created_at'), 'created_at'),
+        'tokens_used': tokens_used,
+        'response_time': response_time
+    }
+
+
+def import_file(
+    filename: Union[str, Path],
+    fmt: Optional[str] = None,
+    batch_size: int = IMPORT_BATCH_SIZE,
+    progress_callback: Optional[ProgressCallback] = None
+) -> Dict[str, Any]:
+    """Импортировать промты и результаты из файла.
+
+    Записи читаются потоково и пишутся в БД пачками по batch_size,
+    каждая пачка - одной транзакцией. Некорректные записи пропускаются.
+    progress_callback вызывается каждые PROGRESS_INTERVAL записей;
+    при отмене уже записанные пачки остаются в БД.
+    Возвращает статистику импорта.
+    """
+    stats: Dict[str, Any] = {
+        'path': str(filename),
+        'read': 0,
+        'skipped': 0,
+        'prompts': 0,
+        'results': 0,
+        'models': 0,
+        'errors': []
+    }
+    prompts: List[Dict[str, Any]] = []
+    results: List[Dict[str, Any]] = []
+    start_time = time.perf_counter()
+
+    def flush():
+        if not prompts and not results:
+            return
+        # Пачка пишется потоком записи БД одной операцией
+        added = db_writer.get_writer().submit(
+            db.bulk_import, prompts, results
+        ).result()
+        for key, value in added.items():
+            stats[key] += value
+        prompts.clear()
+        results.clear()
+
+    for record in read_records(filename, fmt):
+        stats['read'] += 1
+        if progress_callback and stats['read'] % PROGRESS_INTERVAL == 0:
+            progress_callback(stats['read'], None)
+        try:
+            if isinstance(record, Exception):
+                raise record
+            item = validate_record(record)
+        except ValueError as e:
+            stats['skipped'] += 1
+            if len(stats['errors']) < MAX_ERRORS:
+                stats['errors'].append(f'Запись {stats["read"]}: {e}')
+            continue
+
+        if item.pop('kind') == 'result':
+            results.append(item)
+        else:
+            prompts.append(item)
+
+        if len(prompts) + len(results) >= batch_size:
+            flush()
+
+    flush()
+    if progress_callback:
+        progress_callback(stats['read'], stats['read'])
+
+    stats['elapsed'] = time.perf_counter() - start_time
+    return stats
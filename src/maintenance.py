@@ -0,0 +1,326 @@
+"""Фоновое обслуживание базы данных: сжатие, VACUUM, ANALYZE и optimize.
+
+Обслуживание выполняется в отдельном потоке небольшими шагами, каждый
+в своей короткой транзакции, с паузами между шагами, чтобы запись
+из интерфейса и пакетных запросов не ждала освобождения БД. Полный
+VACUUM (перевод БД в режим auto_vacuum=INCREMENTAL) блокирует БД
+на всё время перезаписи файла, поэтому выполняется только при запуске
+приложения, до открытия БД интерфейсом и потоком записи. Изменения
+данных (обучение словаря и сжатие старых ответов) выполняются через
+поток записи БД.
+"""
+
+import logging
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from src import db, db_writer
+
+
+logger = logging.getLogger(__name__)
+
+# Задержка перед первым обслуживанием после запуска (секунды)
+MAINTENANCE_START_DELAY = 60
+# Интервал между запусками обслуживания (секунды)
+MAINTENANCE_INTERVAL = 30 * 60
+# Время работы одного запуска (секунды)
+MAINTENANCE_BUDGET = 2.0
+# Количество страниц, освобождаемых одним шагом incremental_vacuum
+VACUUM_PAGES_PER_STEP = 256
+# Пауза между шагами, чтобы дать записать другим соединениям (секунды)
+STEP_PAUSE = 0.05
+# Число строк, просматриваемых ANALYZE на индекс (PRAGMA analysis_limit)
+ANALYSIS_LIMIT = 1000
+# Версия SQLite, с которой PRAGMA optimize=0x10002 проверяет все таблицы;
+# раньше optimize учитывал только таблицы, запрошенные тем же соединением
+OPTIMIZE_ALL_TABLES_VERSION = (3, 46, 0)
+# Максимальный размер БД, при котором режим auto_vacuum включается
+# автоматически при запуске (нужен полный VACUUM с перезаписью файла)
+AUTO_VACUUM_CONVERT_MAX_SIZE = 8 * 1024 * 1024
+# Минимальное количество результатов для обучения словаря сжатия
+DICT_TRAIN_MIN_RESULTS = 100
+# Количество ответов, сжимаемых одной операцией потока записи
+COMPRESS_BATCH_SIZE = 500
+# Время ожидания блокировки БД соединением обслуживания (мс)
+BUSY_TIMEOUT_MS = 200
+
+# Значение PRAGMA auto_vacuum для режима INCREMENTAL
+AUTO_VACUUM_INCREMENTAL = 2
+
+
+def _pragma(conn: sqlite3.Connection, name: str) -> Any:
+    """Прочитать значение PRAGMA."""
+    return conn.execute(f'PRAGMA {name}').fetchone()[0]
+
+
+def _file_size(conn: sqlite3.Connection) -> int:
+    """Размер файла БД в байтах по числу страниц."""
+    return _pragma(conn, 'page_count') * _pragma(conn, 'page_size')
+
+
+def enable_incremental_vacuum(conn: sqlite3.Connection) -> bool:
+    """Перевести БД в режим auto_vacuum=INCREMENTAL.
+
+    Для существующей БД режим вступает в силу только после полного
+    VACUUM, поэтому перевод выполняется лишь для небольших файлов
+    и только пока БД не используется другими соединениями.
+    Возвращает True, если режим включён.
+    """
+    if _pragma(conn, 'auto_vacuum') == AUTO_VACUUM_INCREMENTAL:
+        return True
+
+    size = _file_size(conn)
+    if size > AUTO_VACUUM_CONVERT_MAX_SIZE:
+        logger.info(
+            f'БД занимает {size // (1024 * 1024)} МБ - режим '
+            'auto_vacuum=INCREMENTAL нужно включить вручную '
+            '(PRAGMA auto_vacuum=INCREMENTAL; VACUUM)'
+        )
+        return False
+
+    conn.execute(f'PRAGMA auto_vacuum = {AUTO_VACUUM_INCREMENTAL}')
+    conn.execute('VACUUM')
+    return _pragma(conn, 'auto_vacuum') == AUTO_VACUUM_INCREMENTAL
+
+
+def prepare_database() -> bool:
+    """Включить режим incremental vacuum при запуске приложения.
+
+    Вызывается до запуска интерфейса и потока записи, пока полный
+    VACUUM никого не блокирует. Возвращает True, если режим включён.
+    """
+    conn = sqlite3.connect(db.DB_PATH, isolation_level=None)
+    try:
+        return enable_incremental_vacuum(conn)
+    except sqlite3.Error as e:
+        logger.warning(f'Не удалось включить incremental vacuum: {e}')
+        return False
+    finally:
+        conn.close()
+
+
+def incremental_vacuum(
+    conn: sqlite3.Connection,
+    deadline: float,
+    stop_event: Optional[threading.Event] = None
+) -> int:
+    """Освободить пустые страницы небольшими шагами до deadline.
+
+    Возвращает количество освобождённых страниц.
+    """
+    freed = 0
+    while time.monotonic() < deadline:
+        if stop_event is not None and stop_event.is_set():
+            break
+        free_pages = _pragma(conn, 'freelist_count')
+        if not free_pages:
+            break
+
+        step = min(free_pages, VACUUM_PAGES_PER_STEP)
+        try:
+            # executescript выполняет PRAGMA до конца; execute() освободил
+            # бы только одну страницу
+            conn.executescript(f'PRAGMA incremental_vacuum({step})')
+        except sqlite3.OperationalError as e:
+            # БД занята другим соединением - продолжим в следующий раз
+            logger.debug(f'incremental_vacuum отложен: {e}')
+            break
+        freed += free_pages - _pragma(conn, 'freelist_count')
+        time.sleep(STEP_PAUSE)
+    return freed
+
+
+def compress_results(
+    conn: sqlite3.Connection,
+    deadline: float,
+    stop_event: Optional[threading.Event] = None,
+    after_id: int = 0
+) -> Dict[str, Any]:
+    """Обучить словарь сжатия и сжать старые несжатые ответы до deadline.
+
+    Словарь обучается один раз, когда накопится DICT_TRAIN_MIN_RESULTS
+    результатов. Несжатые ответы с id больше after_id сжимаются пачками
+    через поток записи. Возвращает признак обучения словаря, количество
+    сжатых ответов и id, с которого продолжить в следующий раз.
+    """
+    report = {'trained': False, 'compressed': 0, 'last_id': after_id}
+    if db.RESPONSE_CODEC is None:
+        return report
+    writer = db_writer.get_writer()
+
+    has_dict = conn.execute(
+        'SELECT 1 FROM compression_dicts LIMIT 1'
+    ).fetchone() is not None
+    if not has_dict:
+        results = conn.execute(
+            'SELECT COUNT(*) FROM (SELECT 1 FROM results LIMIT ?)',
+            (DICT_TRAIN_MIN_RESULTS,)
+        ).fetchone()[0]
+        if results >= DICT_TRAIN_MIN_RESULTS:
+            dict_id = writer.submit(db.train_compression_dictionary).result()
+            report['trained'] = dict_id is not None
+
+    while time.monotonic() < deadline:
+        if stop_event is not None and stop_event.is_set():
+            break
+        batch = writer.submit(
+            db.compress_stored_results_batch,
+            report['last_id'],
+            COMPRESS_BATCH_SIZE
+        ).result()
+        if not batch['scanned']:
+            break
+        report['compressed'] += batch['compressed']
+        report['last_id'] = batch['last_id']
+        time.sleep(STEP_PAUSE)
+    return report
+
+
+def optimize(conn: sqlite3.Connection) -> bool:
+    """Обновить статистику планировщика.
+
+    Если статистика уже есть и SQLite не старше 3.46, выполняется
+    PRAGMA optimize=0x10002, который анализирует только изменившиеся
+    таблицы. Иначе - ANALYZE, ограниченный analysis_limit: в старых
+    версиях optimize на новом соединении обслуживания ничего не делает.
+    Возвращает True, если выполнялся ANALYZE.
+    """
+    conn.execute(f'PRAGMA analysis_limit = {ANALYSIS_LIMIT}')
+    has_stats = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'"
+    ).fetchone() is not None
+
+    if has_stats and (
+        sqlite3.sqlite_version_info >= OPTIMIZE_ALL_TABLES_VERSION
+    ):
+        conn.execute('PRAGMA optimize=0x10002')
+        return False
+
+    conn.execute('ANALYZE')
+    return True
+
+
+def run_maintenance(
+    budget: float = MAINTENANCE_BUDGET,
+    stop_event: Optional[threading.Event] = None,
+    compress_after_id: int = 0
+) -> Dict[str, Any]:
+    """Выполнить один проход обслуживания БД.
+
+    compress_after_id - id, с которого продолжить сжатие старых ответов
+    (compress_last_id отчёта предыдущего прохода). Возвращает отчёт:
+    освобождённое место, размер до и после, признак режима incremental
+    vacuum, результаты сжатия и время выполнения.
+    """
+    start_time = time.monotonic()
+    deadline = start_time + budget
+
+    # Автокоммит: каждая PRAGMA выполняется в своей короткой транзакции
+    conn = sqlite3.connect(db.DB_PATH, isolation_level=None)
+    try:
+        conn.execute(f'PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}')
+        size_before = _file_size(conn)
+        page_size = _pragma(conn, 'page_size')
+
+        # Полный VACUUM здесь недопустим - режим включается при запуске
+        incremental = (
+            _pragma(conn, 'auto_vacuum') == AUTO_VACUUM_INCREMENTAL
+        )
+        freed_pages = 0
+        if incremental:
+            freed_pages = incremental_vacuum(conn, deadline, stop_event)
+
+        # Сжатые ответы освобождают страницы для следующего прохода
+        compression = compress_results(
+            conn, deadline, stop_event, compress_after_id
+        )
+
+        analyzed = False
+        if stop_event is None or not stop_event.is_set():
+            analyzed = optimize(conn)
+
+        size_after = _file_size(conn)
+    finally:
+        conn.close()
+
+    report = {
+        'size_before': size_before,
+        'size_after': size_after,
+        'reclaimed_bytes': max(size_before - size_after, 0),
+        'freed_pages': freed_pages,
+        'page_size': page_size,
+        'incremental_vacuum': incremental,
+        'dictionary_trained': compression['trained'],
+        'compressed': compression['compressed'],
+        'compress_last_id': compression['last_id'],
+        'analyzed': analyzed,
+        'elapsed': time.monotonic() - start_time
+    }
+    logger.info(
+        f'Обслуживание БД: освобождено {report["reclaimed_bytes"]} байт, '
+        f'сжато ответов {report["compressed"]}, '
+        f'размер {size_after} байт, {report["elapsed"]:.2f} с'
+    )
+    return report
+
+
+class MaintenanceService:
+    """Периодическое обслуживание БД в фоновом потоке.
+
+    Первый проход выполняется через start_delay секунд после запуска,
+    далее - каждые interval секунд. Обратный вызов on_report получает
+    отчёт каждого прохода и вызывается в потоке обслуживания.
+    """
+
+    def __init__(
+        self,
+        interval: float = MAINTENANCE_INTERVAL,
+        start_delay: float = MAINTENANCE_START_DELAY,
+        budget: float = MAINTENANCE_BUDGET,
+        on_report: Optional[Callable[[Dict[str, Any]], None]] = None
+    ):
+        """Инициализация сервиса."""
+        self.interval = interval
+        self.start_delay = start_delay
+        self.budget = budget
+        self.on_report = on_report
+        self.last_report: Optional[Dict[str, Any]] = None
+        # Позиция сжатия старых ответов между проходами
+        self._compress_after_id = 0
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Запустить поток обслуживания."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+            target=self._run, name='db-maintenance', daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Остановить поток обслуживания (текущий шаг будет завершён)."""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self) -> None:
+        """Цикл обслуживания."""
+        delay = self.start_delay
+        while not self._stop_event.wait(delay):
+            try:
+                self.last_report = run_maintenance(
+                    self.budget, self._stop_event, self._compress_after_id
+                )
+                self._compress_after_id = self.last_report['compress_last_id']
+                if self.on_report:
+                    self.on_report(self.last_report)
+            except (sqlite3.Error, RuntimeError) as e:
+                # RuntimeError - поток записи БД уже остановлен
+                logger.warning(f'Ошибка обслуживания БД: {e}')
+            delay = self.interval
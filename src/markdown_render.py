@@ -0,0 +1,229 @@
+"""Модуль для преобразования markdown-ответов в HTML вне GUI-потока."""
+
+import logging
+import threading
+from collections import OrderedDict
+from typing import Optional, Set
+
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+from src import db, db_writer
+
+
+logger = logging.getLogger(__name__)
+
+MARKDOWN_EXTENSIONS = ['fenced_code', 'tables', 'nl2br']
+
+# Количество готовых HTML-документов, хранимых в памяти
+DEFAULT_CACHE_SIZE = 64
+# Количество HTML-документов, сохраняемых в БД при включённом сохранении
+PERSISTENT_CACHE_SIZE = 500
+
+
+def render_markdown(text: str) -> str:
+    """Преобразовать markdown в HTML-документ с базовыми стилями."""
+    # Импорт по требованию: библиотека не нужна для запуска окна
+    import markdown
+
+    html_content = markdown.markdown(text, extensions=MARKDOWN_EXTENSIONS)
+    return f'''
+    <html>
+    <head>
+        <style>
+            body {{
+                font-family: Arial, sans-serif;
+                line-height: 1.6;
+                padding: 10px;
+            }}
+            code {{
+                background-color: #f4f4f4;
+                padding: 2px 4px;
+                border-radius: 3px;
+                font-family: "Courier New", monospace;
+            }}
+            pre {{
+                background-color: #f4f4f4;
+                padding: 10px;
+                border-radius: 5px;
+                overflow-x: auto;
+            }}
+            pre code {{
+                background-color: transparent;
+                padding: 0;
+            }}
+            table {{
+                border-collapse: collapse;
+                width: 100%;
+                margin: 10px 0;
+            }}
+            th, td {{
+                border: 1px solid #ddd;
+                padding: 8px;
+                text-align: left;
+            }}
+            th {{
+                background-color: #f2f2f2;
+                font-weight: bold;
+            }}
+            h1, h2, h3, h4, h5, h6 {{
+                margin-top: 20px;
+                margin-bottom: 10px;
+            }}
+        </style>
+    </head>
+    <body>
+        {html_content}
+    </body>
+    </html>
+    '''
+
+
+class RenderCache:
+    """LRU-кэш готового HTML по хэшу содержимого ответа."""
+
+    def __init__(
+        self,
+        max_entries: int = DEFAULT_CACHE_SIZE,
+        persist: bool = False
+    ):
+        """Инициализация кэша."""
+        self.max_entries = max_entries
+        self.persist = persist
+        self._items: 'OrderedDict[str, str]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        """Получить HTML из памяти (без обращения к БД)."""
+        with self._lock:
+            html = self._items.get(key)
+            if html is not None:
+                self._items.move_to_end(key)
+            return html
+
+    def load(self, key: str) -> Optional[str]:
+        """Получить HTML из памяти, затем из БД (не для GUI-потока)."""
+        html = self.get(key)
+        if html is None and self.persist:
+            html = db.get_rendered_html(key)
+            if html is not None:
+                self._store(key, html)
+        return html
+
+    def put(self, key: str, html: str) -> None:
+        """Поместить HTML в кэш."""
+        self._store(key, html)
+        if self.persist:
+            # Запись в БД - в потоке записи, без ожидания
+            db_writer.get_writer().submit(
+                db.save_rendered_html, key, html, PERSISTENT_CACHE_SIZE
+            )
+
+    def _store(self, key: str, html: str) -> None:
+        """Сохранить HTML в памяти с вытеснением самых старых записей."""
+        with self._lock:
+            self._items[key] = html
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_entries:
+                self._items.popitem(last=False)
+
+
+class _RenderTask(QRunnable):
+    """Задача рендеринга для пула потоков."""
+
+    def __init__(
+        self,
+        service: 'MarkdownRenderService',
+        key: str,
+        text: str
+    ):
+        """Инициализация задачи."""
+        super().__init__()
+        self.service = service
+        self.key = key
+        self.text = text
+
+    def run(self):
+        """Выполнение рендеринга."""
+        self.service._render_task(self.key, self.text)
+
+
+class MarkdownRenderService(QObject):
+    """Сервис рендеринга markdown в фоновом потоке с кэшированием.
+
+    Сигналы испускаются из рабочего потока и доставляются получателям
+    в GUI-потоке через очередь событий Qt.
+    """
+
+    rendered = pyqtSignal(str, str)
+    failed = pyqtSignal(str, str)
+
+    def __init__(
+        self,
+        parent: Optional[QObject] = None,
+        max_entries: int = DEFAULT_CACHE_SIZE,
+        persist: bool = False
+    ):
+        """Инициализация сервиса."""
+        super().__init__(parent)
+        self.cache = RenderCache(max_entries, persist)
+        self._pending: Set[str] = set()
+        self._lock = threading.Lock()
+        self._pool = QThreadPool(self)
+        self._pool.setMaxThreadCount(1)
+
+    @staticmethod
+    def cache_key(text: str) -> str:
+        """Получить ключ кэша для текста ответа."""
+        return db.content_hash(text)
+
+    def get_cached(self, text: str) -> Optional[str]:
+        """Получить готовый HTML из памяти, если ответ уже отрендерен."""
+        return self.cache.get(self.cache_key(text))
+
+    def prefetch(self, text: str) -> str:
+        """Запустить фоновый рендеринг ответа и вернуть его ключ.
+
+        Если HTML уже в памяти или рендерится, повторно задача не ставится.
+        Сохранённый в БД HTML читается в рабочем потоке.
+        """
+        key = self.cache_key(text)
+        with self._lock:
+            if key in self._pending:
+                return key
+            if self.cache.get(key) is not None:
+                return key
+            self._pending.add(key)
+
+        self._pool.start(_RenderTask(self, key, text))
+        return key
+
+    def render(self, text: str) -> str:
+        """Отрендерить ответ синхронно (с использованием кэша)."""
+        key = self.cache_key(text)
+        html = self.cache.load(key)
+        if html is None:
+            html = render_markdown(text)
+            self.cache.put(key, html)
+        return html
+
+    def wait(self) -> None:
+        """Дождаться завершения фоновых задач."""
+        self._pool.waitForDone()
+
+    def _render_task(self, key: str, text: str) -> None:
+        """Отрендерить ответ в рабочем потоке (или загрузить из БД)."""
+        try:
+            html = self.cache.load(key)
+            if html is None:
+                html = render_markdown(text)
+                self.cache.put(key, html)
+        except Exception as e:
+            logger.error(f'Ошибка при рендеринге markdown: {e}')
+            with self._lock:
+                self._pending.discard(key)
+            self.failed.emit(key, str(e))
+            return
+
+        with self._lock:
+            self._pending.discard(key)
+        self.rendered.emit(key, html)
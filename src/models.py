@@ -1,42 +1,77 @@
 """Модуль для работы с моделями нейросетей."""
 
-import os
-from typing import Optional, List, Dict, Any, Tuple
+import json
+import threading
+from typing import Optional, List, Dict, Any, NamedTuple, Tuple
 
-from dotenv import load_dotenv
+from src import db, db_writer
+from src.credentials import get_credentials
 
-from src import db
+# Таймаут запроса к модели по умолчанию, секунды
+DEFAULT_TIMEOUT = 30
 
+# Температура генерации по умолчанию
+DEFAULT_TEMPERATURE = 0.7
 
-# Загружаем переменные окружения
-load_dotenv()
 
+class _ModelFields(NamedTuple):
+    """Поля модели в порядке колонок db.MODEL_COLUMNS."""
 
-class Model:
-    """Класс для представления модели нейросети."""
+    id: int
+    name: str
+    api_url: str
+    api_key_env: str
+    is_active: int
+    model_type: str
+    model_name: Optional[str] = None
+    max_tokens: Optional[int] = None
+    temperature: Optional[float] = None
+    timeout: Optional[float] = None
+    stop_sequences: Tuple[str, ...] = ()
 
-    def __init__(
-        self,
+
+class Model(_ModelFields):
+    """Неизменяемая запись модели нейросети.
+
+    Кортеж без __dict__: занимает меньше памяти, хэшируется (пригоден
+    как ключ кэша) и создаётся прямо из строки курсора. Для изменения
+    полей используется _replace(). Параметры генерации (max_tokens,
+    temperature, timeout, stop_sequences) со значением None или пустые
+    означают значения провайдера по умолчанию.
+    """
+
+    __slots__ = ()
+
+    def __new__(
+        cls,
         id: int,
         name: str,
         api_url: str,
         api_key_env: str,
         is_active: int,
         model_type: str,
-        model_name: Optional[str] = None
+        model_name: Optional[str] = None,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        timeout: Optional[float] = None,
+        stop_sequences: Any = ()
     ):
-        """Инициализация модели."""
-        self.id = id
-        self.name = name
-        self.api_url = api_url
-        self.api_key_env = api_key_env
-        self.is_active = is_active
-        self.model_type = model_type
-        self.model_name = model_name or name.lower().replace(' ', '-')
+        """Создание модели (model_name по умолчанию выводится из name).
+
+        stop_sequences принимается списком или JSON-строкой из БД
+        и хранится кортежем, чтобы модель оставалась хэшируемой.
+        """
+        if isinstance(stop_sequences, str):
+            stop_sequences = json.loads(stop_sequences)
+        return super().__new__(
+            cls, id, name, api_url, api_key_env, is_active, model_type,
+            model_name or name.lower().replace(' ', '-'),
+            max_tokens, temperature, timeout, tuple(stop_sequences or ())
+        )
 
     def get_api_key(self) -> Optional[str]:
-        """Получить API-ключ из переменной окружения."""
-        return os.getenv(self.api_key_env)
+        """Получить API-ключ из переменной окружения (с кэшированием)."""
+        return get_credentials().get_api_key(self.api_key_env)
 
     def validate(self) -> tuple[bool, Optional[str]]:
         """Проверить корректность данных модели."""
@@ -59,15 +94,7 @@ class Model:
 
     def to_dict(self) -> Dict[str, Any]:
         """Преобразовать модель в словарь."""
-        return {
-            'id': self.id,
-            'name': self.name,
-            'api_url': self.api_url,
-            'api_key_env': self.api_key_env,
-            'is_active': self.is_active,
-            'model_type': self.model_type,
-            'model_name': self.model_name
-        }
+        return dict(zip(self._fields, self))
 
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> 'Model':
@@ -79,69 +106,123 @@ class Model:
             api_key_env=data['api_key_env'],
             is_active=data['is_active'],
             model_type=data['model_type'],
-            model_name=data.get('model_name')
+            model_name=data.get('model_name'),
+            max_tokens=data.get('max_tokens'),
+            temperature=data.get('temperature'),
+            timeout=data.get('timeout'),
+            stop_sequences=data.get('stop_sequences')
         )
 
 
+class ModelRegistry:
+    """Кэш моделей в памяти с индексами по ID и названию.
+
+    Перезагружается из БД, только когда изменилась версия таблицы
+    models (см. db.get_models_version).
+    """
+
+    def __init__(self):
+        """Инициализация реестра."""
+        self._version: Optional[int] = None
+        self._models: List[Model] = []
+        self._by_id: Dict[int, Model] = {}
+        self._by_name: Dict[str, Model] = {}
+        self._lock = threading.Lock()
+
+    def _ensure_loaded(self) -> None:
+        """Перезагрузить модели, если данные в БД изменились."""
+        version = db.get_models_version()
+        if version == self._version:
+            return
+
+        with self._lock:
+            if version == self._version:
+                return
+            models = db.get_models(factory=Model)
+            self._by_id = {m.id: m for m in models}
+            self._by_name = {m.name: m for m in models}
+            self._models = models
+            self._version = version
+
+    def invalidate(self) -> None:
+        """Сбросить кэш (например, после изменения БД другим процессом)."""
+        self._version = None
+
+    def all(self) -> List[Model]:
+        """Получить все модели, отсортированные по названию."""
+        self._ensure_loaded()
+        return list(self._models)
+
+    def active(self) -> List[Model]:
+        """Получить активные модели."""
+        self._ensure_loaded()
+        return [m for m in self._models if m.is_active]
+
+    def get(self, model_id: int) -> Optional[Model]:
+        """Получить модель по ID."""
+        self._ensure_loaded()
+        return self._by_id.get(model_id)
+
+    def get_by_name(self, name: str) -> Optional[Model]:
+        """Получить модель по названию."""
+        self._ensure_loaded()
+        return self._by_name.get(name)
+
+
+# Общий реестр моделей приложения
+_registry = ModelRegistry()
+
+
 def load_models() -> List[Model]:
     """Загрузить все модели из базы данных."""
-    models_data = db.get_models()
-    return [Model.from_dict(m) for m in models_data]
+    return _registry.all()
 
 
 def get_active_models() -> List[Model]:
     """Получить список активных моделей."""
-    models_data = db.get_active_models()
-    return [Model.from_dict(m) for m in models_data]
+    return _registry.active()
+
+
+def get_model_by_id(model_id: int) -> Optional[Model]:
+    """Получить модель по ID."""
+    return _registry.get(model_id)
+
+
+def get_model_by_name(name: str) -> Optional[Model]:
+    """Получить модель по названию."""
+    return _registry.get_by_name(name)
+
+
+def invalidate_models_cache() -> None:
+    """Сбросить кэш моделей."""
+    _registry.invalidate()
+
+
+# Модели, добавляемые в новую БД
+DEFAULT_MODELS = [
+    {
+        'name': name,
+        'api_url': 'https://openrouter.ai/api/v1/chat/completions',
+        'api_key_env': 'OPENROUTER_API_KEY',
+        'model_type': 'openrouter',
+        'model_name': name,
+        'is_active': 1
+    }
+    for name in (
+        'qwen/qwen3-coder:free',
+        'deepseek/deepseek-r1-0528:free',
+        'mistralai/devstral-2512:free',
+        'allenai/molmo-2-8b:free',
+    )
+]
+
+# Источник моделей по умолчанию в колонке models.source
+DEFAULT_MODELS_SOURCE = 'default'
 
 
 def add_default_models() -> None:
-    """Добавить модели по умолчанию в базу данных."""
-    default_models = [
-        {
-            'name': 'qwen/qwen3-coder:free',
-            'api_url': 'https://openrouter.ai/api/v1/chat/completions',
-            'api_key_env': 'OPENROUTER_API_KEY',
-            'model_type': 'openrouter',
-            'model_name': 'qwen/qwen3-coder:free',
-            'is_active': 1
-        },
-        {
-            'name': 'deepseek/deepseek-r1-0528:free',
-            'api_url': 'https://openrouter.ai/api/v1/chat/completions',
-            'api_key_env': 'OPENROUTER_API_KEY',
-            'model_type': 'openrouter',
-            'model_name': 'deepseek/deepseek-r1-0528:free',
-            'is_active': 1
-        },
-        {
-            'name': 'mistralai/devstral-2512:free',
-            'api_url': 'https://openrouter.ai/api/v1/chat/completions',
-            'api_key_env': 'OPENROUTER_API_KEY',
-            'model_type': 'openrouter',
-            'model_name': 'mistralai/devstral-2512:free',
-            'is_active': 1
-        },
-        {
-            'name': 'allenai/molmo-2-8b:free',
-            'api_url': 'https://openrouter.ai/api/v1/chat/completions',
-            'api_key_env': 'OPENROUTER_API_KEY',
-            'model_type': 'openrouter',
-            'model_name': 'allenai/molmo-2-8b:free',
-            'is_active': 1
-        }
-    ]
-
-    existing_models = db.get_models()
-    existing_names = {m['name'] for m in existing_models}
-
-    for model_data in default_models:
-        if model_data['name'] not in existing_names:
-            db.create_model(
-                name=model_data['name'],
-                api_url=model_data['api_url'],
-                api_key_env=model_data['api_key_env'],
-                model_type=model_data['model_type'],
-                model_name=model_data['model_name'],
-                is_active=model_data['is_active']
-            )
+    """Добавить недостающие модели по умолчанию одной транзакцией."""
+    db_writer.get_writer().submit(
+        db.sync_models, DEFAULT_MODELS, DEFAULT_MODELS_SOURCE,
+        deactivate_missing=False
+    ).result()
@@ -2,26 +2,29 @@
 
 import json
 import logging
-import os
-import sys
+import socket
+import threading
 import time
 from abc import ABC, abstractmethod
-from typing import Optional, Dict, Any
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import lru_cache
+from typing import Optional, Dict, Any, List, Tuple, Callable, Deque
+from urllib.parse import urlsplit
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
 
-from src.models import Model
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
-# Импорт версии
-_version_path = os.path.join(os.path.dirname(__file__), '..', 'version.py')
-if os.path.exists(_version_path):
-    import importlib.util
-    spec = importlib.util.spec_from_file_location('version', _version_path)
-    version_module = importlib.util.module_from_spec(spec)
-    spec.loader.exec_module(version_module)
-    __version__ = version_module.__version__
-else:
-    __version__ = '1.0.0'  # Fallback
+from src import __version__
+from src.cancellation import CancellationToken, OperationCancelled
+from src.models import DEFAULT_TEMPERATURE, DEFAULT_TIMEOUT, Model
 
 
 # Настройка логирования
@@ -31,269 +34,753 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-DEFAULT_TIMEOUT = 30
+# Настройки OpenAI-совместимых провайдеров. Необязательные ключи:
+# headers - дополнительные заголовки, payload - дополнительные поля
+# запроса, errors - сообщения для кодов ответа HTTP (дополняют
+# DEFAULT_ERRORS). Новый совместимый провайдер добавляется записью здесь.
+PROVIDERS: Dict[str, Dict[str, Any]] = {
+    'openai': {
+        'title': 'OpenAI',
+    },
+    'deepseek': {
+        'title': 'DeepSeek',
+    },
+    'groq': {
+        'title': 'Groq',
+    },
+    'openrouter': {
+        'title': 'OpenRouter',
+        'headers': {
+            'HTTP-Referer': 'https://github.com',  # Для статистики OpenRouter
+            'X-Title': 'ChatList'  # Название приложения
+        },
+        'errors': {
+            402: 'Недостаточно средств на счёте OpenRouter',
+        },
+    },
+}
+
+# Типы моделей, запросы которых идут через другого провайдера
+PROVIDER_ALIASES = {
+    'qwen': 'openrouter',
+    'llama': 'openrouter',
+    'mistral': 'openrouter',
+}
+
+# Провайдер для неизвестных типов моделей
+DEFAULT_PROVIDER = 'openrouter'
+
+# Сообщения об ошибках по кодам ответа HTTP
+DEFAULT_ERRORS = {
+    400: 'Некорректный запрос',
+    401: 'API-ключ недействителен',
+    403: 'Доступ запрещён',
+    404: 'Модель или адрес API не найдены',
+    429: 'Превышен лимит запросов',
+}
+
+# Количество провайдеров (модель и ключ) с готовыми заголовками в кэше
+PROVIDER_CACHE_SIZE = 256
+
+
+CANCELLED_ERROR = 'Запрос отменён'
+TIMEOUT_ERROR = 'Превышено время ожидания ответа'
+
+# Адаптивный лимит параллельных запросов к одному хосту с одним ключом:
+# начальное, минимальное и максимальное значения
+LIMIT_INITIAL = 2
+LIMIT_MIN = 1
+LIMIT_MAX = 16
+# Во сколько раз уменьшается лимит при перегрузке провайдера
+LIMIT_DECREASE_FACTOR = 0.5
+# Задержка здорова, пока не превышает среднюю во столько раз
+LATENCY_TOLERANCE = 2.0
+# Вес нового значения в скользящей средней задержки
+LATENCY_SMOOTHING = 0.2
+# Коды ответа, означающие перегрузку провайдера
+OVERLOAD_STATUSES = (429, 503)
+
+# Исход запроса для адаптивного лимита
+OUTCOME_SUCCESS = 'success'
+OUTCOME_OVERLOAD = 'overload'
+OUTCOME_ERROR = 'error'
+
+# Наибольшее количество потоков общего пула запросов к моделям. Задача
+# получает поток, только заняв место в лимите своего провайдера
+# (AdaptiveLimiter.submit), поэтому занято не больше суммы текущих
+# лимитов; потоки создаются по мере надобности
+REQUEST_WORKERS = 32
+
+# Состояние запросов текущего потока: сессия и токен отмены
+_local = threading.local()
+
+# Общий пул потоков запросов (создаётся при первом обращении)
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _abort_connection(conn: Any) -> None:
+    """Прервать соединение: заблокированное чтение сразу завершится."""
+    sock = getattr(conn, 'sock', None)
+    if sock is not None:
+        try:
+            sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
 
 
-class BaseAPIProvider(ABC):
-    """Базовый класс для провайдеров API."""
+class _CancellableConnectionMixin:
+    """Проверка отмены при установке соединения.
 
-    def __init__(self, model: Model, timeout: int = DEFAULT_TIMEOUT):
-        """Инициализация провайдера."""
-        self.model = model
-        self.timeout = timeout
+    Новое соединение выдаётся пулом без сокета; отмена, пришедшая до его
+    создания, не может его закрыть, поэтому токен проверяется ещё раз
+    после подключения.
+    """
 
-    @abstractmethod
-    def send_request(self, prompt: str) -> Dict[str, Any]:
-        """Отправить запрос к API."""
-        pass
+    def connect(self):
+        """Подключиться, если операция текущего потока не отменена."""
+        token = getattr(_local, 'token', None)
+        if token is not None:
+            token.check()
+        super().connect()
+        if token is not None and token.is_cancelled:
+            self.close()
+            raise OperationCancelled()
 
-    def _make_request(
-        self,
-        url: str,
-        headers: Dict[str, str],
-        data: Dict[str, Any]
-    ) -> Dict[str, Any]:
-        """Выполнить HTTP-запрос с обработкой ошибок."""
-        try:
-            start_time = time.time()
-            response = requests.post(
-                url,
-                headers=headers,
-                json=data,
-                timeout=self.timeout
+
+class _CancellableHTTPConnection(_CancellableConnectionMixin, HTTPConnection):
+    """HTTP-соединение с проверкой отмены при подключении."""
+
+
+class _CancellableHTTPSConnection(
+    _CancellableConnectionMixin, HTTPSConnection
+):
+    """HTTPS-соединение с проверкой отмены при подключении."""
+
+
+class _CancellablePoolMixin:
+    """Регистрация выданных соединений в токене отмены текущего потока."""
+
+    def _get_conn(self, timeout=None):
+        """Выдать соединение и зарегистрировать его закрытие при отмене."""
+        conn = super()._get_conn(timeout)
+        token = getattr(_local, 'token', None)
+        if token is not None:
+            _local.handles.append(
+                token.register(lambda: _abort_connection(conn))
             )
-            response_time = time.time() - start_time
+        return conn
 
-            response.raise_for_status()
-            result = response.json()
 
-            logger.info(
-                f'Запрос к {self.model.name} выполнен за {response_time:.2f}с'
+class _CancellableHTTPConnectionPool(
+    _CancellablePoolMixin, HTTPConnectionPool
+):
+    """Пул HTTP-соединений с поддержкой отмены."""
+
+    ConnectionCls = _CancellableHTTPConnection
+
+
+class _CancellableHTTPSConnectionPool(
+    _CancellablePoolMixin, HTTPSConnectionPool
+):
+    """Пул HTTPS-соединений с поддержкой отмены."""
+
+    ConnectionCls = _CancellableHTTPSConnection
+
+
+class CancellableAdapter(HTTPAdapter):
+    """HTTP-адаптер, соединения которого закрываются при отмене токена."""
+
+    def init_poolmanager(self, *args, **kwargs):
+        """Создать менеджер пулов с отменяемыми пулами соединений."""
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': _CancellableHTTPConnectionPool,
+            'https': _CancellableHTTPSConnectionPool,
+        }
+
+
+def get_session() -> requests.Session:
+    """Получить сессию текущего потока (соединения переиспользуются)."""
+    session = getattr(_local, 'session', None)
+    if session is None:
+        session = requests.Session()
+        adapter = CancellableAdapter()
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        _local.session = session
+    return session
+
+
+def get_request_executor() -> ThreadPoolExecutor:
+    """Получить общий пул потоков запросов к моделям.
+
+    Потоки живут весь сеанс, поэтому их сессии (get_session) и открытые
+    соединения переиспользуются между отправками промтов.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=REQUEST_WORKERS,
+                thread_name_prefix='request'
             )
+        return _executor
 
-            return {
-                'success': True,
-                'data': result,
-                'response_time': response_time
-            }
 
-        except requests.exceptions.Timeout:
-            logger.error(f'Таймаут при запросе к {self.model.name}')
-            return {
-                'success': False,
-                'error': 'Превышено время ожидания ответа'
-            }
+def request(
+    method: str,
+    url: str,
+    token: Optional[CancellationToken] = None,
+    **kwargs: Any
+) -> requests.Response:
+    """HTTP-запрос, прерываемый токеном отмены.
 
-        except requests.exceptions.RequestException as e:
-            logger.error(f'Ошибка при запросе к {self.model.name}: {e}')
-            return {
-                'success': False,
-                'error': str(e)
-            }
+    Таймаут запроса ограничивается оставшимся сроком токена.
+    """
+    if token is None:
+        return get_session().request(method, url, **kwargs)
+
+    remaining = token.remaining()
+    if remaining is not None:
+        kwargs['timeout'] = min(kwargs.get('timeout') or remaining, remaining)
+    token.check()
+
+    _local.token = token
+    _local.handles = []
+    try:
+        return get_session().request(method, url, **kwargs)
+    finally:
+        handles: List[Optional[int]] = _local.handles
+        _local.token = None
+        _local.handles = []
+        for handle in handles:
+            token.unregister(handle)
+
+
+def get(
+    url: str,
+    token: Optional[CancellationToken] = None,
+    **kwargs: Any
+) -> requests.Response:
+    """GET-запрос, прерываемый токеном отмены (см. request)."""
+    return request('GET', url, token, **kwargs)
+
+
+def post(
+    url: str,
+    token: Optional[CancellationToken] = None,
+    **kwargs: Any
+) -> requests.Response:
+    """POST-запрос, прерываемый токеном отмены (см. request)."""
+    return request('POST', url, token, **kwargs)
+
+
+class AdaptiveLimiter:
+    """Адаптивный лимит параллельных запросов (AIMD).
+
+    Пока ответы успешны и задержка не растёт, лимит увеличивается
+    примерно на единицу за каждые limit ответов; ответ 429/503 или
+    таймаут уменьшает его вдвое. Запросы, начатые до последнего
+    уменьшения, лимит повторно не уменьшают - одна волна отказов
+    считается одной перегрузкой.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        initial: int = LIMIT_INITIAL,
+        minimum: int = LIMIT_MIN,
+        maximum: int = LIMIT_MAX
+    ):
+        """Инициализация лимита; name - подпись в логах и метриках."""
+        self.name = name
+        self.minimum = minimum
+        self.maximum = maximum
+        self.in_flight = 0
+        # Скользящая средняя задержки успешных ответов (секунды)
+        self.latency: Optional[float] = None
+        self.successes = 0
+        self.overloads = 0
+        self.errors = 0
+        self._limit = float(initial)
+        self._decreased_at = 0.0
+        self._cond = threading.Condition()
+        # Задачи submit(), ждущие места: (Future, функция, токен)
+        self._pending: Deque[Tuple[
+            Future, Callable[[], Dict[str, Any]], Optional[CancellationToken]
+        ]] = deque()
+
+    @property
+    def limit(self) -> int:
+        """Текущее допустимое количество параллельных запросов."""
+        return int(self._limit)
+
+    def _wake(self) -> None:
+        """Разбудить ожидающие потоки (при отмене токена)."""
+        with self._cond:
+            self._cond.notify_all()
+
+    def acquire(self, token: Optional[CancellationToken] = None) -> float:
+        """Дождаться свободного места и занять его.
+
+        Возвращает время начала запроса для release(). При отмене
+        token ожидание прерывается исключением OperationCancelled.
+        """
+        handle = token.register(self._wake) if token is not None else None
+        try:
+            with self._cond:
+                while self.in_flight >= self.limit:
+                    timeout = None
+                    if token is not None:
+                        token.check()
+                        timeout = token.remaining()
+                    self._cond.wait(timeout)
+                self.in_flight += 1
+                return time.monotonic()
+        finally:
+            if token is not None:
+                token.unregister(handle)
+
+    def release(self, started: float, outcome: Optional[str]) -> None:
+        """Освободить место и скорректировать лимит по исходу запроса.
+
+        outcome - OUTCOME_SUCCESS, OUTCOME_OVERLOAD, OUTCOME_ERROR или
+        None (запрос отменён, лимит не меняется).
+        """
+        now = time.monotonic()
+        with self._cond:
+            previous = self.limit
+            # Лимит растёт, только если он был исчерпан
+            saturated = self.in_flight >= self.limit
+            self.in_flight -= 1
+
+            if outcome == OUTCOME_SUCCESS:
+                self.successes += 1
+                latency = now - started
+                healthy = (
+                    self.latency is None
+                    or latency <= self.latency * LATENCY_TOLERANCE
+                )
+                self.latency = latency if self.latency is None else (
+                    self.latency
+                    + LATENCY_SMOOTHING * (latency - self.latency)
+                )
+                if healthy and saturated:
+                    self._limit = min(
+                        self._limit + 1 / self._limit, self.maximum
+                    )
+            elif outcome == OUTCOME_OVERLOAD:
+                self.overloads += 1
+                if started >= self._decreased_at:
+                    self._limit = max(
+                        self._limit * LIMIT_DECREASE_FACTOR, self.minimum
+                    )
+                    self._decreased_at = now
+            elif outcome == OUTCOME_ERROR:
+                self.errors += 1
+
+            current = self.limit
+            self._cond.notify_all()
+
+        self._dispatch()
+        if current != previous:
+            # Рост лимита - штатная работа, снижение - признак перегрузки
+            log = logger.info if current < previous else logger.debug
+            log(
+                f'Лимит параллельных запросов к {self.name}: '
+                f'{previous} -> {current}'
+            )
 
+    def submit(
+        self,
+        func: Callable[[], Dict[str, Any]],
+        token: Optional[CancellationToken] = None
+    ) -> Future:
+        """Выполнить func() в общем пуле потоков, заняв место в лимите.
+
+        Место занимается до передачи задачи в пул, поэтому задачи, ждущие
+        лимита, не занимают потоки и не задерживают запросы к другим
+        провайдерам. func выполняет запрос, не занимая места сама, и
+        возвращает его результат; по нему корректируется лимит. Задача,
+        токен которой отменён до запуска, завершается ошибкой
+        CANCELLED_ERROR.
+        """
+        future: Future = Future()
+        with self._cond:
+            self._pending.append((future, func, token))
+        if token is not None:
+            handle = token.register(self._dispatch)
+            future.add_done_callback(lambda _: token.unregister(handle))
+        self._dispatch()
+        return future
+
+    def _dispatch(self) -> None:
+        """Передать в пул ожидающие задачи, пока в лимите есть места."""
+        ready = []
+        cancelled = []
+        with self._cond:
+            pending = deque()
+            for item in self._pending:
+                token = item[2]
+                if token is not None and token.is_cancelled:
+                    cancelled.append(item[0])
+                else:
+                    pending.append(item)
+            self._pending = pending
+            while self._pending and self.in_flight < self.limit:
+                ready.append(self._pending.popleft())
+                self.in_flight += 1
+
+        for future in cancelled:
+            future.set_result({'success': False, 'error': CANCELLED_ERROR})
+        if ready:
+            executor = get_request_executor()
+            for future, func, _ in ready:
+                executor.submit(self._run, future, func, time.monotonic())
+
+    def _run(
+        self,
+        future: Future,
+        func: Callable[[], Dict[str, Any]],
+        started: float
+    ) -> None:
+        """Выполнить задачу submit() и освободить её место."""
+        outcome: Optional[str] = OUTCOME_ERROR
+        try:
+            result = func()
+            outcome = request_outcome(result)
+            future.set_result(result)
         except Exception as e:
-            logger.error(f'Неожиданная ошибка при запросе к {self.model.name}: {e}')
+            future.set_exception(e)
+        finally:
+            self.release(started, outcome)
+
+    def metrics(self) -> Dict[str, Any]:
+        """Текущий лимит, занятость и счётчики исходов запросов."""
+        with self._cond:
             return {
-                'success': False,
-                'error': f'Неожиданная ошибка: {str(e)}'
+                'limit': self.limit,
+                'in_flight': self.in_flight,
+                'queued': len(self._pending),
+                'latency': self.latency,
+                'successes': self.successes,
+                'overloads': self.overloads,
+                'errors': self.errors
             }
 
 
-class OpenAIProvider(BaseAPIProvider):
-    """Провайдер для OpenAI API."""
+# Лимиты по (хост, API-ключ)
+_limiters: Dict[Tuple[str, str], AdaptiveLimiter] = {}
+_limiters_lock = threading.Lock()
 
-    def send_request(self, prompt: str) -> Dict[str, Any]:
-        """Отправить запрос к OpenAI API."""
-        api_key = self.model.get_api_key()
-        if not api_key:
-            return {
-                'success': False,
-                'error': 'API-ключ не найден'
-            }
 
-        headers = {
-            'Authorization': f'Bearer {api_key}',
-            'Content-Type': 'application/json'
-        }
+def get_limiter(url: str, api_key: str) -> AdaptiveLimiter:
+    """Получить общий адаптивный лимит для хоста URL и ключа."""
+    host = urlsplit(url).netloc
+    with _limiters_lock:
+        limiter = _limiters.get((host, api_key))
+        if limiter is None:
+            # В подписи только конец ключа
+            limiter = AdaptiveLimiter(f'{host} (ключ ...{api_key[-4:]})')
+            _limiters[(host, api_key)] = limiter
+        return limiter
 
-        data = {
-            'model': self.model.model_name,
-            'messages': [
-                {'role': 'user', 'content': prompt}
-            ],
-            'temperature': 0.7
-        }
 
-        result = self._make_request(self.model.api_url, headers, data)
+def get_limiter_metrics() -> Dict[str, Dict[str, Any]]:
+    """Метрики всех адаптивных лимитов: подпись -> metrics()."""
+    with _limiters_lock:
+        limiters = list(_limiters.values())
+    return {limiter.name: limiter.metrics() for limiter in limiters}
 
-        if result['success']:
-            try:
-                response_text = result['data']['choices'][0]['message']['content']
-                tokens_used = result['data'].get('usage', {}).get('total_tokens')
-                result['response_text'] = response_text
-                result['tokens_used'] = tokens_used
-            except (KeyError, IndexError) as e:
-                logger.error(f'Ошибка парсинга ответа OpenAI: {e}')
-                result['success'] = False
-                result['error'] = 'Неверный формат ответа от API'
 
-        return result
+def request_outcome(result: Dict[str, Any]) -> Optional[str]:
+    """Исход запроса для адаптивного лимита по результату _make_request."""
+    if result['success']:
+        return OUTCOME_SUCCESS
+    error = result.get('error')
+    if error == CANCELLED_ERROR:
+        return None
+    if (
+        result.get('status_code') in OVERLOAD_STATUSES
+        or error == TIMEOUT_ERROR
+    ):
+        return OUTCOME_OVERLOAD
+    return OUTCOME_ERROR
 
 
-class DeepSeekProvider(BaseAPIProvider):
-    """Провайдер для DeepSeek API."""
+def encode_json(data: Any) -> bytes:
+    """Сериализовать тело запроса (orjson, если установлен)."""
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, ensure_ascii=False).encode('utf-8')
 
-    def send_request(self, prompt: str) -> Dict[str, Any]:
-        """Отправить запрос к DeepSeek API."""
-        api_key = self.model.get_api_key()
-        if not api_key:
-            return {
-                'success': False,
-                'error': 'API-ключ не найден'
-            }
 
-        headers = {
-            'Authorization': f'Bearer {api_key}',
-            'Content-Type': 'application/json'
-        }
+def decode_json(content: bytes) -> Any:
+    """Разобрать тело ответа (orjson, если установлен)."""
+    if orjson is not None:
+        return orjson.loads(content)
+    return json.loads(content)
 
-        data = {
-            'model': self.model.model_name,
-            'messages': [
-                {'role': 'user', 'content': prompt}
-            ],
-            'temperature': 0.7
-        }
 
-        result = self._make_request(self.model.api_url, headers, data)
+class BaseAPIProvider(ABC):
+    """Базовый класс для провайдеров API."""
 
-        if result['success']:
-            try:
-                response_text = result['data']['choices'][0]['message']['content']
-                tokens_used = result['data'].get('usage', {}).get('total_tokens')
-                result['response_text'] = response_text
-                result['tokens_used'] = tokens_used
-            except (KeyError, IndexError) as e:
-                logger.error(f'Ошибка парсинга ответа DeepSeek: {e}')
-                result['success'] = False
-                result['error'] = 'Неверный формат ответа от API'
+    def __init__(self, model: Model, timeout: int = DEFAULT_TIMEOUT):
+        """Инициализация провайдера."""
+        self.model = model
+        self.timeout = timeout
 
-        return result
+    @abstractmethod
+    def send_request(
+        self,
+        prompt: str,
+        token: Optional[CancellationToken] = None,
+        acquired: bool = False
+    ) -> Dict[str, Any]:
+        """Отправить запрос к API.
 
+        acquired - место в лимите провайдера уже занято вызывающим кодом.
+        """
+        pass
 
-class GroqProvider(BaseAPIProvider):
-    """Провайдер для Groq API."""
 
-    def send_request(self, prompt: str) -> Dict[str, Any]:
-        """Отправить запрос к Groq API."""
-        api_key = self.model.get_api_key()
-        if not api_key:
-            return {
-                'success': False,
-                'error': 'API-ключ не найден'
-            }
+class OpenAICompatibleProvider(BaseAPIProvider):
+    """Провайдер OpenAI-совместимого API (chat/completions).
+
+    Поведение конкретного провайдера задаётся записью PROVIDERS,
+    параметры генерации и таймаут - полями модели. Заголовки
+    и неизменяемая часть тела запроса готовятся один раз при создании
+    провайдера для модели.
+    """
 
-        headers = {
+    def __init__(
+        self,
+        model: Model,
+        api_key: str,
+        config: Dict[str, Any],
+        timeout: Optional[float] = None
+    ):
+        """Инициализация провайдера."""
+        super().__init__(model, timeout or model.timeout or DEFAULT_TIMEOUT)
+        self.title = config.get('title', model.model_type)
+        self.errors = {**DEFAULT_ERRORS, **config.get('errors', {})}
+        self.headers = {
             'Authorization': f'Bearer {api_key}',
-            'Content-Type': 'application/json'
+            'Content-Type': 'application/json',
+            **config.get('headers', {})
         }
-
-        data = {
-            'model': self.model.model_name,
-            'messages': [
-                {'role': 'user', 'content': prompt}
-            ],
-            'temperature': 0.7
+        # Лимит общий для всех моделей с тем же хостом и ключом
+        self.limiter = get_limiter(model.api_url, api_key)
+        self.payload = {
+            'model': model.model_name,
+            'temperature': (
+                DEFAULT_TEMPERATURE if model.temperature is None
+                else model.temperature
+            ),
+            **config.get('payload', {})
         }
+        # Ограничение длины ответа ограничивает и время генерации
+        if model.max_tokens:
+            self.payload['max_tokens'] = model.max_tokens
+        if model.stop_sequences:
+            self.payload['stop'] = list(model.stop_sequences)
 
-        result = self._make_request(self.model.api_url, headers, data)
+    def send_request(
+        self,
+        prompt: str,
+        token: Optional[CancellationToken] = None,
+        acquired: bool = False
+    ) -> Dict[str, Any]:
+        """Отправить запрос к API провайдера."""
+        data = dict(
+            self.payload, messages=[{'role': 'user', 'content': prompt}]
+        )
+        if acquired:
+            result = self._post(data, token)
+        else:
+            result = self._make_request(data, token)
 
         if result['success']:
             try:
-                response_text = result['data']['choices'][0]['message']['content']
-                tokens_used = result['data'].get('usage', {}).get('total_tokens')
-                result['response_text'] = response_text
-                result['tokens_used'] = tokens_used
-            except (KeyError, IndexError) as e:
-                logger.error(f'Ошибка парсинга ответа Groq: {e}')
+                response = result['data']
+                result['response_text'] = (
+                    response['choices'][0]['message']['content']
+                )
+                result['tokens_used'] = (
+                    response.get('usage') or {}
+                ).get('total_tokens')
+            except (KeyError, IndexError, TypeError) as e:
+                logger.error(f'Ошибка парсинга ответа {self.title}: {e}')
                 result['success'] = False
                 result['error'] = 'Неверный формат ответа от API'
 
         return result
 
+    def _error_message(self, response: requests.Response) -> str:
+        """Сформировать текст ошибки по ответу с кодом 4xx/5xx."""
+        message = self.errors.get(
+            response.status_code, f'Ошибка HTTP {response.status_code}'
+        )
+        try:
+            detail = decode_json(response.content).get('error')
+        except (ValueError, AttributeError):
+            detail = None
+        if isinstance(detail, dict):
+            detail = detail.get('message')
+        if detail:
+            message = f'{message}: {detail}'
+        return message
 
-class OpenRouterProvider(BaseAPIProvider):
-    """Провайдер для OpenRouter API."""
+    def _make_request(
+        self,
+        data: Dict[str, Any],
+        token: Optional[CancellationToken] = None
+    ) -> Dict[str, Any]:
+        """Выполнить HTTP-запрос в пределах адаптивного лимита провайдера."""
+        try:
+            started = self.limiter.acquire(token)
+        except OperationCancelled:
+            return {'success': False, 'error': CANCELLED_ERROR}
+        outcome: Optional[str] = OUTCOME_ERROR
+        try:
+            result = self._post(data, token)
+            outcome = request_outcome(result)
+        finally:
+            self.limiter.release(started, outcome)
+        return result
+
+    def _post(
+        self,
+        data: Dict[str, Any],
+        token: Optional[CancellationToken] = None
+    ) -> Dict[str, Any]:
+        """Выполнить HTTP-запрос с обработкой ошибок."""
+        try:
+            start_time = time.time()
+            response = post(
+                self.model.api_url,
+                token,
+                headers=self.headers,
+                data=encode_json(data),
+                timeout=self.timeout
+            )
+            response_time = time.time() - start_time
+
+            if response.status_code >= 400:
+                error = self._error_message(response)
+                logger.error(
+                    f'Ошибка при запросе к {self.model.name}: {error}'
+                )
+                return {
+                    'success': False,
+                    'error': error,
+                    'status_code': response.status_code
+                }
+
+            result = decode_json(response.content)
+
+            logger.info(
+                f'Запрос к {self.model.name} выполнен за {response_time:.2f}с'
+            )
 
-    def send_request(self, prompt: str) -> Dict[str, Any]:
-        """Отправить запрос к OpenRouter API."""
-        api_key = self.model.get_api_key()
-        if not api_key:
             return {
-                'success': False,
-                'error': 'API-ключ не найден'
+                'success': True,
+                'data': result,
+                'response_time': response_time
             }
 
-        headers = {
-            'Authorization': f'Bearer {api_key}',
-            'Content-Type': 'application/json',
-            'HTTP-Referer': 'https://github.com',  # Опционально, для отслеживания
-            'X-Title': 'ChatList'  # Опционально, название приложения
-        }
-
-        data = {
-            'model': self.model.model_name,
-            'messages': [
-                {'role': 'user', 'content': prompt}
-            ],
-            'temperature': 0.7
-        }
+        except OperationCancelled:
+            return {'success': False, 'error': CANCELLED_ERROR}
 
-        result = self._make_request(self.model.api_url, headers, data)
+        except requests.exceptions.Timeout:
+            if token is not None and token.is_cancelled:
+                return {'success': False, 'error': CANCELLED_ERROR}
+            logger.error(f'Таймаут при запросе к {self.model.name}')
+            return {
+                'success': False,
+                'error': TIMEOUT_ERROR
+            }
 
-        if result['success']:
-            try:
-                response_text = result['data']['choices'][0]['message']['content']
-                tokens_used = result['data'].get('usage', {}).get('total_tokens')
-                result['response_text'] = response_text
-                result['tokens_used'] = tokens_used
-            except (KeyError, IndexError) as e:
-                logger.error(f'Ошибка парсинга ответа OpenRouter: {e}')
-                result['success'] = False
-                result['error'] = 'Неверный формат ответа от API'
+        except requests.exceptions.RequestException as e:
+            # Соединение закрыто отменой токена
+            if token is not None and token.is_cancelled:
+                return {'success': False, 'error': CANCELLED_ERROR}
+            logger.error(f'Ошибка при запросе к {self.model.name}: {e}')
+            return {
+                'success': False,
+                'error': str(e)
+            }
 
-        return result
+        except ValueError as e:
+            logger.error(f'Некорректный JSON от {self.model.name}: {e}')
+            return {
+                'success': False,
+                'error': 'Неверный формат ответа от API'
+            }
 
 
-def get_provider(model_type: str, model: Model) -> BaseAPIProvider:
-    """Фабрика для создания провайдера по типу модели."""
-    providers = {
-        'openai': OpenAIProvider,
-        'deepseek': DeepSeekProvider,
-        'groq': GroqProvider,
-        'openrouter': OpenRouterProvider,
-        'qwen': OpenRouterProvider,  # Все модели через OpenRouter
-        'llama': OpenRouterProvider,
-        'mistral': OpenRouterProvider
-    }
-
-    provider_class = providers.get(model_type.lower())
-    if not provider_class:
+def get_provider_config(model_type: str) -> Dict[str, Any]:
+    """Получить настройки провайдера по типу модели."""
+    model_type = model_type.lower()
+    model_type = PROVIDER_ALIASES.get(model_type, model_type)
+    config = PROVIDERS.get(model_type)
+    if config is None:
         # По умолчанию используем OpenRouter для неизвестных типов
         logger.warning(
             f'Неизвестный тип провайдера: {model_type}, '
             'используется OpenRouter'
         )
-        provider_class = OpenRouterProvider
-
-    return provider_class(model)
-
+        config = PROVIDERS[DEFAULT_PROVIDER]
+    return config
+
+
+@lru_cache(maxsize=PROVIDER_CACHE_SIZE)
+def _cached_provider(model: Model, api_key: str) -> BaseAPIProvider:
+    """Создать провайдер для модели и ключа (с кэшированием)."""
+    return OpenAICompatibleProvider(
+        model, api_key, get_provider_config(model.model_type)
+    )
+
+
+def get_provider(model_type: str, model: Model) -> Optional[BaseAPIProvider]:
+    """Получить провайдер для модели; None, если API-ключ не найден.
+
+    Провайдеры кэшируются по модели и ключу: заголовки и шаблон запроса
+    не собираются заново при каждом вызове, а смена ключа в .env или
+    изменение модели дают новый провайдер.
+    """
+    api_key = model.get_api_key()
+    if not api_key:
+        return None
+    if model_type != model.model_type:
+        model = model._replace(model_type=model_type)
+    return _cached_provider(model, api_key)
+
+
+def send_prompt_to_model(
+    prompt: str,
+    model: Model,
+    token: Optional[CancellationToken] = None,
+    acquired: bool = False
+) -> Dict[str, Any]:
+    """Отправить промт к модели и получить ответ.
+
+    При отмене token (или истечении его срока) запрос прерывается,
+    и возвращается ошибка CANCELLED_ERROR. acquired - место в лимите
+    провайдера уже занято (см. submit_prompt).
+    """
+    if token is not None and token.is_cancelled:
+        return {'success': False, 'error': CANCELLED_ERROR}
 
-def send_prompt_to_model(prompt: str, model: Model) -> Dict[str, Any]:
-    """Отправить промт к модели и получить ответ."""
     try:
         provider = get_provider(model.model_type, model)
-        result = provider.send_request(prompt)
+        if provider is None:
+            return {
+                'success': False,
+                'error': 'API-ключ не найден'
+            }
+        result = provider.send_request(prompt, token, acquired)
 
         if result['success']:
             logger.info(f'Успешный ответ от {model.name}')
@@ -308,3 +795,31 @@ def send_prompt_to_model(prompt: str, model: Model) -> Dict[str, Any]:
             'success': False,
             'error': str(e)
         }
+
+
+def submit_prompt(
+    prompt: str,
+    model: Model,
+    token: Optional[CancellationToken] = None
+) -> Future:
+    """Отправить промт к модели в общем пуле потоков запросов.
+
+    Запрос ждёт места в адаптивном лимите провайдера в очереди лимита,
+    а не в потоке пула, поэтому запросы к перегруженному провайдеру
+    не задерживают запросы к остальным. Future получает результат
+    send_prompt_to_model.
+    """
+    try:
+        provider = get_provider(model.model_type, model)
+    except Exception:
+        # Ошибку вернёт send_prompt_to_model
+        provider = None
+    limiter = getattr(provider, 'limiter', None)
+    if limiter is None:
+        return get_request_executor().submit(
+            send_prompt_to_model, prompt, model, token
+        )
+    return limiter.submit(
+        lambda: send_prompt_to_model(prompt, model, token, acquired=True),
+        token
+    )
@@ -4,8 +4,9 @@ import json
 import logging
 from typing import Dict, Any, List, Optional
 
+from src.cancellation import CancellationToken
 from src.models import Model
-from src.network import send_prompt_to_model
+from src.network import CANCELLED_ERROR, send_prompt_to_model
 
 
 logger = logging.getLogger(__name__)
@@ -88,11 +89,15 @@ ADAPT_CREATIVE_PROMPT_TEMPLATE = """Ты - эксперт по созданию
 Верни ТОЛЬКО адаптированную версию промпта, без дополнительных комментариев."""
 
 
-def enhance_prompt(prompt: str, model: Model) -> Dict[str, Any]:
+def enhance_prompt(
+    prompt: str,
+    model: Model,
+    token: Optional[CancellationToken] = None
+) -> Dict[str, Any]:
     """Улучшить промт с помощью AI."""
     try:
         enhanced_prompt_text = ENHANCE_PROMPT_TEMPLATE.format(prompt=prompt)
-        result = send_prompt_to_model(enhanced_prompt_text, model)
+        result = send_prompt_to_model(enhanced_prompt_text, model, token)
 
         if result['success']:
             enhanced_prompt = result.get('response_text', '').strip()
@@ -115,13 +120,19 @@ def enhance_prompt(prompt: str, model: Model) -> Dict[str, Any]:
         }
 
 
-def generate_alternatives(prompt: str, model: Model) -> Dict[str, Any]:
+def generate_alternatives(
+    prompt: str,
+    model: Model,
+    token: Optional[CancellationToken] = None
+) -> Dict[str, Any]:
     """Сгенерировать альтернативные варианты промта."""
     try:
         alternatives_prompt_text = ALTERNATIVES_PROMPT_TEMPLATE.format(
             prompt=prompt
         )
-        result = send_prompt_to_model(alternatives_prompt_text, model)
+        result = send_prompt_to_model(
+            alternatives_prompt_text, model, token
+        )
 
         if result['success']:
             response_text = result.get('response_text', '').strip()
@@ -197,7 +208,8 @@ def generate_alternatives(prompt: str, model: Model) -> Dict[str, Any]:
 def adapt_prompt_for_type(
     prompt: str,
     model_type: str,
-    model: Model
+    model: Model,
+    token: Optional[CancellationToken] = None
 ) -> Dict[str, Any]:
     """Адаптировать промт под определенный тип задачи."""
     templates = {
@@ -215,7 +227,7 @@ def adapt_prompt_for_type(
 
     try:
         adapted_prompt_text = template.format(prompt=prompt)
-        result = send_prompt_to_model(adapted_prompt_text, model)
+        result = send_prompt_to_model(adapted_prompt_text, model, token)
 
         if result['success']:
             adapted_prompt = result.get('response_text', '').strip()
@@ -238,13 +250,29 @@ def adapt_prompt_for_type(
         }
 
 
+def _is_cancelled(
+    token: Optional[CancellationToken],
+    results: Dict[str, Any]
+) -> bool:
+    """Проверить отмену и записать ошибку отмены в результат."""
+    if token is None or not token.is_cancelled:
+        return False
+    results['error'] = CANCELLED_ERROR
+    return True
+
+
 def enhance_prompt_full(
     prompt: str,
     model: Model,
     include_alternatives: bool = True,
-    include_adaptations: bool = True
+    include_adaptations: bool = True,
+    token: Optional[CancellationToken] = None
 ) -> Dict[str, Any]:
-    """Полное улучшение промта со всеми вариантами."""
+    """Полное улучшение промта со всеми вариантами.
+
+    При отмене через token оставшиеся шаги пропускаются, а в результат
+    записывается ошибка отмены.
+    """
     results = {
         'original_prompt': prompt,
         'enhanced_prompt': None,
@@ -253,15 +281,15 @@ def enhance_prompt_full(
     }
 
     # Улучшение основного промта
-    enhance_result = enhance_prompt(prompt, model)
+    enhance_result = enhance_prompt(prompt, model, token)
     if enhance_result['success']:
         results['enhanced_prompt'] = enhance_result['enhanced_prompt']
     else:
         results['error'] = enhance_result.get('error', 'Ошибка улучшения')
 
     # Генерация альтернатив
-    if include_alternatives:
-        alternatives_result = generate_alternatives(prompt, model)
+    if include_alternatives and not _is_cancelled(token, results):
+        alternatives_result = generate_alternatives(prompt, model, token)
         if alternatives_result['success']:
             results['alternatives'] = alternatives_result['alternatives']
         else:
@@ -271,7 +299,11 @@ def enhance_prompt_full(
     # Адаптация под разные типы
     if include_adaptations:
         for adapt_type in ['code', 'analysis', 'creative']:
-            adapt_result = adapt_prompt_for_type(prompt, adapt_type, model)
+            if _is_cancelled(token, results):
+                break
+            adapt_result = adapt_prompt_for_type(
+                prompt, adapt_type, model, token
+            )
             if adapt_result['success']:
                 results['adaptations'][adapt_type] = adapt_result[
                     'adapted_prompt'
@@ -0,0 +1,94 @@
+"""Архивирование старых результатов с выполнением в фоновом потоке."""
+
+from typing import Any, Dict
+
+from PyQt5.QtCore import Qt, QThread, pyqtSignal
+from PyQt5.QtWidgets import QInputDialog, QMessageBox, QProgressDialog
+
+from src import db, db_writer
+
+
+# Возраст результатов для архивирования по умолчанию (дни)
+DEFAULT_ARCHIVE_AFTER_DAYS = 90
+
+
+class ArchiveWorker(QThread):
+    """Поток для переноса старых результатов в архив."""
+
+    finished = pyqtSignal(dict)
+
+    def __init__(self, older_than_days: int, parent=None):
+        """Инициализация потока."""
+        super().__init__(parent)
+        self.older_than_days = older_than_days
+
+    def run(self):
+        """Выполнение архивирования."""
+        try:
+            # Каждая пачка - отдельная операция потока записи, чтобы
+            # остальные записи не ждали окончания всего переноса
+            self.finished.emit(db.archive_results(
+                self.older_than_days,
+                submit=db_writer.get_writer().submit
+            ))
+        except Exception as e:
+            self.finished.emit({'error': str(e)})
+
+
+def archive_old_results(parent=None) -> bool:
+    """Запросить возраст результатов и перенести их в архив."""
+    try:
+        default_days = int(db.get_setting(
+            'archive_after_days', str(DEFAULT_ARCHIVE_AFTER_DAYS)
+        ))
+    except (ValueError, TypeError):
+        default_days = DEFAULT_ARCHIVE_AFTER_DAYS
+    days, ok = QInputDialog.getInt(
+        parent,
+        'Архивирование результатов',
+        'Перенести в архив результаты старше (дней):',
+        default_days,
+        0,
+        36500
+    )
+    if not ok:
+        return False
+    db_writer.get_writer().submit(
+        db.set_setting, 'archive_after_days', str(days)
+    )
+
+    progress = QProgressDialog(
+        'Перенос результатов в архив...', None, 0, 0, parent
+    )
+    progress.setWindowTitle('Архивирование')
+    progress.setWindowModality(Qt.WindowModal)
+    progress.setMinimumDuration(500)
+    progress.setAutoClose(False)
+    progress.setAutoReset(False)
+
+    worker = ArchiveWorker(days, progress)
+
+    def on_finished(stats: Dict[str, Any]):
+        progress.close()
+        if stats.get('error'):
+            QMessageBox.critical(
+                parent,
+                'Ошибка',
+                f'Ошибка при архивировании:\n{stats["error"]}'
+            )
+        else:
+            QMessageBox.information(
+                parent,
+                'Архивирование',
+                f'Перенесено в архив результатов: {stats["archived"]}\n'
+                f'Сжато при переносе: {stats["compressed"]}\n'
+                f'Файл архива: {stats["archive_path"]}\n\n'
+                'Архивные результаты доступны в истории результатов '
+                'с отметкой "Включая архив".'
+            )
+        worker.wait()
+        progress.deleteLater()
+
+    worker.finished.connect(on_finished)
+    worker.start()
+    return True
@@ -0,0 +1,184 @@
+"""Диалоги экспорта результатов с выполнением в фоновом потоке."""
+
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from PyQt5.QtCore import Qt, QThread, pyqtSignal
+from PyQt5.QtWidgets import QFileDialog, QMessageBox, QProgressDialog
+
+from src import export
+
+
+# Фильтры диалога сохранения для поддерживаемых форматов
+FILE_FILTERS = {
+    'md': 'Markdown Files (*.md)',
+    'json': 'JSON Files (*.json)',
+    'jsonl': 'JSON Lines Files (*.jsonl)',
+    'csv': 'CSV Files (*.csv)',
+    'parquet': 'Parquet Files (*.parquet)',
+    'arrow': 'Arrow IPC Files (*.arrow)',
+}
+
+
+class ExportWorker(QThread):
+    """Поток для выполнения экспорта.
+
+    Задача получает обратный вызов прогресса и возвращает статистику
+    экспорта; отмена прерывает её через ExportCancelled.
+    """
+
+    finished = pyqtSignal(dict)
+    progress = pyqtSignal(int, int)
+
+    def __init__(
+        self,
+        job: Callable[[export.ProgressCallback], Dict[str, Any]],
+        parent=None
+    ):
+        """Инициализация потока."""
+        super().__init__(parent)
+        self.job = job
+        self._cancelled = False
+
+    def cancel(self):
+        """Запросить отмену экспорта."""
+        self._cancelled = True
+
+    def on_progress(self, done: int, total: Optional[int]):
+        """Передать прогресс в GUI-поток и проверить отмену."""
+        if self._cancelled:
+            raise export.ExportCancelled()
+        self.progress.emit(done, total or 0)
+
+    def run(self):
+        """Выполнение экспорта."""
+        try:
+            self.finished.emit(self.job(self.on_progress))
+        except export.ExportCancelled:
+            self.finished.emit({'cancelled': True})
+        except Exception as e:
+            self.finished.emit({'error': str(e)})
+
+
+def _ask_filename(parent, title: str, prefix: str, formats) -> Optional[str]:
+    """Запросить имя файла; без расширения берётся выбранный формат."""
+    filters = [FILE_FILTERS[fmt] for fmt in formats]
+    filename, selected_filter = QFileDialog.getSaveFileName(
+        parent,
+        title,
+        f'{prefix}_{datetime.now().strftime("%Y%m%d_%H%M%S")}.{formats[0]}',
+        ';;'.join(filters + ['All Files (*)']),
+        filters[0]
+    )
+
+    if not filename:
+        return None
+
+    if export.detect_format(filename) not in formats:
+        fmt = next(
+            (f for f in formats if FILE_FILTERS[f] == selected_filter),
+            formats[0]
+        )
+        filename = f'{filename}.{fmt}'
+
+    return filename
+
+
+def run_export(
+    parent,
+    job: Callable[[export.ProgressCallback], Dict[str, Any]]
+) -> ExportWorker:
+    """Запустить экспорт в фоновом потоке с индикатором прогресса."""
+    progress = QProgressDialog(
+        'Экспорт результатов...', 'Отмена', 0, 0, parent
+    )
+    progress.setWindowTitle('Экспорт')
+    progress.setWindowModality(Qt.WindowModal)
+    progress.setMinimumDuration(500)
+    progress.setAutoClose(False)
+    progress.setAutoReset(False)
+
+    worker = ExportWorker(job, progress)
+
+    def on_progress(done: int, total: int):
+        if total and progress.maximum() != total:
+            progress.setMaximum(total)
+        progress.setValue(done)
+
+    def on_finished(stats: Dict[str, Any]):
+        progress.close()
+        if stats.get('error'):
+            QMessageBox.critical(
+                parent,
+                'Ошибка',
+                f'Ошибка при экспорте:\n{stats["error"]}'
+            )
+        elif not stats.get('cancelled'):
+            QMessageBox.information(
+                parent,
+                'Успех',
+                f'Экспортировано результатов: {stats["count"]}\n'
+                f'Файл: {stats["path"]}'
+            )
+        worker.wait()
+        progress.deleteLater()
+
+    worker.progress.connect(on_progress)
+    worker.finished.connect(on_finished)
+    progress.canceled.connect(worker.cancel)
+    worker.start()
+    return worker
+
+
+def export_to_markdown(
+    results: Iterable[Dict[str, Any]],
+    prompt_text: str,
+    parent=None
+) -> bool:
+    """Экспортировать результаты в Markdown формат."""
+    filename = _ask_filename(
+        parent, 'Сохранить как Markdown', 'results', ['md']
+    )
+    if not filename:
+        return False
+
+    run_export(parent, lambda callback: export.export_results(
+        filename, results, 'md', prompt_text, callback
+    ))
+    return True
+
+
+def export_to_json(
+    results: Iterable[Dict[str, Any]],
+    prompt_text: str,
+    parent=None
+) -> bool:
+    """Экспортировать результаты в JSON формат."""
+    filename = _ask_filename(
+        parent, 'Сохранить как JSON', 'results', ['json']
+    )
+    if not filename:
+        return False
+
+    run_export(parent, lambda callback: export.export_results(
+        filename, results, 'json', prompt_text, callback
+    ))
+    return True
+
+
+def export_history(parent=None) -> bool:
+    """Экспортировать всю историю результатов в выбранный формат."""
+    filename = _ask_filename(
+        parent,
+        'Экспорт истории результатов',
+        'history',
+        ['jsonl', 'csv', 'parquet', 'arrow', 'json', 'md']
+    )
+    if not filename:
+        return False
+
+    fmt = export.detect_format(filename)
+    run_export(parent, lambda callback: export.export_results_history(
+        filename, fmt, progress_callback=callback
+    ))
+    return True
@@ -6,10 +6,16 @@ from PyQt5.QtCore import Qt
 from PyQt5.QtWidgets import (
     QDialog, QVBoxLayout, QHBoxLayout, QTableWidget, QTableWidgetItem,
     QPushButton, QLabel, QLineEdit, QMessageBox, QHeaderView,
-    QDialogButtonBox, QTextEdit, QComboBox, QFormLayout
+    QDialogButtonBox, QTextEdit, QComboBox, QFormLayout, QWidget, QCheckBox
 )
 
-from src import db
+from src import db, db_writer
+from src.models import load_models, get_model_by_id
+from src.ui.search_executor import SearchExecutor
+
+
+# Максимальное количество результатов, показываемых в истории
+RESULTS_LIMIT = 1000
 
 
 class PromptsHistoryDialog(QDialog):
@@ -21,6 +27,9 @@ class PromptsHistoryDialog(QDialog):
         self.setWindowTitle('История промтов')
         self.setMinimumSize(900, 600)
         self.selected_prompt_id: Optional[int] = None
+        self.search_executor = SearchExecutor(self)
+        self.search_executor.results_ready.connect(self.populate_prompts)
+        self.search_executor.failed.connect(self.on_search_failed)
         self.init_ui()
         self.load_prompts()
 
@@ -49,6 +58,13 @@ class PromptsHistoryDialog(QDialog):
         self.sort_combo.currentIndexChanged.connect(self.load_prompts)
         search_layout.addWidget(self.sort_combo)
 
+        # Фильтр по тегу
+        search_layout.addWidget(QLabel('Тег:'))
+        self.tag_combo = QComboBox()
+        self.load_tags_combo()
+        self.tag_combo.currentIndexChanged.connect(self.load_prompts)
+        search_layout.addWidget(self.tag_combo)
+
         layout.addLayout(search_layout)
 
         # Таблица промтов
@@ -91,22 +107,47 @@ class PromptsHistoryDialog(QDialog):
         button_box.rejected.connect(self.reject)
         layout.addWidget(button_box)
 
+    def load_tags_combo(self):
+        """Загрузить список тегов с количеством промтов в комбобокс."""
+        current_tag = self.tag_combo.currentData()
+        self.tag_combo.blockSignals(True)
+        self.tag_combo.clear()
+        self.tag_combo.addItem('Все теги', None)
+        for tag_info in db.get_tag_counts():
+            self.tag_combo.addItem(
+                f"{tag_info['tag']} ({tag_info['count']})",
+                tag_info['tag']
+            )
+        index = self.tag_combo.findData(current_tag)
+        self.tag_combo.setCurrentIndex(max(index, 0))
+        self.tag_combo.blockSignals(False)
+
     def load_prompts(self):
-        """Загрузить список промтов."""
+        """Загрузить список промтов (запрос выполняется в фоновом потоке)."""
+        self.search_executor.run_now(self.build_query())
+
+    def build_query(self):
+        """Сформировать запрос по текущим значениям фильтров."""
         search_text = self.search_input.text().strip()
         sort_index = self.sort_combo.currentIndex()
+        tag = self.tag_combo.currentData()
+        tags = [tag] if tag else None
 
         if search_text:
-            prompts = db.search_prompts(search_text)
-        else:
-            order_by = {
-                0: 'date DESC',
-                1: 'date ASC',
-                2: 'prompt ASC',
-                3: 'prompt DESC'
-            }.get(sort_index, 'date DESC')
-            prompts = db.get_prompts(order_by=order_by)
-
+            return lambda: db.search_prompts(search_text, tags=tags)
+
+        order_by = {
+            0: 'date DESC',
+            1: 'date ASC',
+            2: 'prompt ASC',
+            3: 'prompt DESC'
+        }.get(sort_index, 'date DESC')
+        if tags:
+            return lambda: db.get_prompts_by_tags(tags, order_by=order_by)
+        return lambda: db.get_prompts(order_by=order_by)
+
+    def populate_prompts(self, prompts: list):
+        """Заполнить таблицу найденными промтами."""
         self.table.setRowCount(len(prompts))
 
         for row, prompt in enumerate(prompts):
@@ -151,7 +192,20 @@ class PromptsHistoryDialog(QDialog):
 
     def on_search_changed(self):
         """Обработчик изменения поискового запроса."""
-        self.load_prompts()
+        self.search_executor.schedule(self.build_query())
+
+    def on_search_failed(self, error: str):
+        """Обработчик ошибки поиска."""
+        QMessageBox.warning(
+            self,
+            'Ошибка',
+            f'Ошибка при поиске:\n{error}'
+        )
+
+    def done(self, result: int):
+        """Закрытие диалога с остановкой фонового поиска."""
+        self.search_executor.shutdown()
+        super().done(result)
 
     def view_prompt(self, prompt: dict):
         """Просмотр полного текста промта."""
@@ -213,13 +267,17 @@ class PromptsHistoryDialog(QDialog):
                 )
 
                 if reply == QMessageBox.Yes:
-                    db.delete_prompt(prompt_id)
+                    db_writer.get_writer().submit(
+                        db.delete_prompt, prompt_id
+                    ).result()
+                    self.load_tags_combo()
                     self.load_prompts()
 
     def on_add_clicked(self):
         """Обработчик добавления промта."""
         dialog = PromptEditDialog(self, None)
         if dialog.exec_() == QDialog.Accepted:
+            self.load_tags_combo()
             self.load_prompts()
 
     def on_edit_clicked(self):
@@ -236,12 +294,14 @@ class PromptsHistoryDialog(QDialog):
             if prompt:
                 dialog = PromptEditDialog(self, prompt)
                 if dialog.exec_() == QDialog.Accepted:
+                    self.load_tags_combo()
                     self.load_prompts()
 
     def edit_prompt(self, prompt: dict):
         """Редактировать промт из кнопки в таблице."""
         dialog = PromptEditDialog(self, prompt)
         if dialog.exec_() == QDialog.Accepted:
+            self.load_tags_combo()
             self.load_prompts()
 
 
@@ -253,6 +313,9 @@ class ResultsHistoryDialog(QDialog):
         super().__init__(parent)
         self.setWindowTitle('История результатов')
         self.setMinimumSize(1000, 700)
+        self.search_executor = SearchExecutor(self)
+        self.search_executor.results_ready.connect(self.populate_results)
+        self.search_executor.failed.connect(self.on_search_failed)
         self.init_ui()
         self.load_results()
 
@@ -266,7 +329,7 @@ class ResultsHistoryDialog(QDialog):
         filters_layout.addWidget(QLabel('Поиск:'))
         self.search_input = QLineEdit()
         self.search_input.setPlaceholderText('Поиск по тексту ответа...')
-        self.search_input.textChanged.connect(self.load_results)
+        self.search_input.textChanged.connect(self.on_search_changed)
         filters_layout.addWidget(self.search_input)
 
         filters_layout.addWidget(QLabel('Промт:'))
@@ -283,6 +346,13 @@ class ResultsHistoryDialog(QDialog):
         self.model_combo.currentIndexChanged.connect(self.load_results)
         filters_layout.addWidget(self.model_combo)
 
+        self.archive_checkbox = QCheckBox('Включая архив')
+        self.archive_checkbox.setToolTip(
+            'Искать также среди архивированных старых результатов'
+        )
+        self.archive_checkbox.toggled.connect(self.load_results)
+        filters_layout.addWidget(self.archive_checkbox)
+
         layout.addLayout(filters_layout)
 
         # Таблица результатов
@@ -300,6 +370,9 @@ class ResultsHistoryDialog(QDialog):
         self.table.setSelectionBehavior(QTableWidget.SelectRows)
         layout.addWidget(self.table)
 
+        self.status_label = QLabel()
+        layout.addWidget(self.status_label)
+
         # Кнопки
         buttons_layout = QHBoxLayout()
         self.export_button = QPushButton('Экспорт выбранных')
@@ -328,26 +401,57 @@ class ResultsHistoryDialog(QDialog):
 
     def load_models_combo(self):
         """Загрузить список моделей в комбобокс."""
-        from src.models import load_models
         models = load_models()
         for model in models:
             self.model_combo.addItem(model.name, model.id)
 
     def load_results(self):
-        """Загрузить список результатов."""
+        """Загрузить список результатов (в фоновом потоке)."""
+        self.search_executor.run_now(self.build_query())
+
+    def build_query(self):
+        """Сформировать запрос по текущим значениям фильтров."""
         prompt_id = self.prompt_combo.currentData()
         model_id = self.model_combo.currentData()
         search_text = self.search_input.text().strip()
+        include_archive = self.archive_checkbox.isChecked()
+
+        # Полные тексты ответов не загружаются: нужны только превью
+        return lambda: db.query_results(
+            text=search_text or None,
+            prompt_id=prompt_id,
+            model_id=model_id,
+            limit=RESULTS_LIMIT,
+            with_text=False,
+            include_archive=include_archive
+        )
 
-        if search_text:
-            results = db.search_results(search_text)
-            # Фильтрация по промту и модели
-            if prompt_id:
-                results = [r for r in results if r['prompt_id'] == prompt_id]
-            if model_id:
-                results = [r for r in results if r['model_id'] == model_id]
+    def on_search_changed(self):
+        """Обработчик изменения поискового запроса."""
+        self.search_executor.schedule(self.build_query())
+
+    def on_search_failed(self, error: str):
+        """Обработчик ошибки поиска."""
+        QMessageBox.warning(
+            self,
+            'Ошибка',
+            f'Ошибка при поиске:\n{error}'
+        )
+
+    def done(self, result: int):
+        """Закрытие диалога с остановкой фонового поиска."""
+        self.search_executor.shutdown()
+        super().done(result)
+
+    def populate_results(self, results: list):
+        """Заполнить таблицу найденными результатами."""
+        if len(results) >= RESULTS_LIMIT:
+            self.status_label.setText(
+                f'Показаны последние {RESULTS_LIMIT} результатов, '
+                'уточните фильтры'
+            )
         else:
-            results = db.get_results(prompt_id=prompt_id, model_id=model_id)
+            self.status_label.setText(f'Найдено результатов: {len(results)}')
 
         self.table.setRowCount(len(results))
 
@@ -358,8 +462,7 @@ class ResultsHistoryDialog(QDialog):
             self.table.setItem(row, 0, date_item)
 
             # Промт
-            prompt = db.get_prompt_by_id(result['prompt_id'])
-            prompt_text = prompt['prompt'] if prompt else 'Неизвестно'
+            prompt_text = result['prompt'] or 'Неизвестно'
             preview = prompt_text[:50] + '...' if len(
                 prompt_text
             ) > 50 else prompt_text
@@ -368,19 +471,16 @@ class ResultsHistoryDialog(QDialog):
             self.table.setItem(row, 1, prompt_item)
 
             # Модель
-            from src.models import load_models
-            models = load_models()
-            model = next((m for m in models if m.id == result['model_id']), None)
-            model_name = model.name if model else 'Неизвестно'
+            model_name = self.get_model_name(result['model_id'])
             model_item = QTableWidgetItem(model_name)
             model_item.setFlags(model_item.flags() & ~Qt.ItemIsEditable)
             self.table.setItem(row, 2, model_item)
 
             # Ответ
-            response_text = result['response_text']
-            preview = response_text[:100] + '...' if len(
-                response_text
-            ) > 100 else response_text
+            response_preview = result['response_preview'] or ''
+            preview = response_preview[:100] + '...' if len(
+                response_preview
+            ) > 100 else response_preview
             response_item = QTableWidgetItem(preview)
             response_item.setFlags(response_item.flags() & ~Qt.ItemIsEditable)
             self.table.setItem(row, 3, response_item)
@@ -405,13 +505,14 @@ class ResultsHistoryDialog(QDialog):
         info_label = QLabel(
             f"Дата: {result['created_at']}\n"
             f"Модель: {self.get_model_name(result['model_id'])}\n"
-            f"Промт: {self.get_prompt_text(result['prompt_id'])}"
+            f"Промт: {result['prompt'] or 'Неизвестно'}"
         )
         layout.addWidget(info_label)
 
-        # Текст ответа
+        # Текст ответа (распаковывается только при просмотре)
+        response_text = db.get_result_text(result['id']) or ''
         text_edit = QTextEdit()
-        text_edit.setPlainText(result['response_text'])
+        text_edit.setPlainText(response_text)
         text_edit.setReadOnly(True)
         layout.addWidget(text_edit)
 
@@ -424,16 +525,9 @@ class ResultsHistoryDialog(QDialog):
 
     def get_model_name(self, model_id: int) -> str:
         """Получить название модели по ID."""
-        from src.models import load_models
-        models = load_models()
-        model = next((m for m in models if m.id == model_id), None)
+        model = get_model_by_id(model_id)
         return model.name if model else 'Неизвестно'
 
-    def get_prompt_text(self, prompt_id: int) -> str:
-        """Получить текст промта по ID."""
-        prompt = db.get_prompt_by_id(prompt_id)
-        return prompt['prompt'] if prompt else 'Неизвестно'
-
     def on_export_clicked(self):
         """Экспорт выбранных результатов."""
         selected_rows = set(
@@ -516,17 +610,23 @@ class PromptEditDialog(QDialog):
             )
             return
 
+        # Запись - через поток записи БД; результат нужен для сообщения
+        # об ошибке, поэтому ожидаем его
+        writer = db_writer.get_writer()
         try:
             if self.prompt:
                 # Редактирование существующего промта
-                db.update_prompt(
+                writer.submit(
+                    db.update_prompt,
                     self.prompt['id'],
                     prompt=prompt_text,
                     tags=tags if tags else None
-                )
+                ).result()
             else:
                 # Добавление нового промта
-                db.create_prompt(prompt_text, tags if tags else None)
+                writer.submit(
+                    db.create_prompt, prompt_text, tags if tags else None
+                ).result()
 
             self.accept()
 
@@ -0,0 +1,114 @@
+"""Импорт промтов и результатов с выполнением в фоновом потоке."""
+
+from typing import Any, Dict, Optional
+
+from PyQt5.QtCore import Qt, QThread, pyqtSignal
+from PyQt5.QtWidgets import QFileDialog, QMessageBox, QProgressDialog
+
+from src import importer
+
+
+class ImportWorker(QThread):
+    """Поток для выполнения импорта."""
+
+    finished = pyqtSignal(dict)
+    progress = pyqtSignal(int, int)
+
+    def __init__(self, filename: str, parent=None):
+        """Инициализация потока."""
+        super().__init__(parent)
+        self.filename = filename
+        self._cancelled = False
+
+    def cancel(self):
+        """Запросить отмену импорта (срабатывает при очередном прогрессе)."""
+        self._cancelled = True
+
+    def on_progress(self, done: int, total: Optional[int]):
+        """Передать прогресс в GUI-поток и проверить отмену."""
+        if self._cancelled:
+            raise importer.ImportCancelled()
+        self.progress.emit(done, total or 0)
+
+    def run(self):
+        """Выполнение импорта."""
+        try:
+            self.finished.emit(importer.import_file(
+                self.filename, progress_callback=self.on_progress
+            ))
+        except importer.ImportCancelled:
+            self.finished.emit({'cancelled': True})
+        except Exception as e:
+            self.finished.emit({'error': str(e)})
+
+
+def _format_stats(stats: Dict[str, Any]) -> str:
+    """Сформировать текст отчёта об импорте."""
+    lines = [
+        f'Прочитано записей: {stats["read"]}',
+        f'Добавлено промтов: {stats["prompts"]}',
+        f'Добавлено результатов: {stats["results"]}',
+        f'Создано моделей: {stats["models"]}',
+        f'Пропущено некорректных записей: {stats["skipped"]}',
+    ]
+    if stats['models']:
+        lines.append(
+            '\nНовые модели созданы неактивными, '
+            'проверьте их в управлении моделями.'
+        )
+    if stats['errors']:
+        lines.append('\nОшибки:')
+        lines.extend(stats['errors'])
+    return '\n'.join(lines)
+
+
+def import_data(parent=None) -> bool:
+    """Выбрать файл и импортировать его в фоновом потоке."""
+    filename, _ = QFileDialog.getOpenFileName(
+        parent,
+        'Импорт промтов и результатов',
+        '',
+        'Все поддерживаемые (*.jsonl *.csv *.json);;'
+        'JSON Lines Files (*.jsonl);;CSV Files (*.csv);;'
+        'ChatList JSON (*.json);;All Files (*)'
+    )
+
+    if not filename:
+        return False
+
+    progress = QProgressDialog('Импорт записей...', 'Отмена', 0, 0, parent)
+    progress.setWindowTitle('Импорт')
+    progress.setWindowModality(Qt.WindowModal)
+    progress.setMinimumDuration(500)
+    progress.setAutoClose(False)
+    progress.setAutoReset(False)
+
+    worker = ImportWorker(filename, progress)
+
+    def on_progress(done: int, total: int):
+        progress.setLabelText(f'Импорт записей... прочитано {done}')
+
+    def on_finished(stats: Dict[str, Any]):
+        progress.close()
+        if stats.get('error'):
+            QMessageBox.critical(
+                parent,
+                'Ошибка',
+                f'Ошибка при импорте:\n{stats["error"]}'
+            )
+        elif stats.get('cancelled'):
+            QMessageBox.information(
+                parent,
+                'Импорт',
+                'Импорт отменён. Уже записанные пачки сохранены в БД.'
+            )
+        else:
+            QMessageBox.information(parent, 'Импорт', _format_stats(stats))
+        worker.wait()
+        progress.deleteLater()
+
+    worker.progress.connect(on_progress)
+    worker.finished.connect(on_finished)
+    progress.canceled.connect(worker.cancel)
+    worker.start()
+    return True
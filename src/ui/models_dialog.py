@@ -1,16 +1,47 @@
 """Диалог управления моделями."""
 
-from typing import Optional, List
+import sqlite3
+from typing import Any, Dict, Optional, List, Tuple
 
 from PyQt5.QtCore import Qt
 from PyQt5.QtWidgets import (
     QDialog, QVBoxLayout, QHBoxLayout, QTableWidget, QTableWidgetItem,
     QPushButton, QCheckBox, QLineEdit, QLabel, QMessageBox, QHeaderView,
-    QDialogButtonBox, QFormLayout, QComboBox
+    QDialogButtonBox, QFormLayout, QComboBox, QSpinBox, QDoubleSpinBox
 )
 
-from src import db
-from src.models import Model, load_models
+from src import db, db_writer
+from src.models import (
+    DEFAULT_TEMPERATURE, DEFAULT_TIMEOUT, Model, load_models
+)
+
+
+# Максимальное количество стоп-последовательностей (ограничение OpenAI API)
+MAX_STOP_SEQUENCES = 4
+# Замены спецсимволов в поле стоп-последовательностей
+STOP_ESCAPES = (('\\n', '\n'), ('\\t', '\t'))
+
+
+def parse_stop_sequences(text: str) -> List[str]:
+    """Разобрать стоп-последовательности, разделённые запятой."""
+    sequences = []
+    for part in text.split(','):
+        part = part.strip()
+        for escaped, char in STOP_ESCAPES:
+            part = part.replace(escaped, char)
+        if part:
+            sequences.append(part)
+    return sequences
+
+
+def format_stop_sequences(sequences: Tuple[str, ...]) -> str:
+    """Представить стоп-последовательности для поля ввода."""
+    parts = []
+    for sequence in sequences:
+        for escaped, char in STOP_ESCAPES:
+            sequence = sequence.replace(char, escaped)
+        parts.append(sequence)
+    return ', '.join(parts)
 
 
 class ModelsDialog(QDialog):
@@ -80,7 +111,7 @@ class ModelsDialog(QDialog):
             checkbox = QCheckBox()
             checkbox.setChecked(bool(model.is_active))
             checkbox.stateChanged.connect(
-                lambda state, m=model: self.toggle_model_active(m, state)
+                lambda state, r=row: self.toggle_model_active(r, state)
             )
             self.table.setCellWidget(row, 0, checkbox)
 
@@ -108,11 +139,15 @@ class ModelsDialog(QDialog):
             )
             self.table.setItem(row, 4, model_name_item)
 
-    def toggle_model_active(self, model: Model, state: int):
+    def toggle_model_active(self, row: int, state: int):
         """Переключить активность модели."""
         is_active = 1 if state == Qt.Checked else 0
-        db.update_model(model.id, is_active=is_active)
-        model.is_active = is_active
+        model = self.models[row]
+        db_writer.get_writer().submit(
+            db.update_model, model.id, is_active=is_active
+        ).result()
+        # Model неизменяема: в списке заменяется обновлённая копия
+        self.models[row] = model._replace(is_active=is_active)
 
     def on_add_clicked(self):
         """Обработчик добавления модели."""
@@ -150,7 +185,9 @@ class ModelsDialog(QDialog):
         if reply == QMessageBox.Yes:
             # Удаление через обновление is_active или прямое удаление
             # В данном случае просто деактивируем
-            db.update_model(model.id, is_active=0)
+            db_writer.get_writer().submit(
+                db.update_model, model.id, is_active=0
+            ).result()
             self.load_models_list()
 
 
@@ -209,6 +246,37 @@ class ModelEditDialog(QDialog):
         self.is_active_checkbox.setChecked(True)
         form.addRow('Активна:', self.is_active_checkbox)
 
+        # Параметры генерации: минимальное значение поля - "по умолчанию"
+        self.max_tokens_input = QSpinBox()
+        self.max_tokens_input.setRange(0, 1000000)
+        self.max_tokens_input.setSingleStep(256)
+        self.max_tokens_input.setSpecialValueText('по умолчанию')
+        form.addRow('Макс. токенов в ответе:', self.max_tokens_input)
+
+        self.temperature_input = QDoubleSpinBox()
+        self.temperature_input.setRange(-0.1, 2.0)
+        self.temperature_input.setSingleStep(0.1)
+        self.temperature_input.setDecimals(2)
+        self.temperature_input.setSpecialValueText(
+            f'по умолчанию ({DEFAULT_TEMPERATURE})'
+        )
+        self.temperature_input.setValue(-0.1)
+        form.addRow('Температура:', self.temperature_input)
+
+        self.timeout_input = QSpinBox()
+        self.timeout_input.setRange(0, 3600)
+        self.timeout_input.setSuffix(' с')
+        self.timeout_input.setSpecialValueText(
+            f'по умолчанию ({DEFAULT_TIMEOUT} с)'
+        )
+        form.addRow('Таймаут запроса:', self.timeout_input)
+
+        self.stop_input = QLineEdit()
+        self.stop_input.setPlaceholderText(
+            'через запятую, \\n - перевод строки'
+        )
+        form.addRow('Стоп-последовательности:', self.stop_input)
+
         layout.addLayout(form)
 
         # Кнопки
@@ -232,6 +300,13 @@ class ModelEditDialog(QDialog):
             self.model_type_input.setCurrentIndex(index)
         self.model_name_input.setText(self.model.model_name or '')
         self.is_active_checkbox.setChecked(bool(self.model.is_active))
+        self.max_tokens_input.setValue(self.model.max_tokens or 0)
+        if self.model.temperature is not None:
+            self.temperature_input.setValue(self.model.temperature)
+        self.timeout_input.setValue(int(self.model.timeout or 0))
+        self.stop_input.setText(
+            format_stop_sequences(self.model.stop_sequences)
+        )
 
     def validate_and_accept(self):
         """Валидация и принятие диалога."""
@@ -240,6 +315,12 @@ class ModelEditDialog(QDialog):
         api_key_env = self.api_key_env_input.text().strip()
         model_type = self.model_type_input.currentText()
         model_name = self.model_name_input.text().strip()
+        max_tokens = self.max_tokens_input.value() or None
+        temperature = self.temperature_input.value()
+        if temperature < 0:
+            temperature = None
+        timeout = self.timeout_input.value() or None
+        stop_sequences = parse_stop_sequences(self.stop_input.text())
 
         if not name:
             QMessageBox.warning(self, 'Ошибка', 'Введите название модели!')
@@ -257,29 +338,66 @@ class ModelEditDialog(QDialog):
             )
             return
 
+        if len(stop_sequences) > MAX_STOP_SEQUENCES:
+            QMessageBox.warning(
+                self,
+                'Ошибка',
+                f'Можно указать не более {MAX_STOP_SEQUENCES} '
+                'стоп-последовательностей!'
+            )
+            return
+
         if not model_name:
             model_name = name
 
+        writer = db_writer.get_writer()
         if self.model:
-            # Обновление существующей модели
-            db.update_model(
+            # Обновление существующей модели одной транзакцией
+            writer.submit(
+                _update_model,
                 self.model.id,
-                name=name,
-                api_url=api_url,
-                api_key_env=api_key_env,
-                model_type=model_type,
-                model_name=model_name,
-                is_active=1 if self.is_active_checkbox.isChecked() else 0
-            )
+                dict(
+                    name=name,
+                    api_url=api_url,
+                    api_key_env=api_key_env,
+                    model_type=model_type,
+                    model_name=model_name,
+                    is_active=(
+                        1 if self.is_active_checkbox.isChecked() else 0
+                    )
+                ),
+                dict(
+                    max_tokens=max_tokens,
+                    temperature=temperature,
+                    timeout=timeout,
+                    stop_sequences=stop_sequences
+                )
+            ).result()
         else:
             # Создание новой модели
-            db.create_model(
+            writer.submit(
+                db.create_model,
                 name=name,
                 api_url=api_url,
                 api_key_env=api_key_env,
                 model_type=model_type,
                 model_name=model_name,
-                is_active=1 if self.is_active_checkbox.isChecked() else 0
-            )
+                is_active=1 if self.is_active_checkbox.isChecked() else 0,
+                max_tokens=max_tokens,
+                temperature=temperature,
+                timeout=timeout,
+                stop_sequences=stop_sequences
+            ).result()
 
         self.accept()
+
+
+def _update_model(
+    model_id: int,
+    fields: Dict[str, Any],
+    generation: Dict[str, Any],
+    conn: sqlite3.Connection
+) -> None:
+    """Операция потока записи: поля и параметры генерации модели."""
+    db.update_model(model_id, conn=conn, **fields)
+    db.update_model_generation(model_id, conn=conn, **generation)
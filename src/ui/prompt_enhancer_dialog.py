@@ -9,7 +9,9 @@ from PyQt5.QtWidgets import (
     QWidget, QDialogButtonBox
 )
 
+from src.cancellation import CancellationToken
 from src.models import Model, get_active_models
+from src.network import CANCELLED_ERROR
 from src.prompt_enhancer import (
     enhance_prompt_full, enhance_prompt, generate_alternatives,
     adapt_prompt_for_type
@@ -35,6 +37,11 @@ class EnhancementWorker(QThread):
         self.model = model
         self.include_alternatives = include_alternatives
         self.include_adaptations = include_adaptations
+        self.token = CancellationToken()
+
+    def cancel(self):
+        """Отменить улучшение (активный запрос прерывается сразу)."""
+        self.token.cancel()
 
     def run(self):
         """Выполнение улучшения."""
@@ -44,7 +51,8 @@ class EnhancementWorker(QThread):
                 self.prompt,
                 self.model,
                 self.include_alternatives,
-                self.include_adaptations
+                self.include_adaptations,
+                self.token
             )
             self.finished.emit(results)
         except Exception as e:
@@ -65,6 +73,7 @@ class PromptEnhancerDialog(QDialog):
         self.initial_prompt = initial_prompt
         self.selected_prompt: Optional[str] = None
         self.results: Optional[Dict[str, Any]] = None
+        self.worker: Optional[EnhancementWorker] = None
         self.init_ui()
 
     def init_ui(self):
@@ -118,6 +127,11 @@ class PromptEnhancerDialog(QDialog):
         self.enhance_button.clicked.connect(self.on_enhance_clicked)
         buttons_layout.addWidget(self.enhance_button)
 
+        self.stop_button = QPushButton('Остановить')
+        self.stop_button.setEnabled(False)
+        self.stop_button.clicked.connect(self.on_stop_clicked)
+        buttons_layout.addWidget(self.stop_button)
+
         buttons_layout.addStretch()
 
         self.use_button = QPushButton('Использовать выбранный')
@@ -250,6 +264,7 @@ class PromptEnhancerDialog(QDialog):
         self.progress_label.setVisible(True)
         self.progress_bar.setRange(0, 0)
         self.enhance_button.setEnabled(False)
+        self.stop_button.setEnabled(True)
 
         # Запуск потока улучшения
         self.worker = EnhancementWorker(prompt, model)
@@ -257,6 +272,20 @@ class PromptEnhancerDialog(QDialog):
         self.worker.finished.connect(self.on_enhancement_finished)
         self.worker.start()
 
+    def on_stop_clicked(self):
+        """Обработчик нажатия кнопки 'Остановить'."""
+        if self.worker and self.worker.isRunning():
+            self.worker.cancel()
+        self.stop_button.setEnabled(False)
+
+    def done(self, result: int):
+        """Закрытие диалога с отменой незавершённого улучшения."""
+        if self.worker and self.worker.isRunning():
+            self.worker.finished.disconnect(self.on_enhancement_finished)
+            self.worker.cancel()
+            self.worker.wait(5000)
+        super().done(result)
+
     def on_progress_update(self, message: str):
         """Обновление сообщения о прогрессе."""
         self.progress_label.setText(message)
@@ -266,8 +295,13 @@ class PromptEnhancerDialog(QDialog):
         self.progress_bar.setVisible(False)
         self.progress_label.setVisible(False)
         self.enhance_button.setEnabled(True)
+        self.stop_button.setEnabled(False)
         self.results = results
 
+        if results.get('error') == CANCELLED_ERROR:
+            # Отмена пользователем - не ошибка
+            return
+
         if 'error' in results:
             QMessageBox.critical(
                 self,
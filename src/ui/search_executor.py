@@ -0,0 +1,127 @@
+"""Выполнение поисковых запросов вне GUI-потока."""
+
+import logging
+import threading
+from typing import Any, Callable, Optional
+
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, QTimer, pyqtSignal
+
+
+logger = logging.getLogger(__name__)
+
+# Задержка перед запуском поиска после последнего нажатия клавиши (мс)
+SEARCH_DEBOUNCE_MS = 250
+
+
+class _SearchTask(QRunnable):
+    """Задача поиска для пула потоков."""
+
+    def __init__(
+        self,
+        executor: 'SearchExecutor',
+        generation: int,
+        query: Callable[[], Any]
+    ):
+        """Инициализация задачи."""
+        super().__init__()
+        self.executor = executor
+        self.generation = generation
+        self.query = query
+
+    def run(self):
+        """Выполнение запроса."""
+        self.executor._run_query(self.generation, self.query)
+
+
+class SearchExecutor(QObject):
+    """Исполнитель поиска с задержкой ввода и отменой устаревших запросов.
+
+    Каждый новый запрос получает номер поколения. Запросы выполняются
+    в отдельном потоке по одному; запрос, устаревший до начала
+    выполнения, пропускается, а результат устаревшего запроса
+    не доставляется. Сигнал results_ready приходит в GUI-поток только
+    с результатом последнего запроса.
+    """
+
+    results_ready = pyqtSignal(object)
+    failed = pyqtSignal(str)
+    _finished = pyqtSignal(int, object, str)
+
+    def __init__(
+        self,
+        parent: Optional[QObject] = None,
+        debounce_ms: int = SEARCH_DEBOUNCE_MS
+    ):
+        """Инициализация исполнителя."""
+        super().__init__(parent)
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._query: Optional[Callable[[], Any]] = None
+        self._pool = QThreadPool(self)
+        self._pool.setMaxThreadCount(1)
+
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(debounce_ms)
+        self._timer.timeout.connect(self._start)
+
+        self._finished.connect(self._on_finished)
+
+    def schedule(self, query: Callable[[], Any]) -> None:
+        """Запустить запрос после паузы во вводе."""
+        self._query = query
+        self._timer.start()
+
+    def run_now(self, query: Callable[[], Any]) -> None:
+        """Запустить запрос без задержки."""
+        self._timer.stop()
+        self._query = query
+        self._start()
+
+    def cancel(self) -> None:
+        """Отменить ожидающие и выполняющиеся запросы."""
+        self._timer.stop()
+        with self._lock:
+            self._generation += 1
+
+    def shutdown(self) -> None:
+        """Отменить запросы и дождаться завершения потока."""
+        self.cancel()
+        self._pool.clear()
+        self._pool.waitForDone()
+
+    def _is_current(self, generation: int) -> bool:
+        """Проверить, что запрос не устарел."""
+        with self._lock:
+            return generation == self._generation
+
+    def _start(self) -> None:
+        """Поставить текущий запрос в очередь."""
+        with self._lock:
+            self._generation += 1
+            generation = self._generation
+        self._pool.start(_SearchTask(self, generation, self._query))
+
+    def _run_query(self, generation: int, query: Callable[[], Any]) -> None:
+        """Выполнить запрос в рабочем потоке."""
+        if not self._is_current(generation):
+            return
+
+        try:
+            result = query()
+        except Exception as e:
+            logger.error(f'Ошибка при выполнении поиска: {e}')
+            self._finished.emit(generation, None, str(e))
+            return
+
+        if self._is_current(generation):
+            self._finished.emit(generation, result, '')
+
+    def _on_finished(self, generation: int, result: Any, error: str) -> None:
+        """Доставить результат последнего запроса в GUI-поток."""
+        if not self._is_current(generation):
+            return
+        if error:
+            self.failed.emit(error)
+        else:
+            self.results_ready.emit(result)
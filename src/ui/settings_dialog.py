@@ -6,7 +6,7 @@ from PyQt5.QtWidgets import (
     QMessageBox
 )
 
-from src import db
+from src import db, db_writer
 
 
 class SettingsDialog(QDialog):
@@ -69,12 +69,12 @@ class SettingsDialog(QDialog):
 
     def save_and_accept(self):
         """Сохранить настройки и закрыть диалог."""
-        # Сохранение темы
         theme = 'dark' if self.theme_combo.currentIndex() == 1 else 'light'
-        db.set_setting('theme', theme)
-
-        # Сохранение размера шрифта
         font_size = str(self.font_size_spin.value())
-        db.set_setting('font_size', font_size)
+
+        # Сохранение темы и размера шрифта одной транзакцией
+        db_writer.get_writer().submit(
+            db.set_settings, {'theme': theme, 'font_size': font_size}
+        ).result()
 
         self.accept()
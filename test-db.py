@@ -2,16 +2,441 @@
 
 import sys
 import sqlite3
-from typing import List, Dict, Any, Optional
+import threading
+import time
+import zlib
+from typing import List, Dict, Any, Optional, Sequence
 
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import (
+    Qt, QAbstractTableModel, QModelIndex, QThread, pyqtSignal
+)
+from PyQt5.QtGui import QFont, QKeySequence
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
-    QPushButton, QTableWidget, QTableWidgetItem, QComboBox, QLabel,
+    QPushButton, QTableView, QComboBox, QLabel,
     QMessageBox, QFileDialog, QDialog, QDialogButtonBox, QFormLayout,
-    QLineEdit, QTextEdit, QSpinBox, QHeaderView
+    QLineEdit, QTextEdit, QSpinBox, QHeaderView, QTabWidget, QSplitter,
+    QPlainTextEdit, QShortcut
 )
 
+from src import db
+
+
+# Максимальная длина значения, отображаемого в ячейке
+MAX_CELL_LENGTH = 200
+
+# Имя служебной колонки с rowid в выборке страницы
+ROWID_COLUMN = '__rowid__'
+
+# Размер пачки строк, передаваемой из потока SQL-консоли в таблицу
+CONSOLE_BATCH_SIZE = 500
+# Максимальное количество строк, показываемых в SQL-консоли
+CONSOLE_MAX_ROWS = 100000
+
+
+def format_cell(value: Any) -> str:
+    """Преобразовать значение ячейки в строку для отображения."""
+    if value is None:
+        return 'NULL'
+    if isinstance(value, bytes):
+        return f'<BLOB {len(value)} байт>'
+    text = str(value)
+    if len(text) > MAX_CELL_LENGTH:
+        return text[:MAX_CELL_LENGTH] + '...'
+    return text
+
+
+class QueryTableModel(QAbstractTableModel):
+    """Модель таблицы для строк, полученных из SQLite.
+
+    Ячейки форматируются только при отрисовке видимой части таблицы;
+    исходное значение доступно через Qt.UserRole.
+    """
+
+    def __init__(self, parent=None):
+        """Инициализация модели."""
+        super().__init__(parent)
+        self.columns: List[str] = []
+        self.rows: List[Sequence[Any]] = []
+
+    def set_data(self, columns: List[str], rows: List[Sequence[Any]]):
+        """Заменить содержимое модели."""
+        self.beginResetModel()
+        self.columns = columns
+        self.rows = rows
+        self.endResetModel()
+
+    def append_rows(self, rows: List[Sequence[Any]]):
+        """Добавить строки в конец модели."""
+        if not rows:
+            return
+        start = len(self.rows)
+        self.beginInsertRows(QModelIndex(), start, start + len(rows) - 1)
+        self.rows.extend(rows)
+        self.endInsertRows()
+
+    def row_values(self, row: int) -> Dict[str, Any]:
+        """Получить значения строки по именам колонок."""
+        return dict(zip(self.columns, self.rows[row]))
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        """Количество строк."""
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()) -> int:
+        """Количество колонок."""
+        return 0 if parent.isValid() else len(self.columns)
+
+    def data(self, index: QModelIndex, role: int = Qt.DisplayRole):
+        """Значение ячейки."""
+        if not index.isValid():
+            return None
+        value = self.rows[index.row()][index.column()]
+        if role == Qt.DisplayRole:
+            return format_cell(value)
+        if role == Qt.UserRole:
+            return value
+        if role == Qt.ToolTipRole and isinstance(value, str):
+            return value[:2000]
+        return None
+
+    def headerData(
+        self,
+        section: int,
+        orientation: Qt.Orientation,
+        role: int = Qt.DisplayRole
+    ):
+        """Заголовки колонок и номера строк."""
+        if role != Qt.DisplayRole:
+            return None
+        if orientation == Qt.Horizontal:
+            return self.columns[section]
+        return section + 1
+
+
+class CountWorker(QThread):
+    """Поток для точного подсчёта строк таблицы в отдельном соединении."""
+
+    counted = pyqtSignal(str, int)
+
+    def __init__(self, db_path: str, table: str):
+        """Инициализация потока."""
+        super().__init__()
+        self.db_path = db_path
+        self.table = table
+
+    def run(self):
+        """Выполнение подсчёта."""
+        try:
+            conn = sqlite3.connect(f'file:{self.db_path}?mode=ro', uri=True)
+            try:
+                count = conn.execute(
+                    f'SELECT COUNT(*) FROM "{self.table}"'
+                ).fetchone()[0]
+            finally:
+                conn.close()
+        except sqlite3.Error:
+            return
+        self.counted.emit(self.table, count)
+
+
+def register_functions(conn: sqlite3.Connection) -> None:
+    """Зарегистрировать SQL-функции ChatList (decode_response).
+
+    Позволяет выполнять в консоли те же запросы, что и приложение,
+    включая поиск по сжатым ответам.
+    """
+    dicts: Dict[int, bytes] = {}
+    try:
+        for dict_id, data in conn.execute(
+            'SELECT id, data FROM compression_dicts'
+        ):
+            dicts[dict_id] = bytes(data)
+    except sqlite3.Error:
+        # В базе нет таблицы словарей сжатия
+        pass
+
+    def decode_response(value, compression, dict_id):
+        if value is None or not compression:
+            return value
+        try:
+            return db.decode_response(value, compression, dict_id, dicts)
+        except (ValueError, zlib.error):
+            return None
+
+    conn.create_function(
+        'decode_response', 3, decode_response, deterministic=True
+    )
+
+
+def format_query_plan(rows: List[Sequence[Any]]) -> str:
+    """Отформатировать EXPLAIN QUERY PLAN в виде дерева."""
+    depth = {0: -1}
+    lines = []
+    for node_id, parent_id, _, detail in rows:
+        level = depth.get(parent_id, -1) + 1
+        depth[node_id] = level
+        lines.append('  ' * level + detail)
+    return '\n'.join(lines)
+
+
+class QueryWorker(QThread):
+    """Поток для выполнения запроса SQL-консоли.
+
+    Запрос выполняется в отдельном соединении только для чтения,
+    строки передаются пачками по мере чтения курсора. Отмена
+    прерывает выполнение через sqlite3.Connection.interrupt().
+    """
+
+    columns_ready = pyqtSignal(list)
+    rows_ready = pyqtSignal(list)
+    plan_ready = pyqtSignal(str)
+    finished = pyqtSignal(dict)
+
+    def __init__(self, db_path: str, sql: str, plan_only: bool = False):
+        """Инициализация потока."""
+        super().__init__()
+        self.db_path = db_path
+        self.sql = sql
+        self.plan_only = plan_only
+        self.connection: Optional[sqlite3.Connection] = None
+        self._cancelled = False
+        # Защищает connection от закрытия во время interrupt()
+        self._lock = threading.Lock()
+
+    def cancel(self):
+        """Прервать выполнение запроса."""
+        with self._lock:
+            self._cancelled = True
+            if self.connection:
+                self.connection.interrupt()
+
+    def run(self):
+        """Выполнение запроса."""
+        stats: Dict[str, Any] = {'rows': 0, 'truncated': False}
+        start_time = time.perf_counter()
+        try:
+            connection = sqlite3.connect(
+                f'file:{self.db_path}?mode=ro',
+                uri=True,
+                check_same_thread=False
+            )
+            with self._lock:
+                self.connection = connection
+            register_functions(self.connection)
+
+            try:
+                plan = self.connection.execute(
+                    f'EXPLAIN QUERY PLAN {self.sql}'
+                ).fetchall()
+                self.plan_ready.emit(format_query_plan(plan))
+            except sqlite3.Error as e:
+                self.plan_ready.emit(f'План недоступен: {e}')
+
+            if not self.plan_only:
+                self.execute(stats)
+        except sqlite3.Error as e:
+            if self._cancelled:
+                stats['cancelled'] = True
+            else:
+                stats['error'] = str(e)
+        finally:
+            with self._lock:
+                if self.connection:
+                    self.connection.close()
+                    self.connection = None
+            stats['elapsed'] = time.perf_counter() - start_time
+            self.finished.emit(stats)
+
+    def execute(self, stats: Dict[str, Any]):
+        """Выполнить запрос и передать строки пачками."""
+        start_time = time.perf_counter()
+        cursor = self.connection.execute(self.sql)
+        columns = [col[0] for col in cursor.description or []]
+        self.columns_ready.emit(columns)
+
+        while not self._cancelled:
+            rows = cursor.fetchmany(CONSOLE_BATCH_SIZE)
+            if not rows:
+                break
+            if stats['rows'] == 0:
+                stats['first_row'] = time.perf_counter() - start_time
+            room = CONSOLE_MAX_ROWS - stats['rows']
+            if len(rows) > room:
+                rows = rows[:room]
+                stats['truncated'] = True
+            stats['rows'] += len(rows)
+            self.rows_ready.emit(rows)
+            if stats['truncated']:
+                break
+
+        stats['cancelled'] = self._cancelled
+        stats['query_time'] = time.perf_counter() - start_time
+
+
+class SqlConsole(QWidget):
+    """Вкладка для выполнения произвольных запросов на чтение."""
+
+    def __init__(self, viewer: 'DatabaseViewer'):
+        """Инициализация вкладки."""
+        super().__init__(viewer)
+        self.viewer = viewer
+        self.worker: Optional[QueryWorker] = None
+        self.init_ui()
+
+    def init_ui(self):
+        """Инициализация интерфейса."""
+        layout = QVBoxLayout()
+        self.setLayout(layout)
+
+        self.sql_input = QPlainTextEdit()
+        self.sql_input.setFont(QFont('Courier New'))
+        self.sql_input.setPlaceholderText(
+            'SELECT ... (Ctrl+Enter - выполнить)'
+        )
+
+        buttons_layout = QHBoxLayout()
+        self.run_button = QPushButton('Выполнить')
+        self.run_button.clicked.connect(self.on_run_clicked)
+        buttons_layout.addWidget(self.run_button)
+
+        self.plan_button = QPushButton('План запроса')
+        self.plan_button.clicked.connect(self.on_plan_clicked)
+        buttons_layout.addWidget(self.plan_button)
+
+        self.cancel_button = QPushButton('Отмена')
+        self.cancel_button.clicked.connect(self.on_cancel_clicked)
+        self.cancel_button.setEnabled(False)
+        buttons_layout.addWidget(self.cancel_button)
+
+        self.status_label = QLabel('')
+        buttons_layout.addWidget(self.status_label)
+        buttons_layout.addStretch()
+
+        QShortcut(
+            QKeySequence('Ctrl+Return'), self.sql_input, self.on_run_clicked
+        )
+
+        self.plan_output = QPlainTextEdit()
+        self.plan_output.setReadOnly(True)
+        self.plan_output.setFont(QFont('Courier New'))
+        self.plan_output.setPlaceholderText('EXPLAIN QUERY PLAN')
+
+        self.result_view = QTableView()
+        self.result_model = QueryTableModel(self.result_view)
+        self.result_view.setModel(self.result_model)
+        self.result_view.setAlternatingRowColors(True)
+        self.result_view.setWordWrap(False)
+        self.result_view.setEditTriggers(QTableView.NoEditTriggers)
+        self.result_view.horizontalHeader().setMaximumSectionSize(400)
+
+        splitter = QSplitter(Qt.Vertical)
+        top = QWidget()
+        top_layout = QVBoxLayout()
+        top_layout.setContentsMargins(0, 0, 0, 0)
+        top.setLayout(top_layout)
+        top_layout.addWidget(self.sql_input)
+        top_layout.addLayout(buttons_layout)
+        splitter.addWidget(top)
+        splitter.addWidget(self.plan_output)
+        splitter.addWidget(self.result_view)
+        splitter.setSizes([200, 100, 500])
+        layout.addWidget(splitter)
+
+    def start(self, plan_only: bool):
+        """Запустить запрос в фоновом потоке."""
+        sql = self.sql_input.toPlainText().strip().rstrip(';')
+        if not sql:
+            return
+
+        if not self.viewer.db_path:
+            QMessageBox.warning(
+                self, 'Предупреждение', 'Сначала выберите файл базы данных!'
+            )
+            return
+
+        if self.worker:
+            return
+
+        self.result_model.set_data([], [])
+        self.plan_output.clear()
+        self.status_label.setText('Выполнение...')
+        self.run_button.setEnabled(False)
+        self.plan_button.setEnabled(False)
+        self.cancel_button.setEnabled(True)
+
+        self.worker = QueryWorker(self.viewer.db_path, sql, plan_only)
+        self.worker.columns_ready.connect(self.on_columns_ready)
+        self.worker.rows_ready.connect(self.on_rows_ready)
+        self.worker.plan_ready.connect(self.plan_output.setPlainText)
+        self.worker.finished.connect(self.on_finished)
+        self.worker.start()
+
+    def on_run_clicked(self):
+        """Выполнить запрос."""
+        self.start(plan_only=False)
+
+    def on_plan_clicked(self):
+        """Показать только план запроса."""
+        self.start(plan_only=True)
+
+    def on_cancel_clicked(self):
+        """Отменить выполняющийся запрос."""
+        if self.worker:
+            self.worker.cancel()
+
+    def on_columns_ready(self, columns: list):
+        """Обработчик получения списка колонок."""
+        self.result_model.set_data(columns, [])
+
+    def on_rows_ready(self, rows: list):
+        """Обработчик получения очередной пачки строк."""
+        first_batch = not self.result_model.rows
+        self.result_model.append_rows(rows)
+        if first_batch:
+            self.result_view.resizeColumnsToContents()
+        self.status_label.setText(
+            f'Получено строк: {len(self.result_model.rows)}...'
+        )
+
+    def on_finished(self, stats: dict):
+        """Обработчик завершения запроса."""
+        self.worker.wait()
+        self.worker = None
+        self.run_button.setEnabled(True)
+        self.plan_button.setEnabled(True)
+        self.cancel_button.setEnabled(False)
+
+        if stats.get('error'):
+            self.status_label.setText('Ошибка')
+            QMessageBox.critical(
+                self,
+                'Ошибка',
+                f'Ошибка при выполнении запроса:\n{stats["error"]}'
+            )
+            return
+
+        text = f'Время: {stats["elapsed"] * 1000:.1f} мс'
+        if 'query_time' in stats:
+            text = (
+                f'Строк: {stats["rows"]}'
+                f'{" (показаны первые)" if stats["truncated"] else ""}, '
+                f'запрос: {stats["query_time"] * 1000:.1f} мс'
+            )
+            if 'first_row' in stats:
+                text += (
+                    f', первая строка: {stats["first_row"] * 1000:.1f} мс'
+                )
+        if stats.get('cancelled'):
+            text += ' - отменено'
+        self.status_label.setText(text)
+
+    def shutdown(self):
+        """Прервать запрос и дождаться завершения потока."""
+        if self.worker:
+            self.worker.cancel()
+            self.worker.wait()
+
 
 class DatabaseViewer(QMainWindow):
     """Главное окно для просмотра базы данных."""
@@ -28,6 +453,17 @@ class DatabaseViewer(QMainWindow):
         self.current_page = 1
         self.rows_per_page = 50
 
+        # Постраничный просмотр по rowid: границы текущей страницы
+        self.has_rowid = True
+        self.first_rowid: Optional[int] = None
+        self.last_rowid: Optional[int] = None
+        self.has_prev = False
+        self.has_next = False
+
+        # Кэш количества строк: таблица -> (количество, точное ли значение)
+        self.row_counts: Dict[str, tuple] = {}
+        self.count_workers: List[CountWorker] = []
+
         self.init_ui()
 
     def init_ui(self):
@@ -35,12 +471,25 @@ class DatabaseViewer(QMainWindow):
         central_widget = QWidget()
         self.setCentralWidget(central_widget)
 
-        layout = QVBoxLayout()
-        central_widget.setLayout(layout)
+        main_layout = QVBoxLayout()
+        central_widget.setLayout(main_layout)
 
         # Панель выбора файла
         file_panel = self.create_file_panel()
-        layout.addWidget(file_panel)
+        main_layout.addWidget(file_panel)
+
+        tabs = QTabWidget()
+        main_layout.addWidget(tabs)
+
+        # Вкладка просмотра таблиц
+        tables_tab = QWidget()
+        layout = QVBoxLayout()
+        tables_tab.setLayout(layout)
+        tabs.addTab(tables_tab, 'Таблицы')
+
+        # Вкладка SQL-консоли
+        self.sql_console = SqlConsole(self)
+        tabs.addTab(self.sql_console, 'SQL-консоль')
 
         # Панель выбора таблицы
         table_panel = self.create_table_panel()
@@ -127,12 +576,21 @@ class DatabaseViewer(QMainWindow):
 
         return panel
 
-    def create_data_table(self) -> QTableWidget:
+    def create_data_table(self) -> QTableView:
         """Создать таблицу данных."""
-        table = QTableWidget()
+        table = QTableView()
+        self.table_model = QueryTableModel(table)
+        table.setModel(self.table_model)
         table.setAlternatingRowColors(True)
-        table.setSelectionBehavior(QTableWidget.SelectRows)
-        table.setEditTriggers(QTableWidget.NoEditTriggers)
+        table.setSelectionBehavior(QTableView.SelectRows)
+        table.setSelectionMode(QTableView.SingleSelection)
+        table.setEditTriggers(QTableView.NoEditTriggers)
+        table.setWordWrap(False)
+        header = table.horizontalHeader()
+        header.setSectionResizeMode(QHeaderView.Interactive)
+        # Ширина колонок подбирается по первым строкам, а не по всем
+        header.setResizeContentsPrecision(20)
+        header.setMaximumSectionSize(400)
         return table
 
     def create_pagination_panel(self) -> QWidget:
@@ -144,6 +602,11 @@ class DatabaseViewer(QMainWindow):
         self.page_info_label = QLabel('Страница: 0 / 0')
         layout.addWidget(self.page_info_label)
 
+        self.first_button = QPushButton('|◄ Первая')
+        self.first_button.clicked.connect(self.on_first_page)
+        self.first_button.setEnabled(False)
+        layout.addWidget(self.first_button)
+
         self.prev_button = QPushButton('◄ Предыдущая')
         self.prev_button.clicked.connect(self.on_prev_page)
         self.prev_button.setEnabled(False)
@@ -154,6 +617,11 @@ class DatabaseViewer(QMainWindow):
         self.next_button.setEnabled(False)
         layout.addWidget(self.next_button)
 
+        self.last_button = QPushButton('Последняя ►|')
+        self.last_button.clicked.connect(self.on_last_page)
+        self.last_button.setEnabled(False)
+        layout.addWidget(self.last_button)
+
         layout.addStretch()
         return panel
 
@@ -174,6 +642,7 @@ class DatabaseViewer(QMainWindow):
                 # Подключение к базе данных
                 self.connection = sqlite3.connect(filename)
                 self.connection.row_factory = sqlite3.Row
+                self.row_counts.clear()
 
                 # Загрузка списка таблиц
                 self.load_tables()
@@ -232,84 +701,218 @@ class DatabaseViewer(QMainWindow):
         if not self.current_table or not self.connection:
             return
 
+        self.has_rowid = self.table_has_rowid()
+        self.current_page = 1
         self.load_table_data()
+        self.data_table.resizeColumnsToContents()
         self.add_button.setEnabled(True)
         self.edit_button.setEnabled(True)
         self.delete_button.setEnabled(True)
 
-    def get_total_rows(self) -> int:
-        """Получить общее количество строк в таблице."""
-        if not self.current_table or not self.connection:
-            return 0
-
+    def table_has_rowid(self) -> bool:
+        """Проверить, есть ли у таблицы rowid (нет у WITHOUT ROWID)."""
         try:
-            cursor = self.connection.cursor()
-            cursor.execute(f'SELECT COUNT(*) FROM "{self.current_table}"')
-            return cursor.fetchone()[0]
-        except Exception as e:
-            QMessageBox.critical(
-                self,
-                'Ошибка',
-                f'Ошибка при подсчёте строк:\n{str(e)}'
+            self.connection.execute(
+                f'SELECT rowid FROM "{self.current_table}" LIMIT 0'
             )
-            return 0
+            return True
+        except sqlite3.OperationalError:
+            return False
+
+    def estimate_rows(self) -> int:
+        """Оценить количество строк без полного сканирования таблицы.
 
-    def load_table_data(self):
-        """Загрузить данные таблицы с пагинацией."""
+        Используется статистика ANALYZE (sqlite_stat1), а если её нет -
+        наибольший rowid.
+        """
+        cursor = self.connection.cursor()
+        try:
+            cursor.execute(
+                'SELECT stat FROM sqlite_stat1 WHERE tbl = ?',
+                (self.current_table,)
+            )
+            row = cursor.fetchone()
+            if row and row[0]:
+                return int(row[0].split()[0])
+        except sqlite3.OperationalError:
+            # Таблицы sqlite_stat1 нет, пока не выполнялся ANALYZE
+            pass
+
+        if self.has_rowid:
+            cursor.execute(f'SELECT MAX(rowid) FROM "{self.current_table}"')
+            return cursor.fetchone()[0] or 0
+        return 0
+
+    def get_total_rows(self) -> tuple:
+        """Получить количество строк таблицы и признак точного значения.
+
+        Точное количество считается один раз в фоновом потоке и
+        кэшируется; до его получения показывается оценка.
+        """
         if not self.current_table or not self.connection:
-            return
+            return 0, True
+
+        cached = self.row_counts.get(self.current_table)
+        if cached:
+            return cached
 
         try:
-            # Получаем структуру таблицы
-            cursor = self.connection.cursor()
-            cursor.execute(f'PRAGMA table_info("{self.current_table}")')
-            columns_info = cursor.fetchall()
+            estimate = self.estimate_rows()
+        except Exception:
+            estimate = 0
+        self.row_counts[self.current_table] = (estimate, False)
+        self.start_count(self.current_table)
+        return estimate, False
+
+    def start_count(self, table: str):
+        """Запустить точный подсчёт строк таблицы в фоновом потоке."""
+        if not self.db_path:
+            return
+        worker = CountWorker(self.db_path, table)
+        worker.counted.connect(self.on_count_finished)
+        worker.finished.connect(
+            lambda w=worker: self.count_workers.remove(w)
+        )
+        self.count_workers.append(worker)
+        worker.start()
+
+    def on_count_finished(self, table: str, count: int):
+        """Обработчик завершения подсчёта строк."""
+        self.row_counts[table] = (count, True)
+        if table == self.current_table:
+            self.update_page_info()
+
+    def change_row_count(self, delta: int):
+        """Скорректировать кэшированное количество строк после изменения."""
+        cached = self.row_counts.get(self.current_table)
+        if cached:
+            self.row_counts[self.current_table] = (
+                max(cached[0] + delta, 0), cached[1]
+            )
 
-            column_names = [col[1] for col in columns_info]
-            column_types = {col[1]: col[2] for col in columns_info}
+    def update_page_info(self):
+        """Обновить номер страницы и количество строк."""
+        total_rows, exact = self.get_total_rows()
+        total_pages = max(
+            (total_rows + self.rows_per_page - 1) // self.rows_per_page, 1
+        )
+        prefix = '' if exact else '≈'
+        self.page_info_label.setText(
+            f'Страница: {self.current_page} / {prefix}{total_pages} '
+            f'(Всего строк: {prefix}{total_rows})'
+        )
 
-            # Настройка таблицы
-            self.data_table.setColumnCount(len(column_names))
-            self.data_table.setHorizontalHeaderLabels(column_names)
+    def fetch_page(self, direction: str) -> List[sqlite3.Row]:
+        """Получить строки страницы.
 
-            # Получаем общее количество строк
-            total_rows = self.get_total_rows()
-            total_pages = (total_rows + self.rows_per_page - 1) // self.rows_per_page
+        direction: 'first', 'next', 'prev', 'last' или 'current'.
+        Для таблиц с rowid используется выборка по диапазону rowid,
+        которая не зависит от номера страницы; для WITHOUT ROWID -
+        LIMIT/OFFSET.
+        """
+        cursor = self.connection.cursor()
+        table = self.current_table
+        limit = self.rows_per_page
 
-            # Обновление информации о странице
-            self.page_info_label.setText(
-                f'Страница: {self.current_page} / {max(total_pages, 1)} '
-                f'(Всего строк: {total_rows})'
+        if not self.has_rowid:
+            offset = (self.current_page - 1) * limit
+            cursor.execute(
+                f'SELECT * FROM "{table}" LIMIT ? OFFSET ?',
+                (limit + 1, offset)
             )
+            rows = cursor.fetchall()
+            self.has_prev = self.current_page > 1
+            self.has_next = len(rows) > limit
+            return rows[:limit]
 
-            # Кнопки пагинации
-            self.prev_button.setEnabled(self.current_page > 1)
-            self.next_button.setEnabled(self.current_page < total_pages)
-
-            # Загрузка данных с пагинацией
-            offset = (self.current_page - 1) * self.rows_per_page
+        select = f'SELECT rowid AS {ROWID_COLUMN}, * FROM "{table}"'
+        if direction == 'next' and self.last_rowid is not None:
             cursor.execute(
-                f'SELECT * FROM "{self.current_table}" '
-                f'LIMIT {self.rows_per_page} OFFSET {offset}'
+                f'{select} WHERE rowid > ? ORDER BY rowid LIMIT ?',
+                (self.last_rowid, limit)
             )
             rows = cursor.fetchall()
+        elif direction == 'current' and self.first_rowid is not None:
+            cursor.execute(
+                f'{select} WHERE rowid >= ? ORDER BY rowid LIMIT ?',
+                (self.first_rowid, limit)
+            )
+            rows = cursor.fetchall()
+        elif direction == 'prev' and self.first_rowid is not None:
+            cursor.execute(
+                f'{select} WHERE rowid < ? ORDER BY rowid DESC LIMIT ?',
+                (self.first_rowid, limit)
+            )
+            rows = cursor.fetchall()[::-1]
+        elif direction == 'last':
+            cursor.execute(
+                f'{select} ORDER BY rowid DESC LIMIT ?', (limit,)
+            )
+            rows = cursor.fetchall()[::-1]
+        else:
+            cursor.execute(f'{select} ORDER BY rowid LIMIT ?', (limit,))
+            rows = cursor.fetchall()
 
-            self.data_table.setRowCount(len(rows))
+        if rows:
+            self.first_rowid = rows[0][ROWID_COLUMN]
+            self.last_rowid = rows[-1][ROWID_COLUMN]
+        else:
+            self.first_rowid = self.last_rowid = None
+
+        # Наличие соседних страниц проверяется по индексу rowid
+        self.has_prev = self.first_rowid is not None and cursor.execute(
+            f'SELECT 1 FROM "{table}" WHERE rowid < ? LIMIT 1',
+            (self.first_rowid,)
+        ).fetchone() is not None
+        self.has_next = self.last_rowid is not None and cursor.execute(
+            f'SELECT 1 FROM "{table}" WHERE rowid > ? LIMIT 1',
+            (self.last_rowid,)
+        ).fetchone() is not None
+        return rows
+
+    def load_table_data(self, direction: str = 'first'):
+        """Загрузить страницу данных таблицы."""
+        if not self.current_table or not self.connection:
+            return
 
-            for row_idx, row in enumerate(rows):
-                for col_idx, col_name in enumerate(column_names):
-                    value = row[col_name]
-                    if value is None:
-                        display_value = 'NULL'
-                    else:
-                        display_value = str(value)
+        try:
+            if direction == 'first':
+                self.current_page = 1
+            elif direction == 'last':
+                total_rows, exact = self.get_total_rows()
+                if not exact and not self.has_rowid:
+                    # Для LIMIT/OFFSET номер последней страницы нужен точно
+                    total_rows = self.connection.execute(
+                        f'SELECT COUNT(*) FROM "{self.current_table}"'
+                    ).fetchone()[0]
+                    self.row_counts[self.current_table] = (total_rows, True)
+                self.current_page = max(
+                    (total_rows + self.rows_per_page - 1)
+                    // self.rows_per_page,
+                    1
+                )
+
+            rows = self.fetch_page(direction)
 
-                    item = QTableWidgetItem(display_value)
-                    item.setData(Qt.UserRole, value)  # Сохраняем исходное значение
-                    self.data_table.setItem(row_idx, col_idx, item)
+            if rows:
+                columns = list(rows[0].keys())
+            else:
+                columns = [
+                    col['name'] for col in self.get_table_structure()
+                ]
+
+            self.table_model.set_data(columns, [tuple(row) for row in rows])
+            self.data_table.setColumnHidden(
+                0, bool(columns) and columns[0] == ROWID_COLUMN
+            )
 
-            # Автоподбор ширины колонок
-            self.data_table.resizeColumnsToContents()
+            self.update_page_info()
+
+            # Кнопки пагинации
+            self.first_button.setEnabled(self.has_prev)
+            self.prev_button.setEnabled(self.has_prev)
+            self.next_button.setEnabled(self.has_next)
+            self.last_button.setEnabled(self.has_next)
 
         except Exception as e:
             QMessageBox.critical(
@@ -321,23 +924,28 @@ class DatabaseViewer(QMainWindow):
     def on_rows_per_page_changed(self, value: int):
         """Обработчик изменения количества строк на странице."""
         self.rows_per_page = value
-        self.current_page = 1
         if self.current_table:
             self.load_table_data()
 
+    def on_first_page(self):
+        """Переход на первую страницу."""
+        self.load_table_data('first')
+
     def on_prev_page(self):
         """Переход на предыдущую страницу."""
-        if self.current_page > 1:
-            self.current_page -= 1
-            self.load_table_data()
+        if self.has_prev:
+            self.current_page = max(self.current_page - 1, 1)
+            self.load_table_data('prev')
 
     def on_next_page(self):
         """Переход на следующую страницу."""
-        total_rows = self.get_total_rows()
-        total_pages = (total_rows + self.rows_per_page - 1) // self.rows_per_page
-        if self.current_page < total_pages:
+        if self.has_next:
             self.current_page += 1
-            self.load_table_data()
+            self.load_table_data('next')
+
+    def on_last_page(self):
+        """Переход на последнюю страницу."""
+        self.load_table_data('last')
 
     def get_table_structure(self) -> List[Dict[str, Any]]:
         """Получить структуру таблицы."""
@@ -360,6 +968,13 @@ class DatabaseViewer(QMainWindow):
             for col in columns
         ]
 
+    def get_selected_row(self) -> Optional[Dict[str, Any]]:
+        """Получить значения выбранной строки."""
+        index = self.data_table.currentIndex()
+        if not index.isValid():
+            return None
+        return self.table_model.row_values(index.row())
+
     def on_add_clicked(self):
         """Обработчик добавления записи."""
         if not self.current_table or not self.connection:
@@ -368,19 +983,19 @@ class DatabaseViewer(QMainWindow):
         structure = self.get_table_structure()
         dialog = RecordEditDialog(self, structure, self.current_table, None)
         if dialog.exec_() == QDialog.Accepted:
-            self.load_table_data()
+            self.change_row_count(1)
+            self.load_table_data('current')
 
     def on_edit_clicked(self):
         """Обработчик редактирования записи."""
-        current_row = self.data_table.currentRow()
-        if current_row < 0:
+        row_values = self.get_selected_row()
+        if row_values is None:
             QMessageBox.warning(self, 'Предупреждение', 'Выберите строку!')
             return
 
         if not self.current_table or not self.connection:
             return
 
-        # Получаем значения текущей строки
         structure = self.get_table_structure()
         primary_keys = [col for col in structure if col['pk']]
 
@@ -392,25 +1007,7 @@ class DatabaseViewer(QMainWindow):
             )
             return
 
-        # Получаем значения первичного ключа
-        pk_values = {}
-        for pk_col in primary_keys:
-            col_idx = next(
-                (i for i, col in enumerate(structure) if col['name'] == pk_col['name']),
-                None
-            )
-            if col_idx is not None:
-                item = self.data_table.item(current_row, col_idx)
-                if item:
-                    pk_values[pk_col['name']] = item.data(Qt.UserRole)
-
-        # Получаем все значения строки
-        row_values = {}
-        for col_idx, col in enumerate(structure):
-            item = self.data_table.item(current_row, col_idx)
-            if item:
-                row_values[col['name']] = item.data(Qt.UserRole)
-
+        row_values.pop(ROWID_COLUMN, None)
         dialog = RecordEditDialog(
             self,
             structure,
@@ -418,12 +1015,12 @@ class DatabaseViewer(QMainWindow):
             row_values
         )
         if dialog.exec_() == QDialog.Accepted:
-            self.load_table_data()
+            self.load_table_data('current')
 
     def on_delete_clicked(self):
         """Обработчик удаления записи."""
-        current_row = self.data_table.currentRow()
-        if current_row < 0:
+        row_values = self.get_selected_row()
+        if row_values is None:
             QMessageBox.warning(self, 'Предупреждение', 'Выберите строку!')
             return
 
@@ -441,26 +1038,8 @@ class DatabaseViewer(QMainWindow):
             )
             return
 
-        # Получаем значения первичного ключа
-        pk_conditions = []
-        for pk_col in primary_keys:
-            col_idx = next(
-                (i for i, col in enumerate(structure) if col['name'] == pk_col['name']),
-                None
-            )
-            if col_idx is not None:
-                item = self.data_table.item(current_row, col_idx)
-                if item:
-                    value = item.data(Qt.UserRole)
-                    pk_conditions.append(f'"{pk_col["name"]}" = ?')
-
-        if not pk_conditions:
-            QMessageBox.warning(
-                self,
-                'Предупреждение',
-                'Не удалось определить первичный ключ.'
-            )
-            return
+        pk_conditions = [f'"{pk_col["name"]}" = ?' for pk_col in primary_keys]
+        values = [row_values[pk_col['name']] for pk_col in primary_keys]
 
         reply = QMessageBox.question(
             self,
@@ -475,24 +1054,12 @@ class DatabaseViewer(QMainWindow):
                 where_clause = ' AND '.join(pk_conditions)
                 query = f'DELETE FROM "{self.current_table}" WHERE {where_clause}'
 
-                # Получаем значения для подстановки
-                values = []
-                for pk_col in primary_keys:
-                    col_idx = next(
-                        (i for i, col in enumerate(structure)
-                         if col['name'] == pk_col['name']),
-                        None
-                    )
-                    if col_idx is not None:
-                        item = self.data_table.item(current_row, col_idx)
-                        if item:
-                            values.append(item.data(Qt.UserRole))
-
                 cursor.execute(query, values)
                 self.connection.commit()
+                self.change_row_count(-cursor.rowcount)
 
                 QMessageBox.information(self, 'Успех', 'Запись удалена!')
-                self.load_table_data()
+                self.load_table_data('current')
 
             except Exception as e:
                 QMessageBox.critical(
@@ -504,6 +1071,9 @@ class DatabaseViewer(QMainWindow):
 
     def closeEvent(self, event):
         """Обработчик закрытия окна."""
+        self.sql_console.shutdown()
+        for worker in self.count_workers:
+            worker.wait()
         if self.connection:
             self.connection.close()
         event.accept()
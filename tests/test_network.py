@@ -0,0 +1,110 @@
+"""Тесты распределения запросов к моделям по лимитам провайдеров."""
+
+import http.server
+import json
+import os
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from src import network
+from src.cancellation import CancellationToken
+from src.models import Model
+
+
+# Ответ OpenAI-совместимого API
+RESPONSE = json.dumps(
+    {'choices': [{'message': {'content': 'ok'}}]}
+).encode('utf-8')
+
+
+def start_server(delay: float) -> http.server.ThreadingHTTPServer:
+    """Запустить локальный API, отвечающий через delay секунд."""
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get('Content-Length', 0)))
+            time.sleep(delay)
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(RESPONSE)))
+            self.end_headers()
+            self.wfile.write(RESPONSE)
+
+        def log_message(self, *args):
+            pass
+
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def make_model(model_id: int, server: http.server.HTTPServer) -> Model:
+    """Модель, запросы которой идут на локальный сервер."""
+    return Model(
+        model_id,
+        f'model-{model_id}',
+        f'http://127.0.0.1:{server.server_port}/v1/chat/completions',
+        'CHATLIST_TEST_KEY',
+        1,
+        'openai'
+    )
+
+
+class SubmitPromptTest(unittest.TestCase):
+    """Запросы, ждущие лимита провайдера, не занимают потоки пула."""
+
+    def setUp(self):
+        os.environ['CHATLIST_TEST_KEY'] = 'test-key'
+        # Пул меньше количества запросов к медленному провайдеру
+        self.saved_executor = network._executor
+        network._executor = ThreadPoolExecutor(max_workers=3)
+        self.slow = start_server(delay=1.0)
+        self.fast = start_server(delay=0.0)
+
+    def tearDown(self):
+        network._executor.shutdown(wait=False)
+        network._executor = self.saved_executor
+        self.slow.shutdown()
+        self.fast.shutdown()
+
+    def test_throttled_host_does_not_block_other_host(self):
+        token = CancellationToken(30)
+        slow = [
+            network.submit_prompt('q', make_model(i, self.slow), token)
+            for i in range(1, 11)
+        ]
+        started = time.monotonic()
+        fast = network.submit_prompt('q', make_model(100, self.fast), token)
+
+        result = fast.result(timeout=5)
+        elapsed = time.monotonic() - started
+
+        self.assertTrue(result['success'], result)
+        # Медленный провайдер с лимитом 2 отвечает первым двум запросам
+        # через секунду; быстрый не ждёт ни их, ни остальной очереди
+        self.assertLess(elapsed, 0.8)
+        self.assertFalse(all(future.done() for future in slow))
+        token.cancel()
+
+    def test_cancel_resolves_queued_requests(self):
+        token = CancellationToken()
+        futures = [
+            network.submit_prompt('q', make_model(i, self.slow), token)
+            for i in range(1, 11)
+        ]
+        token.cancel()
+
+        results = [future.result(timeout=5) for future in futures]
+
+        self.assertTrue(all(
+            result['error'] == network.CANCELLED_ERROR for result in results
+        ))
+
+
+if __name__ == '__main__':
+    unittest.main()